@@ -16,6 +16,7 @@ from User.services import (
     send_account_approved_email,
     send_admin_created_email,
 )
+from Pickup.collector_index import invalidate_collector_index
 
 User = get_user_model()
 
@@ -56,6 +57,8 @@ def approve_user(request, pk):
     target.approved_by = request.user
     target.save(update_fields=["is_approved", "is_active", "approved_at", "approved_by"])
 
+    if target.role == "collector":
+        transaction.on_commit(invalidate_collector_index)
     transaction.on_commit(lambda: send_account_approved_email(target))
     messages.success(request, f"Approved. A confirmation email will be sent to {target.email}.")
     return redirect("adminpanel:dashboard")
@@ -69,9 +72,12 @@ def decline_user(request, pk):
         return redirect("adminpanel:dashboard")
 
     target = get_object_or_404(User, pk=pk)
+    was_approved = target.is_approved
     target.is_active = False
     target.is_approved = False
     target.save(update_fields=["is_active", "is_approved"])
+    if was_approved and target.role == "collector":
+        transaction.on_commit(invalidate_collector_index)
     messages.success(request, f"Declined {target.email}.")
     return redirect("adminpanel:dashboard")
 
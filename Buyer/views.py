@@ -16,7 +16,8 @@ from django.db.models import Q,F, ExpressionWrapper,DecimalField, Sum
 
 from RecyCon.models import Product
 from Rewards.models import Activity
-from Pickup.models import PickupRequest
+from Pickup.models import PickupJob
+from Pickup.services import create_pickup
 from Marketplace.models import MarketOrder
 from User.models import User, CollectorRating
 
@@ -44,18 +45,18 @@ def _to_decimal(val, default="0"):
 
 
 def _buyer_stats(user):
-    qs = PickupRequest.objects.filter(requester_id=user.id)
+    qs = PickupJob.objects.filter(requester_id=user.id)
 
-    pending   = qs.filter(status=PickupRequest.Status.PENDING).count()
-    accepted  = qs.filter(status=PickupRequest.Status.ACCEPTED).count()
-    completed = qs.filter(status=PickupRequest.Status.COMPLETED).count()
-    declined  = qs.filter(status=PickupRequest.Status.DECLINED).count()
+    pending   = qs.filter(status=PickupJob.Status.PENDING).count()
+    accepted  = qs.filter(status=PickupJob.Status.ACCEPTED).count()
+    completed = qs.filter(status=PickupJob.Status.COMPLETED).count()
+    declined  = qs.filter(status=PickupJob.Status.DECLINED).count()
 
  
     total_pickups = 0 +  completed
 
     weight_completed = (
-        qs.filter(status=PickupRequest.Status.COMPLETED)
+        qs.filter(status=PickupJob.Status.COMPLETED)
           .aggregate(s=Sum("weight_kg"))["s"] or Decimal("0")
     )
     weight_completed = Decimal(str(weight_completed)).quantize(Decimal("0.001"))
@@ -65,7 +66,7 @@ def _buyer_stats(user):
         output_field=DecimalField(max_digits=12, decimal_places=2)
     )
     earnings_val = (
-        qs.filter(status=PickupRequest.Status.COMPLETED)
+        qs.filter(status=PickupJob.Status.COMPLETED)
           .aggregate(s=Sum(total_expr))["s"] or Decimal("0")
     )
     earnings = Decimal(str(earnings_val)).quantize(Decimal("0.01"))
@@ -110,35 +111,12 @@ def dashboard(request):
             except Exception:
                 messages.error(request, "Please provide valid numbers for weight and price.")
                 return redirect("buyer:dashboard")  
-            with transaction.atomic():
-                product = Product.objects.create(kind=kind, weight=weight, price=price)
-
-            collectors_qs = User.objects.filter(
-            role="collector",
-            is_approved=True
-            ).filter(
-            Q(collector_product__iexact=kind)
-            ).only("id", "collector_product")
-
-            #  PickupRequest
-            created = 0
-            for c in collectors_qs:
-                    _, ok = PickupRequest.objects.get_or_create(
-                        requester=user,
-                        collector=c,
-                        product=product,
-                        defaults={
-                            "status": PickupRequest.Status.PENDING,
-                            "kind": kind,
-                            "weight_kg": weight,
-                            "price": price,
-                        },
-                    )
-                    if ok:
-                        created += 1
-
-            if created:
-                messages.success(request, f"Pickup request sent to {created} matching collector(s).")
+            _, result = create_pickup(requester=user, kind=kind, weight=weight, price=price)
+
+            if result is None:
+                messages.success(request, "Pickup request submitted. Finding matching collectors…")
+            elif result.created:
+                messages.success(request, f"Pickup request sent to {result.created} matching collector(s).")
             else:
                 messages.warning(request, "No approved collectors found for this product type.")
             return redirect("buyer:dashboard")       
@@ -147,9 +125,9 @@ def dashboard(request):
         return redirect("buyer:dashboard")
  
     pickup_qs = (
-       PickupRequest.objects
+       PickupJob.objects
        .filter(requester_id=user.id)
-       .exclude(status=PickupRequest.Status.DECLINED)   
+       .exclude(status=PickupJob.Status.DECLINED)
        .select_related("collector", "product")
     .order_by("-created_at")[:10]
    )
@@ -170,6 +148,7 @@ def dashboard(request):
     ctx = {
         "stats": _buyer_stats(user),
         "requests": pickup_qs,
+        "dispatching": any(r.is_dispatching for r in pickup_qs),
         "orders": orders_qs,
         "order_stats": order_stats,
     }
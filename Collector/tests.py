@@ -1,3 +1,87 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from Pickup.collector_index import VERSION_NAME, candidate_pool
+from Pickup.models import PickupJob
+from RecyCon.models import Product
+from RecyCon.versioning import get_version
+from Rewards.models import Activity
+
+User = get_user_model()
+
+
+class SettingsIndexTests(TestCase):
+    def setUp(self):
+        self.collector = User.objects.create_user(
+            email="col@example.com", password="pw", role="collector", is_active=True,
+            is_approved=True, collector_product="plastic", id_card_image="ids/col.png",
+            map_url="https://www.google.com/maps/@23.7461,90.3742,15z",
+        )
+        self.client.force_login(self.collector)
+
+    def post_profile(self, **fields):
+        data = {
+            "form_type": "profile", "name": "Col", "collector_product": "plastic",
+            "map_url": self.collector.map_url,
+        }
+        data.update(fields)
+        return self.client.post(reverse("collector:settings"), data)
+
+    def test_moving_invalidates_the_index(self):
+        uttara = (23.8747, 90.3984)
+        self.assertGreater(candidate_pool("plastic", uttara).distance_km[0], 10)
+        before = get_version(VERSION_NAME)
+
+        self.post_profile(map_url="https://www.google.com/maps/@23.8747,90.3984,15z")
+
+        self.collector.refresh_from_db()
+        self.assertEqual(self.collector.coordinates, uttara)
+        self.assertNotEqual(get_version(VERSION_NAME), before)
+        self.assertLess(candidate_pool("plastic", uttara).distance_km[0], 0.01)
+
+    def test_unrelated_edit_keeps_the_index(self):
+        before = get_version(VERSION_NAME)
+        self.post_profile(name="Renamed")
+        self.assertEqual(get_version(VERSION_NAME), before)
+
+
+class BulkCompleteTests(TestCase):
+    def setUp(self):
+        self.collector, other = (
+            User.objects.create_user(
+                email=email, password="pw", role="collector", is_active=True, is_approved=True,
+                collector_product="plastic", id_card_image="ids/col.png",
+            )
+            for email in ("col@example.com", "other@example.com")
+        )
+        household = User.objects.create_user(
+            email="house@example.com", password="pw", role="household", is_active=True, is_approved=True,
+        )
+
+        def job(collector):
+            return PickupJob.objects.create(
+                requester=household, collector=collector, status=PickupJob.Status.ACCEPTED,
+                product=Product.objects.create(kind="plastic", weight=2, price=1),
+                kind="plastic", weight_kg=2, price=1,
+            )
+
+        self.mine = [job(self.collector) for _ in range(3)]
+        self.theirs = job(other)
+        self.client.force_login(self.collector)
+
+    def test_completes_only_own_accepted_jobs(self):
+        ids = [j.pk for j in self.mine[:2]] + [self.theirs.pk]
+        response = self.client.post(
+            reverse("collector:dashboard"), {"action": "pickup_complete_bulk", "pickup_ids": ids}
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(PickupJob.objects.filter(status=PickupJob.Status.COMPLETED).values_list("pk", flat=True)),
+            {j.pk for j in self.mine[:2]},
+        )
+        # one activity each for the requester and the collector
+        self.assertEqual(Activity.objects.count(), 4)
+        self.collector.refresh_from_db()
+        self.assertEqual(self.collector.total_pickups, 2)
@@ -10,9 +10,14 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import never_cache
 
 from RecyCon.models import Product
-from Pickup.models import PickupRequest
+from Pickup.models import PickupJob, PickupRequest
+from Pickup.collector_index import index_fields, invalidate_collector_index
+from Pickup.routing import cached_route
+from Pickup.services import accept_pickup, complete_pickup, complete_pickups_bulk, decline_offer
 from Marketplace.models import MarketOrder
+from Rewards.ledger import pickup_key
 from Rewards.models import Activity
+from Rewards.services import log_activity_and_update
 from User.models import User as UserModel, CollectorRating
 from Education.views import (
     education_awareness_c,
@@ -40,8 +45,8 @@ def _co2_for_kind(kind: str) -> Decimal:
 
 
 def _collector_stats(user):
-    completed = PickupRequest.objects.filter(
-        collector=user, status=PickupRequest.Status.COMPLETED
+    completed = PickupJob.objects.filter(
+        collector=user, status=PickupJob.Status.COMPLETED
     )
     total_weight = (
         completed.aggregate(s=Sum("weight_kg"))["s"] or Decimal("0")
@@ -60,28 +65,27 @@ def _collector_stats(user):
         "total_co2_kg": est_co2.quantize(Decimal("0.001")),
     }
 
-def _award_activity_or_fallback(*, user, product, weight_kg: Decimal):
-    try:
-        from Rewards.services import log_activity_and_update as svc
-    except Exception:
-        svc = None
 
-    if svc:
-        return svc(user=user, product=product, weight_kg=weight_kg)
+ROUTE_MAX_STOPS = 200
 
-    from Rewards.models import Activity as ActivityModel
 
-    act = ActivityModel.objects.create(
-        user=user,
-        product=product,
-        weight_kg=weight_kg,
-    )
-    user.__class__.objects.filter(pk=user.pk).update(
-        total_co2_saved_kg=F("total_co2_saved_kg") + act.co2_saved_kg,
-        total_pickups=F("total_pickups") + 1,
-        points=F("points") + (int(act.co2_saved_kg) * 2),
-    )
-    return act
+def _plan_accepted_route(user, qs_accepted):
+    """
+    Accepted pickups in planned visiting order, each tagged with `route_stop`
+    and `route_leg_km`; pickups whose requester has no map location follow
+    at the end untagged.
+    """
+    jobs = {job.pk: job for job in qs_accepted[:ROUTE_MAX_STOPS]}
+    stops = [(pk, job.requester.latitude, job.requester.longitude) for pk, job in jobs.items()]
+    route = cached_route(user.pk, stops, user.coordinates)
+
+    ordered = []
+    for n, (pk, leg) in enumerate(zip(route.order, route.legs_km), start=1):
+        job = jobs[pk]
+        job.route_stop, job.route_leg_km = n, leg
+        ordered.append(job)
+    ordered.extend(jobs[pk] for pk in route.unlocated)
+    return ordered, route
 
 
 @never_cache
@@ -97,45 +101,56 @@ def dashboard(request):
 
         if action in {"pickup_accept", "pickup_decline", "pickup_complete"}:
             pid = request.POST.get("pickup_id")
-            pr = get_object_or_404(PickupRequest, id=pid, collector_id=user.id)
 
             if action == "pickup_accept":
-                with transaction.atomic():
-                    pr.status = PickupRequest.Status.ACCEPTED
-                    pr.save(update_fields=["status", "updated_at"])
-                    (
-                        PickupRequest.objects.filter(
-                            product=pr.product,
-                            requester=pr.requester,
-                            status=PickupRequest.Status.PENDING,
-                        )
-                        .exclude(collector=user)
-                        .update(status=PickupRequest.Status.DECLINED)
-                    )
-                messages.success(request, "Request accepted.")
+                get_object_or_404(
+                    PickupRequest, job_id=pid, collector_id=user.id,
+                    status=PickupRequest.Status.PENDING,
+                )
+                taken = accept_pickup(job_id=pid, collector=user)
+                if taken:
+                    messages.success(request, "Request accepted.")
+                else:
+                    messages.warning(request, "This pickup has already been taken.")
                 return redirect(request.path)
 
             elif action == "pickup_decline":
-                pr.status = PickupRequest.Status.DECLINED
-                pr.save(update_fields=["status", "updated_at"])
+                offer = get_object_or_404(PickupRequest, job_id=pid, collector_id=user.id)
+                decline_offer(offer=offer, collector=user)
                 messages.info(request, "Request declined.")
                 return redirect(request.path)
 
             elif action == "pickup_complete":
+                job = get_object_or_404(
+                    PickupJob, pk=pid, collector_id=user.id, status=PickupJob.Status.ACCEPTED
+                )
                 with transaction.atomic():
-                    pr.status = PickupRequest.Status.COMPLETED
-                    pr.save(update_fields=["status", "updated_at"])
-
-                    _award_activity_or_fallback(
-                        user=pr.requester, product=pr.product, weight_kg=pr.weight_kg
-                    )
-                    _award_activity_or_fallback(
-                        user=pr.collector, product=pr.product, weight_kg=pr.weight_kg
-                    )
+                    done = complete_pickup(job=job, collector=user)
+                    if done:
+                        log_activity_and_update(
+                            user=job.requester, product=job.product, weight_kg=job.weight_kg,
+                            key=pickup_key(job.pk, "requester"),
+                        )
+                        log_activity_and_update(
+                            user=job.collector, product=job.product, weight_kg=job.weight_kg,
+                            key=pickup_key(job.pk, "collector"),
+                        )
 
-                messages.success(request, "Pickup marked as completed.")
+                if done:
+                    messages.success(request, "Pickup marked as completed.")
+                else:
+                    messages.info(request, "Pickup already completed.")
                 return redirect(request.path)
 
+        elif action == "pickup_complete_bulk":
+            ids = [int(x) for x in request.POST.getlist("pickup_ids") if x.isdigit()]
+            done = complete_pickups_bulk(job_ids=ids, collector=user)
+            if done:
+                messages.success(request, f"{len(done)} pickup(s) marked as completed.")
+            else:
+                messages.warning(request, "Select at least one accepted pickup to complete.")
+            return redirect(request.get_full_path())
+
         elif action == "order_deliver":
             order_id = request.POST.get("order_id")
             order = get_object_or_404(MarketOrder, pk=order_id, collector_id=user.id)
@@ -153,30 +168,37 @@ def dashboard(request):
     # lists 
     qs_pending = (
         PickupRequest.objects.filter(
-            collector_id=user.id, status=PickupRequest.Status.PENDING
+            collector_id=user.id,
+            status=PickupRequest.Status.PENDING,
+            job__status=PickupJob.Status.PENDING,
         )
         .select_related("requester", "product")
         .order_by("-created_at")
     )
     qs_accepted = (
-        PickupRequest.objects.filter(
-            collector_id=user.id, status=PickupRequest.Status.ACCEPTED
+        PickupJob.objects.filter(
+            collector_id=user.id, status=PickupJob.Status.ACCEPTED
         )
         .select_related("requester", "product")
         .order_by("-updated_at")
     )
     qs_completed = (
-        PickupRequest.objects.filter(
-            collector_id=user.id, status=PickupRequest.Status.COMPLETED
+        PickupJob.objects.filter(
+            collector_id=user.id, status=PickupJob.Status.COMPLETED
         )
         .select_related("requester", "product")
         .order_by("-updated_at")
     )
 
     pending_pickups = list(qs_pending[:20])
-    accepted_pickups = list(qs_accepted[:20])
     completed_pickups = list(qs_completed[:20])
 
+    route = None
+    if request.GET.get("plan") == "route":
+        accepted_pickups, route = _plan_accepted_route(user, qs_accepted)
+    else:
+        accepted_pickups = list(qs_accepted[:20])
+
     order_pending = (
         MarketOrder.objects.filter(
             collector_id=user.id, status=MarketOrder.Status.PENDING
@@ -212,6 +234,7 @@ def dashboard(request):
         "stats": _collector_stats(user),
         "pending_pickups": pending_pickups,
         "accepted_pickups": accepted_pickups,
+        "route": route,
         "completed_pickups": completed_pickups,
         "order_pending": order_pending,
         "order_delivered": order_delivered,
@@ -283,6 +306,7 @@ def settings(request):
 
         # Profile update
         if form_type == "profile":
+            indexed = index_fields(user)
             user.name = request.POST.get("name", "").strip()
             user.phone = request.POST.get("phone", "").strip()
             user.address = request.POST.get("address", "").strip()
@@ -300,6 +324,9 @@ def settings(request):
             try:
                 user.full_clean(exclude=["password"])
                 user.save()
+                # a new map link moves the collector as much as a new product does
+                if index_fields(user) != indexed:
+                    invalidate_collector_index()
                 messages.success(request, "Profile updated successfully.")
                 return redirect("collector:settings")
             except ValidationError as e:
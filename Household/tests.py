@@ -1,3 +1,73 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Pickup.collector_index import invalidate_collector_index
+from Pickup.models import PickupJob, PickupRequest
+
+User = get_user_model()
+
+
+def make_user(email: str, role: str, **extra):
+    return User.objects.create_user(
+        email=email, password="pw", role=role, is_active=True, is_approved=True, **extra
+    )
+
+
+class PickupBatchTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        self.household = make_user("house@example.com", "household")
+        for i in range(3):
+            make_user(f"p{i}@example.com", "collector", collector_product="plastic")
+        make_user("g@example.com", "collector", collector_product="glass")
+        self.client.force_login(self.household)
+
+    def post(self, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return self.client.post(reverse("household:pickup_batch"), body, content_type="application/json")
+
+    def test_valid_entries_are_created_and_invalid_ones_reported(self):
+        response = self.post({"entries": [
+            {"kind": "plastic", "weight": 2, "price": 40},
+            {"kind": "wood", "weight": 1, "price": 1},
+            {"kind": "glass", "weight": "1.5"},
+            {"kind": "paper", "weight": -1, "price": 1},
+            {"kind": "paper", "weight": 3, "price": 10},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["created"], 3)
+        self.assertEqual([r["ok"] for r in data["results"]], [True, False, True, False, True])
+        self.assertEqual([r.get("offers") for r in data["results"]], [3, None, 1, None, 0])
+        self.assertIn("Unknown kind", data["results"][1]["error"])
+
+        jobs = PickupJob.objects.filter(requester=self.household)
+        self.assertEqual(sorted(jobs.values_list("kind", flat=True)), ["glass", "paper", "plastic"])
+        self.assertEqual(PickupRequest.objects.count(), 4)
+        self.assertFalse(jobs.filter(dispatched_at__isnull=True).exists())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries(n):
+            with CaptureQueriesContext(connection) as ctx:
+                self.post({"entries": [{"kind": "plastic", "weight": 1, "price": 1}] * n})
+            return len(ctx)
+
+        queries(1)  # builds the collector index
+        self.assertEqual(queries(2), queries(20))
+
+    @override_settings(PICKUP_BATCH_MAX_ENTRIES=2)
+    def test_rejected_requests(self):
+        self.assertEqual(self.post("not json").status_code, 400)
+        self.assertEqual(self.post({"entries": []}).status_code, 400)
+        self.assertEqual(self.post({"entries": [{"kind": "plastic", "weight": 1}] * 3}).status_code, 400)
+
+        self.client.force_login(make_user("buyer@example.com", "buyer"))
+        self.assertEqual(self.post({"entries": [{"kind": "plastic", "weight": 1}]}).status_code, 403)
+        self.assertFalse(PickupJob.objects.exists())
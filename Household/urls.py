@@ -6,6 +6,7 @@ app_name = "household"
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),            
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("pickups/batch/", views.pickup_batch, name="pickup_batch"),
     path('community/', views.community, name='community'),
     path('rate-collector/<int:user_id>/', views.rate_collector, name='rate_collector'),
     path("profile/", views.profile, name="profile"),
@@ -16,7 +16,9 @@ from User.models import User, CollectorRating
 from django.contrib.auth import get_user_model
 from RecyCon.models import Product
 from Rewards.models import Activity
-from Pickup.models import PickupRequest
+from Pickup.models import PickupJob
+from Pickup.services import PickupEntry, create_pickup, create_pickups_batch
+from django.conf import settings as django_settings
 from django.views.decorators.cache import never_cache
 from django.db.models import Q
 
@@ -42,10 +44,8 @@ def _no_cache(resp):
 
 
 def _stats(user):
-    completed_qs = (
-        PickupRequest.objects
-        .filter(requester_id=user.id)
-        .filter(Q(status__iexact="completed") | Q(status=PickupRequest.Status.COMPLETED))
+    completed_qs = PickupJob.objects.filter(
+        requester_id=user.id, status=PickupJob.Status.COMPLETED
     )
 
     completed_count = completed_qs.count()
@@ -92,33 +92,12 @@ def dashboard(request):
                 messages.error(request, "Please provide valid numbers for weight and price.")
                 return redirect("household:dashboard")
 
-            with transaction.atomic():
-                product = Product.objects.create(kind=kind, weight=weight, price=price)
-
-                collectors_qs = (
-                    User.objects.filter(role="collector", is_approved=True)
-                    .filter(Q(collector_product__iexact=kind))
-                    .only("id", "collector_product")
-                )
-
-                created = 0
-                for c in collectors_qs:
-                    _, ok = PickupRequest.objects.get_or_create(
-                        requester=user,
-                        collector=c,
-                        product=product,
-                        defaults={
-                            "status": PickupRequest.Status.PENDING,
-                            "kind": kind,
-                            "weight_kg": weight,
-                            "price": price,
-                        },
-                    )
-                    if ok:
-                        created += 1
-
-            if created:
-                messages.success(request, f"Pickup request sent to {created} matching collector(s).")
+            _, result = create_pickup(requester=user, kind=kind, weight=weight, price=price)
+
+            if result is None:
+                messages.success(request, "Pickup request submitted. Finding matching collectors…")
+            elif result.created:
+                messages.success(request, f"Pickup request sent to {result.created} matching collector(s).")
             else:
                 messages.warning(request, "No approved collectors found for this product type.")
             return redirect("household:dashboard")
@@ -127,9 +106,9 @@ def dashboard(request):
         return redirect("household:dashboard")
 
     requests_qs = (
-        PickupRequest.objects
+        PickupJob.objects
         .filter(requester_id=user.id)
-        .exclude(status__iexact="declined")   
+        .exclude(status=PickupJob.Status.DECLINED)
         .select_related("collector", "product")
         .order_by("-created_at")[:10]
     )
@@ -137,10 +116,67 @@ def dashboard(request):
     ctx = {
         "stats": _stats(user),
         "requests": requests_qs,
+        "dispatching": any(r.is_dispatching for r in requests_qs),
     }
     resp = render(request, "Household/h_dash.html", ctx)
     return _no_cache(resp)
 
+# Batch pickups (JSON) for building managers submitting for many flats
+def _parse_pickup_entry(raw):
+    if not isinstance(raw, dict):
+        raise ValueError("Entry must be an object with kind, weight and price.")
+    kind = str(raw.get("kind") or "").strip().lower()
+    if kind not in Product.Kind.values:
+        raise ValueError(f"Unknown kind '{kind}'.")
+    try:
+        weight = Decimal(str(raw.get("weight")))
+        price = Decimal(str(raw.get("price", "0")))
+    except InvalidOperation:
+        raise ValueError("Weight and price must be numbers.")
+    if not weight.is_finite() or not price.is_finite() or weight <= 0 or price < 0:
+        raise ValueError("Weight must be positive and price cannot be negative.")
+    return PickupEntry(kind=kind, weight=weight, price=price)
+
+
+@login_required(login_url="user:login")
+@require_POST
+def pickup_batch(request):
+    """
+    Create many pickups in one call.
+
+    Body: {"entries": [{"kind": "plastic", "weight": 2.5, "price": 40}, ...]}.
+    Valid entries are created together; each entry gets its own result.
+    """
+    if getattr(request.user, "role", None) != "household":
+        return JsonResponse({"success": False, "error": "Only household accounts can request pickups."}, status=403)
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"success": False, "error": "Invalid JSON body."}, status=400)
+    raw_entries = payload.get("entries") if isinstance(payload, dict) else payload
+    if not isinstance(raw_entries, list) or not raw_entries:
+        return JsonResponse({"success": False, "error": "Provide a non-empty 'entries' list."}, status=400)
+
+    limit = getattr(django_settings, "PICKUP_BATCH_MAX_ENTRIES", 100)
+    if len(raw_entries) > limit:
+        return JsonResponse({"success": False, "error": f"At most {limit} entries per batch."}, status=400)
+
+    results = [None] * len(raw_entries)
+    valid = []
+    for i, raw in enumerate(raw_entries):
+        try:
+            valid.append((i, _parse_pickup_entry(raw)))
+        except ValueError as e:
+            results[i] = {"index": i, "ok": False, "error": str(e)}
+
+    created = create_pickups_batch(requester=request.user, entries=[e for _, e in valid])
+    for (i, _), (job, offers) in zip(valid, created):
+        results[i] = {"index": i, "ok": True, "pickup_id": job.pk, "offers": offers}
+
+    return JsonResponse({"success": bool(created), "created": len(created), "results": results})
+
+
 # Community
 @login_required(login_url="user:login")
 def community(request):
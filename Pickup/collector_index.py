@@ -0,0 +1,181 @@
+"""
+In-process index of approved collectors by material.
+
+The snapshot is rebuilt lazily with one query whenever its version stamp no
+longer matches the shared one, so steady-state dispatch never touches the
+user table. Views that change a collector's approval, role, coordinates or
+`collector_product` call `invalidate_collector_index()`; `index_fields`
+tells whether a save changed any of them.
+"""
+import threading
+from typing import NamedTuple
+
+import numpy as np
+from django.contrib.auth import get_user_model
+
+from RecyCon.versioning import bump_version, get_version
+from .spatial import GridIndex
+
+UserModel = get_user_model()
+
+VERSION_NAME = "pickup:collector_index"
+
+# user fields the snapshot is built from (ratings are refreshed by signal)
+INDEX_FIELDS = ("role", "is_approved", "collector_product", "latitude", "longitude")
+
+_lock = threading.Lock()
+_snapshot = None
+_counters = {"hits": 0, "misses": 0}
+
+
+class CandidatePool(NamedTuple):
+    """Column arrays for a set of collectors, aligned by position."""
+    ids: np.ndarray
+    distance_km: np.ndarray      # NaN where either side has no coordinates
+    rating: np.ndarray
+    ratings_count: np.ndarray
+
+
+class _KindColumns:
+    __slots__ = ("ids", "rating", "ratings_count", "pos")
+
+    def __init__(self, rows: list[tuple[int, float, int]]):
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.rating = np.array([r[1] for r in rows], dtype=np.float64)
+        self.ratings_count = np.array([r[2] for r in rows], dtype=np.float64)
+        self.pos = {cid: i for i, cid in enumerate(self.ids.tolist())}
+
+
+class _Snapshot:
+    __slots__ = ("version", "by_kind", "grids", "columns")
+
+    def __init__(self, version: int, by_kind: dict[str, tuple[int, ...]],
+                 grids: dict[str, GridIndex], columns: dict[str, _KindColumns]):
+        self.version = version
+        self.by_kind = by_kind
+        self.grids = grids
+        self.columns = columns
+
+
+def _build(version: int) -> _Snapshot:
+    rows_by_kind: dict[str, list[tuple[int, float, int]]] = {
+        kind: [] for kind in UserModel.ProductKind.values
+    }
+    located: dict[str, list[tuple[int, float, float]]] = {}
+    rows = (
+        UserModel.objects.filter(role="collector", is_approved=True)
+        .exclude(collector_product="")
+        .order_by("id")
+        .values_list(
+            "id", "collector_product", "latitude", "longitude",
+            "average_rating", "ratings_count",
+        )
+    )
+    for cid, product, lat, lng, rating, count in rows:
+        kind = product.strip().lower()
+        rows_by_kind.setdefault(kind, []).append((cid, rating or 0.0, count or 0))
+        if lat is not None and lng is not None:
+            located.setdefault(kind, []).append((cid, lat, lng))
+    return _Snapshot(
+        version,
+        {k: tuple(r[0] for r in v) for k, v in rows_by_kind.items()},
+        {k: GridIndex(v) for k, v in located.items()},
+        {k: _KindColumns(v) for k, v in rows_by_kind.items()},
+    )
+
+
+def _current() -> _Snapshot:
+    global _snapshot
+    version = get_version(VERSION_NAME)
+    snap = _snapshot
+    if snap is not None and snap.version == version:
+        _counters["hits"] += 1
+        return snap
+
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != version:
+            _counters["misses"] += 1
+            snap = _snapshot = _build(version)
+        else:
+            _counters["hits"] += 1
+    return snap
+
+
+def _norm(kind: str) -> str:
+    return (kind or "").strip().lower()
+
+
+def collector_ids_for(kind: str) -> tuple[int, ...]:
+    """Approved collector ids for a `User.ProductKind` value."""
+    return _current().by_kind.get(_norm(kind), ())
+
+
+def candidate_pool(kind: str, coords, limit=None) -> CandidatePool:
+    """
+    Approved collectors of `kind` as column arrays.
+
+    With `coords` (lat, lng) the `limit` nearest come first, then collectors
+    without coordinates in id order. Without `coords` the first `limit`
+    collectors by id are returned; `limit=None` returns all of them.
+    """
+    snap = _current()
+    kind = _norm(kind)
+    cols = snap.columns.get(kind)
+    if cols is None or not len(cols.ids):
+        empty = np.empty(0)
+        return CandidatePool(empty.astype(np.int64), empty, empty, empty)
+
+    limit = len(cols.ids) if limit is None else min(limit, len(cols.ids))
+    grid = snap.grids.get(kind)
+    if coords and grid is not None:
+        nearest = grid.nearest(coords[0], coords[1], limit)
+        chosen = [cid for _, cid in nearest]
+        dists = [d for d, _ in nearest]
+        if len(chosen) < limit:
+            seen = set(chosen)
+            for cid in cols.ids.tolist():
+                if cid not in seen:
+                    chosen.append(cid)
+                    dists.append(np.nan)
+                    if len(chosen) == limit:
+                        break
+        idx = np.fromiter((cols.pos[cid] for cid in chosen), dtype=np.int64, count=len(chosen))
+        distance = np.array(dists, dtype=np.float64)
+    else:
+        idx = np.arange(limit)
+        distance = np.full(limit, np.nan)
+
+    return CandidatePool(cols.ids[idx], distance, cols.rating[idx], cols.ratings_count[idx])
+
+
+def nearest_collector_ids(kind: str, coords, k: int) -> list[int]:
+    """
+    The `k` approved collectors of `kind` closest to `coords` (lat, lng).
+
+    Collectors without coordinates, or every collector when `coords` is
+    unknown, fill any remaining slots in id order.
+    """
+    return candidate_pool(kind, coords, k).ids.tolist()
+
+
+def index_fields(user) -> tuple:
+    """`user`'s values for the fields the index reads; compare before and after a save."""
+    return tuple(getattr(user, f) for f in INDEX_FIELDS)
+
+
+def invalidate_collector_index() -> None:
+    bump_version(VERSION_NAME)
+
+
+def collector_index_stats() -> dict:
+    hits, misses = _counters["hits"], _counters["misses"]
+    total = hits + misses
+    snap = _snapshot
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "version": snap.version if snap else None,
+        "collectors": sum(len(v) for v in snap.by_kind.values()) if snap else 0,
+    }
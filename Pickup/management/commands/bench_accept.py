@@ -0,0 +1,92 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from Pickup.models import PickupJob
+from Pickup.services import accept_pickup, dispatch_pickup
+from RecyCon.bench import bench_fixtures, percentile
+from RecyCon.models import Product
+
+EMAIL_DOMAIN = "accept.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent accepts at one pickup job and check that exactly one "
+        "collector wins. Fixture rows are committed (threads need their own "
+        "connections) and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collectors", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        n = opts["collectors"]
+        if n < 2:
+            raise CommandError("Need at least two collectors to contend.")
+
+        with bench_fixtures(EMAIL_DOMAIN) as fx:
+            fx.create_users(
+                [fx.user("requester", "household")]
+                + [fx.user(f"collector-{i}", "collector", collector_product="plastic") for i in range(n)]
+            )
+            requester = fx.users.get(role="household")
+            collectors = list(fx.users.filter(role="collector"))
+            product = Product.objects.create(kind="plastic", weight=Decimal("1.000"), price=Decimal("0.00"))
+            fx.on_exit(Product.objects.filter(pk=product.pk).delete)
+            job = PickupJob.objects.create(
+                requester=requester, product=product, kind=product.kind,
+                weight_kg=product.weight, price=product.price,
+            )
+            fx.on_exit(PickupJob.objects.filter(pk=job.pk).delete)
+
+            dispatch_pickup(job=job, collector_ids=[c.pk for c in collectors])
+            self._contend(job, collectors)
+
+    def _contend(self, job, collectors):
+        barrier = threading.Barrier(len(collectors))
+        results = []
+        lock = threading.Lock()
+
+        def worker(collector):
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    won = accept_pickup(job_id=job.pk, collector=collector)
+                    error = None
+                except OperationalError as exc:
+                    won, error = False, exc
+                elapsed = time.perf_counter() - start
+                with lock:
+                    results.append((collector.pk, won, elapsed, error))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(c,)) for c in collectors]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        winners = [pk for pk, won, _, _ in results if won]
+        errors = [err for *_, err in results if err is not None]
+        latencies = sorted(elapsed * 1000 for _, _, elapsed, _ in results)
+        job.refresh_from_db()
+
+        self.stdout.write(f"accepts fired : {len(results)}")
+        self.stdout.write(f"winners       : {len(winners)}")
+        self.stdout.write(f"db errors     : {len(errors)}")
+        self.stdout.write(
+            f"latency ms    : p50={percentile(latencies, 50):.2f} "
+            f"p99={percentile(latencies, 99):.2f} max={latencies[-1]:.2f}"
+        )
+
+        if len(winners) != 1 or job.collector_id != winners[0]:
+            raise CommandError(
+                f"Expected exactly one winner, got {winners} (job collector {job.collector_id})."
+            )
+        self.stdout.write(self.style.SUCCESS(f"OK: collector {winners[0]} won the job."))
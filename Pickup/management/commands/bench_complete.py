@@ -0,0 +1,125 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from Pickup.models import PickupJob
+from Pickup.services import complete_pickup
+from RecyCon.bench import bench_fixtures, percentile
+from RecyCon.models import Product
+from Rewards.ledger import pickup_key
+from Rewards.models import Activity
+from Rewards.services import log_activity_and_update, run_pending_badge_checks
+
+EMAIL_DOMAIN = "complete.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure pickup completion throughput with collectors completing their "
+        "accepted jobs concurrently, each in the same transaction the collector "
+        "dashboard uses. Every job has a new household requester, so every "
+        "completion is someone's first. Fixture rows are committed (threads need "
+        "their own connections) and deleted afterwards. Badges queued by the run "
+        "are evaluated once it ends."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collectors", type=int, default=8)
+        parser.add_argument("--jobs", type=int, default=25, help="Accepted jobs per collector.")
+
+    def handle(self, *args, **opts):
+        n, per = opts["collectors"], opts["jobs"]
+        if n < 1 or per < 1:
+            raise CommandError("Need at least one collector and one job.")
+
+        with bench_fixtures(EMAIL_DOMAIN) as fx:
+            fx.create_users(
+                [fx.user(f"collector-{i}", "collector", collector_product="plastic") for i in range(n)]
+                + [fx.user(f"household-{i}", "household") for i in range(n * per)]
+            )
+            fx.on_exit(self._cleanup, fx.users)
+            collectors = list(fx.users.filter(role="collector").order_by("pk"))
+            households = list(fx.users.filter(role="household").order_by("pk"))
+            products = Product.objects.bulk_create([
+                Product(kind="plastic", weight=Decimal("4.000"), price=Decimal("0.00"))
+                for _ in range(n * per)
+            ])
+            PickupJob.objects.bulk_create([
+                PickupJob(
+                    requester=households[i * per + k], collector=c, product=products[i * per + k],
+                    kind="plastic", weight_kg=Decimal("4.000"), price=Decimal("0.00"),
+                    status=PickupJob.Status.ACCEPTED,
+                )
+                for i, c in enumerate(collectors) for k in range(per)
+            ])
+            self._complete_concurrently(collectors)
+            start = time.perf_counter()
+            evaluated = run_pending_badge_checks()
+            self.stdout.write(
+                f"badge stage   : {evaluated} user(s) evaluated in "
+                f"{(time.perf_counter() - start) * 1000:.0f} ms after the run"
+            )
+
+    @staticmethod
+    def _cleanup(fixtures):
+        product_ids = list(
+            PickupJob.objects.filter(collector__in=fixtures).values_list("product_id", flat=True)
+        )
+        PickupJob.objects.filter(collector__in=fixtures).delete()
+        Activity.objects.filter(user__in=fixtures).delete()
+        Product.objects.filter(pk__in=product_ids).delete()
+
+    def _complete_concurrently(self, collectors):
+        barrier = threading.Barrier(len(collectors))
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(collector):
+            try:
+                jobs = list(
+                    PickupJob.objects.filter(collector=collector, status=PickupJob.Status.ACCEPTED)
+                    .select_related("requester", "collector", "product")
+                )
+                barrier.wait()
+                for job in jobs:
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            if complete_pickup(job=job, collector=collector):
+                                log_activity_and_update(
+                                    user=job.requester, product=job.product, weight_kg=job.weight_kg,
+                                    key=pickup_key(job.pk, "requester"),
+                                )
+                                log_activity_and_update(
+                                    user=job.collector, product=job.product, weight_kg=job.weight_kg,
+                                    key=pickup_key(job.pk, "collector"),
+                                )
+                        error = None
+                    except OperationalError as exc:
+                        error = exc
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        (errors if error else latencies).append(error or elapsed * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(c,)) for c in collectors]
+        wall = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - wall
+
+        latencies.sort()
+        done = len(latencies)
+        self.stdout.write(f"completions   : {done} in {wall:.2f} s ({done / wall:.1f}/s)")
+        self.stdout.write(f"db errors     : {len(errors)}")
+        if latencies:
+            self.stdout.write(
+                f"latency ms    : p50={percentile(latencies, 50):.1f} "
+                f"p99={percentile(latencies, 99):.1f} max={latencies[-1]:.1f}"
+            )
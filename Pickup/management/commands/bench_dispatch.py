@@ -0,0 +1,95 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from Pickup.collector_index import (
+    collector_ids_for, collector_index_stats, invalidate_collector_index,
+)
+from Pickup.models import PickupJob
+from Pickup.services import dispatch_pickup
+from RecyCon.models import Product
+
+UserModel = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark dispatch_pickup offering a job to every collector of a "
+        "material, for growing collector counts. "
+        "All fixture rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="100,1000,5000,10000",
+                            help="Comma separated collector counts.")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Dispatches per size (best run is reported).")
+
+    def handle(self, *args, **opts):
+        sizes = sorted(int(s) for s in opts["sizes"].split(",") if s.strip())
+        repeat = max(1, opts["repeat"])
+
+        try:
+            with transaction.atomic():
+                self._run(sizes, repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, repeat):
+        requester = UserModel.objects.create(
+            email="bench-requester@dispatch.invalid", password="!",
+            role="household", is_active=True, is_approved=True,
+        )
+
+        existing = 0
+        self.stdout.write(f"{'collectors':>10} {'best ms':>10} {'us/offer':>10} {'queries':>8}")
+        for size in sizes:
+            UserModel.objects.bulk_create(
+                [
+                    UserModel(
+                        email=f"bench-collector-{i}@dispatch.invalid", password="!",
+                        role="collector", collector_product="plastic",
+                        is_active=True, is_approved=True,
+                    )
+                    for i in range(existing, size)
+                ],
+                batch_size=500,
+            )
+            existing = size
+            invalidate_collector_index()
+
+            best, queries = None, 0
+            for _ in range(repeat):
+                product = Product.objects.create(
+                    kind="plastic", weight=Decimal("2.000"), price=Decimal("10.00")
+                )
+                job = PickupJob.objects.create(
+                    requester=requester, product=product, kind=product.kind,
+                    weight_kg=product.weight, price=product.price,
+                )
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    result = dispatch_pickup(job=job, collector_ids=collector_ids_for("plastic"))
+                    elapsed = time.perf_counter() - start
+                assert result.created >= size and not result.skipped, result
+                queries = len(ctx.captured_queries)
+                best = elapsed if best is None else min(best, elapsed)
+
+            self.stdout.write(
+                f"{size:>10} {best * 1000:>10.1f} {best * 1e6 / result.created:>10.1f} {queries:>8}"
+            )
+
+        stats = collector_index_stats()
+        self.stdout.write(
+            f"collector index: {stats['hits']} hits, {stats['misses']} misses "
+            f"(hit rate {stats['hit_rate']:.0%})"
+        )
@@ -0,0 +1,66 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Pickup.spatial import GridIndex, KM_PER_DEG_LAT
+
+# Rough bounding box of Bangladesh.
+LAT_RANGE = (20.6, 26.6)
+LNG_RANGE = (88.0, 92.7)
+
+
+class Command(BaseCommand):
+    help = "Benchmark GridIndex k-nearest lookups over synthetic collector locations (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=2_000)
+        parser.add_argument("-k", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--verify", type=int, default=50,
+                            help="Queries cross-checked against a brute-force scan.")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        k = opts["k"]
+        points = [
+            (i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+            for i in range(opts["points"])
+        ]
+
+        start = time.perf_counter()
+        grid = GridIndex(points)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(opts["queries"])]
+        timings = []
+        for lat, lng in queries:
+            start = time.perf_counter()
+            grid.nearest(lat, lng, k)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+
+        for lat, lng in queries[: opts["verify"]]:
+            got = [pid for _, pid in grid.nearest(lat, lng, k)]
+            want = self._brute_force(points, lat, lng, k)
+            if got != want:
+                raise CommandError(f"Mismatch at ({lat:.4f}, {lng:.4f}): {got} != {want}")
+
+        self.stdout.write(f"points       : {len(grid)} ({len(grid.cells)} cells, built in {build_ms:.0f} ms)")
+        self.stdout.write(f"queries      : {len(timings)} (k={k})")
+        self.stdout.write(
+            f"latency us   : mean={sum(timings) / len(timings):.1f} "
+            f"p50={timings[len(timings) // 2]:.1f} p99={timings[int(len(timings) * 0.99) - 1]:.1f}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"verified {opts['verify']} queries against brute force"))
+
+    @staticmethod
+    def _brute_force(points, lat, lng, k):
+        kx = KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01)
+        scored = sorted(
+            (((plng - lng) * kx) ** 2 + ((plat - lat) * KM_PER_DEG_LAT) ** 2, pid)
+            for pid, plat, plng in points
+        )
+        return [pid for _, pid in scored[:k]]
@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Pickup.routing import plan_route
+from Pickup.spatial import haversine_km
+
+# Rough bounding box of Dhaka.
+LAT_RANGE = (23.70, 23.90)
+LNG_RANGE = (90.33, 90.48)
+
+
+class Command(BaseCommand):
+    help = "Benchmark route planning (nearest neighbour + 2-opt) over synthetic stops (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stops", type=int, default=200)
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--budget-ms", type=float, default=100.0)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        timings, totals, baselines = [], [], []
+        for _ in range(opts["runs"]):
+            start = (rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+            stops = [(i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for i in range(opts["stops"])]
+
+            t0 = time.perf_counter()
+            route = plan_route(stops, start)
+            timings.append((time.perf_counter() - t0) * 1000)
+
+            if sorted(route.order) != list(range(opts["stops"])):
+                raise CommandError("Route does not visit every stop exactly once")
+            totals.append(route.total_km)
+            baselines.append(self._given_order_km(stops, start))
+
+        timings.sort()
+        p50, worst = timings[len(timings) // 2], timings[-1]
+        self.stdout.write(f"stops        : {opts['stops']} x {opts['runs']} runs")
+        self.stdout.write(f"plan ms      : p50={p50:.1f} max={worst:.1f}")
+        self.stdout.write(
+            f"distance km  : planned={sum(totals) / len(totals):.1f} "
+            f"vs submitted order={sum(baselines) / len(baselines):.1f}"
+        )
+        if worst > opts["budget_ms"]:
+            raise CommandError(f"Slowest plan took {worst:.1f} ms (budget {opts['budget_ms']:.0f} ms)")
+        self.stdout.write(self.style.SUCCESS(f"all plans under {opts['budget_ms']:.0f} ms"))
+
+    @staticmethod
+    def _given_order_km(stops, start):
+        total, (plat, plng) = 0.0, start
+        for _, lat, lng in stops:
+            total += haversine_km(plat, plng, lat, lng)
+            plat, plng = lat, lng
+        return total
@@ -0,0 +1,76 @@
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from Pickup.scoring import (
+    CONFIDENT_RATINGS, DISTANCE_HALF_KM, PRIOR_STARS, PRIOR_WEIGHT,
+    _weights, score_candidates, top_n,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark vectorised collector scoring against a per-row Python loop (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidates", type=int, default=50_000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("-k", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **opts):
+        rng = np.random.default_rng(opts["seed"])
+        n, k = opts["candidates"], opts["k"]
+        ids = np.arange(1, n + 1, dtype=np.int64)
+        cols = {
+            "rating": rng.uniform(0, 5, n).round(2),
+            "ratings_count": rng.integers(0, 200, n).astype(np.float64),
+            "load": rng.integers(0, 6, n).astype(np.float64),
+            "offered": rng.integers(0, 40, n).astype(np.float64),
+            "distance_km": rng.exponential(6.0, n),
+        }
+        cols["declined"] = np.floor(cols["offered"] * rng.uniform(0, 0.5, n))
+        cols["distance_km"][rng.random(n) < 0.05] = np.nan
+
+        timings = []
+        for _ in range(opts["repeat"]):
+            start = time.perf_counter()
+            best = top_n(ids, score_candidates(**cols), k)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        start = time.perf_counter()
+        expected = self._python_loop(ids.tolist(), {c: v.tolist() for c, v in cols.items()}, k)
+        loop_ms = (time.perf_counter() - start) * 1000
+
+        if best != expected:
+            raise CommandError(f"Vectorised top-{k} {best} != loop {expected}")
+
+        p50 = timings[len(timings) // 2]
+        self.stdout.write(f"candidates   : {n} (top {k})")
+        self.stdout.write(f"numpy ms     : p50={p50:.2f} max={timings[-1]:.2f}")
+        self.stdout.write(f"python ms    : {loop_ms:.1f} ({loop_ms / p50:.0f}x slower)")
+        self.stdout.write(self.style.SUCCESS("top-k matches the per-row loop"))
+
+    @staticmethod
+    def _python_loop(ids, cols, k):
+        w = _weights()
+        scored = []
+        for i, cid in enumerate(ids):
+            cnt = cols["ratings_count"][i]
+            smoothed = (cols["rating"][i] * cnt + PRIOR_STARS * PRIOR_WEIGHT) / (cnt + PRIOR_WEIGHT)
+            confidence = min(math.log1p(cnt) / math.log1p(CONFIDENT_RATINGS), 1.0)
+            load = cols["load"][i]
+            dist = cols["distance_km"][i]
+            far = 1.0 if math.isnan(dist) else dist / (dist + DISTANCE_HALF_KM)
+            score = (
+                w["rating"] * (smoothed / 5.0)
+                + w["confidence"] * confidence
+                - w["load"] * (load / (load + 1.0))
+                - w["decline"] * (cols["declined"][i] / (cols["offered"][i] + 1.0))
+                - w["distance"] * far
+            )
+            scored.append((-score, cid))
+        scored.sort()
+        return [cid for _, cid in scored[:k]]
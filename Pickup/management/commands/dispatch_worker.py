@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Pickup.services import claim_dispatch_tasks, run_dispatch_task
+
+
+class Command(BaseCommand):
+    help = "Run queued pickup fan-outs. Claims due tasks in batches; retries failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain what is due now, then exit.")
+
+    def handle(self, *args, **opts):
+        verbosity = opts["verbosity"]
+        done = failed = 0
+        try:
+            while True:
+                tasks = claim_dispatch_tasks(batch_size=opts["batch_size"])
+                if not tasks:
+                    if opts["once"]:
+                        break
+                    time.sleep(opts["poll_interval"])
+                    continue
+
+                start = time.perf_counter()
+                for task in tasks:
+                    if run_dispatch_task(task) is None:
+                        failed += 1
+                        if verbosity >= 1:
+                            self.stderr.write(f"pickup #{task.job_id}: attempt {task.attempts} failed")
+                    else:
+                        done += 1
+                if verbosity > 1:
+                    ms = (time.perf_counter() - start) * 1000
+                    self.stdout.write(f"batch of {len(tasks)} in {ms:.0f} ms")
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"dispatched {done} pickup(s), {failed} failed attempt(s)"))
@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Pickup.services import EXPIRY_BATCH_SIZE, expire_stale_jobs, expire_stale_offers
+
+
+class Command(BaseCommand):
+    help = "Move pending pickup offers and jobs older than --max-age-hours to EXPIRED, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age-hours", type=float,
+                            default=getattr(settings, "PICKUP_OFFER_MAX_AGE_HOURS", 72))
+        parser.add_argument("--batch-size", type=int, default=EXPIRY_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.0,
+                            help="Seconds to sleep between batches to let other writers in.")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(hours=opts["max_age_hours"])
+        for label, sweep in (("offers", expire_stale_offers), ("pickups", expire_stale_jobs)):
+            rows = batches = 0
+            start = time.perf_counter()
+            for n in sweep(cutoff=cutoff, batch_size=opts["batch_size"]):
+                rows += n
+                batches += 1
+                if opts["pause"]:
+                    time.sleep(opts["pause"])
+            elapsed = time.perf_counter() - start
+            rate = rows / elapsed if elapsed else 0.0
+            self.stdout.write(
+                f"{label:<8}: expired {rows} in {batches} batch(es), {elapsed:.2f}s ({rate:,.0f} rows/s)"
+            )
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Pickup.services import pickup_latency_percentiles
+
+
+def _fmt(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 2 * 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+class Command(BaseCommand):
+    help = "Acceptance latency and completion time percentiles from the pickup transition log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30,
+                            help="Only transitions from the last N days (0 = all time).")
+
+    def handle(self, *args, **opts):
+        since = timezone.now() - timedelta(days=opts["days"]) if opts["days"] else None
+        stats = pickup_latency_percentiles(since=since)
+        for label, key in (("created -> accepted", "accept"), ("accepted -> completed", "complete")):
+            s = stats[key]
+            if not s["count"]:
+                self.stdout.write(f"{label:<22}: no data")
+                continue
+            self.stdout.write(
+                f"{label:<22}: n={s['count']} mean={_fmt(s['mean'])} "
+                f"p50={_fmt(s['p50'])} p90={_fmt(s['p90'])} p99={_fmt(s['p99'])}"
+            )
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:25
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_jobs(apps, schema_editor):
+    """Group the existing per-collector rows into one job per product."""
+    PickupRequest = apps.get_model("Pickup", "PickupRequest")
+    PickupJob = apps.get_model("Pickup", "PickupJob")
+
+    offers_by_product = {}
+    for pr in PickupRequest.objects.order_by("created_at", "id"):
+        offers_by_product.setdefault(pr.product_id, []).append(pr)
+
+    for product_id, offers in offers_by_product.items():
+        taken = next((o for o in offers if o.status == "completed"), None) or next(
+            (o for o in offers if o.status == "accepted"), None
+        )
+        if taken:
+            status = taken.status
+        elif any(o.status == "pending" for o in offers):
+            status = "pending"
+        else:
+            status = "declined"
+
+        first = offers[0]
+        job = PickupJob.objects.create(
+            requester_id=first.requester_id,
+            collector_id=taken.collector_id if taken else None,
+            product_id=product_id,
+            kind=first.kind,
+            weight_kg=first.weight_kg,
+            price=first.price,
+            status=status,
+        )
+        PickupJob.objects.filter(pk=job.pk).update(
+            created_at=first.created_at,
+            updated_at=max(o.updated_at for o in offers),
+            accepted_at=taken.updated_at if taken else None,
+        )
+        PickupRequest.objects.filter(pk__in=[o.pk for o in offers]).update(job=job)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0001_initial'),
+        ('RecyCon', '0002_alter_product_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PickupJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('weight_kg', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=8)),
+                ('price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('completed', 'Completed')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('collector', models.ForeignKey(blank=True, help_text='Collector whose offer was accepted.', limit_choices_to={'role': 'collector'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pickup_jobs_taken', to=settings.AUTH_USER_MODEL)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='pickup_job', to='RecyCon.product')),
+                ('requester', models.ForeignKey(limit_choices_to=models.Q(('role', 'household'), ('role', 'buyer'), _connector='OR'), on_delete=django.db.models.deletion.CASCADE, related_name='pickup_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='job',
+            field=models.ForeignKey(help_text='The pickup this offer belongs to.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='Pickup.pickupjob'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupjob',
+            index=models.Index(fields=['requester', 'created_at'], name='Pickup_pick_request_5b577e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupjob',
+            index=models.Index(fields=['collector', 'status'], name='Pickup_pick_collect_e5f0b2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupjob',
+            index=models.Index(fields=['status', 'created_at'], name='Pickup_pick_status_7ba863_idx'),
+        ),
+        migrations.RunPython(backfill_jobs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pickuprequest',
+            name='job',
+            field=models.ForeignKey(help_text='The pickup this offer belongs to.', on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='Pickup.pickupjob'),
+        ),
+    ]
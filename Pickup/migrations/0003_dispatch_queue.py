@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_dispatched(apps, schema_editor):
+    """Jobs created before the queue were fanned out synchronously."""
+    PickupJob = apps.get_model("Pickup", "PickupJob")
+    PickupJob.objects.filter(dispatched_at__isnull=True).update(dispatched_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0002_pickupjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickupjob',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, help_text='When offers were sent to collectors; empty while queued.', null=True),
+        ),
+        migrations.RunPython(mark_existing_dispatched, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='DispatchTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim_token', models.CharField(blank=True, default='', max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dispatch_task', to='Pickup.pickupjob')),
+            ],
+            options={
+                'ordering': ('run_after',),
+                'indexes': [models.Index(fields=['status', 'run_after'], name='Pickup_disp_status_c72931_idx'), models.Index(fields=['claim_token'], name='Pickup_disp_claim_t_694424_idx')],
+            },
+        ),
+    ]
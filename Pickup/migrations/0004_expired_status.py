@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0003_dispatch_queue'),
+        ('RecyCon', '0002_alter_product_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pickupjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='pickuprequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('completed', 'Completed'), ('expired', 'Expired')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['status', 'created_at'], name='Pickup_pick_status_a48d8a_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_transitions(apps, schema_editor):
+    """Reconstruct what the job rows still tell us: creation, acceptance, final state."""
+    PickupJob = apps.get_model("Pickup", "PickupJob")
+    PickupTransition = apps.get_model("Pickup", "PickupTransition")
+
+    rows = []
+    jobs = PickupJob.objects.values_list(
+        "id", "requester_id", "collector_id", "status", "created_at", "accepted_at", "updated_at"
+    )
+    for job_id, requester_id, collector_id, status, created_at, accepted_at, updated_at in jobs.iterator():
+        rows.append(PickupTransition(job_id=job_id, from_status="", to_status="pending",
+                                     actor_id=requester_id, created_at=created_at))
+        if status in ("accepted", "completed"):
+            rows.append(PickupTransition(job_id=job_id, from_status="pending", to_status="accepted",
+                                         actor_id=collector_id, created_at=accepted_at or updated_at))
+        if status == "completed":
+            rows.append(PickupTransition(job_id=job_id, from_status="accepted", to_status="completed",
+                                         actor_id=collector_id, created_at=updated_at))
+        elif status in ("declined", "expired"):
+            rows.append(PickupTransition(job_id=job_id, from_status="pending", to_status=status,
+                                         created_at=updated_at))
+    PickupTransition.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0004_expired_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PickupTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=10)),
+                ('to_status', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, help_text='Empty for system changes such as expiry.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='Pickup.pickupjob')),
+            ],
+            options={
+                'ordering': ('created_at', 'id'),
+                'indexes': [models.Index(fields=['job', 'created_at', 'from_status', 'to_status', 'actor'], name='pickup_transition_timeline'), models.Index(fields=['to_status', 'created_at'], name='Pickup_pick_to_stat_2bcd2d_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_transitions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0005_pickup_transition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickupjob',
+            name='dispatch_failed_at',
+            field=models.DateTimeField(blank=True, help_text='When the queued fan-out gave up after its last attempt.', null=True),
+        ),
+    ]
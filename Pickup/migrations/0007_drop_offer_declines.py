@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def drop_offer_declines(apps, schema_editor):
+    # offer declines were logged as job transitions while the job stayed
+    # pending; the offer row already records them. Job-level declines from
+    # the 0005 backfill carry no actor and are kept.
+    PickupTransition = apps.get_model("Pickup", "PickupTransition")
+    PickupTransition.objects.filter(to_status="declined", actor__isnull=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pickup', '0006_dispatch_failed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_offer_declines, migrations.RunPython.noop),
+    ]
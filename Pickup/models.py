@@ -1,7 +1,181 @@
+from datetime import timedelta
 from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.db.models import Q
+from django.utils import timezone
+
+
+def _kind_label(kind):
+    from RecyCon.models import Product
+    try:
+        return Product.Kind(kind).label
+    except Exception:
+        return kind
+
+
+class PickupJob(models.Model):
+    """
+    One household/buyer pickup. Collectors receive it as PickupRequest offers;
+    the first one to accept becomes `collector`.
+    """
+    class Status(models.TextChoices):
+        PENDING   = "pending",   "Pending"
+        ACCEPTED  = "accepted",  "Accepted"
+        DECLINED  = "declined",  "Declined"
+        COMPLETED = "completed", "Completed"
+        EXPIRED   = "expired",   "Expired"
+
+    requester = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pickup_jobs",
+        limit_choices_to=Q(role="household") | Q(role="buyer"),
+    )
+    collector = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="pickup_jobs_taken",
+        limit_choices_to={"role": "collector"},
+        help_text="Collector whose offer was accepted.",
+    )
+    product = models.OneToOneField(
+        "RecyCon.Product",
+        on_delete=models.PROTECT,
+        related_name="pickup_job",
+    )
+
+    kind      = models.CharField(max_length=10)
+    weight_kg = models.DecimalField(max_digits=8, decimal_places=3, default=Decimal("0.000"))
+    price     = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+
+    status      = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+    dispatched_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When offers were sent to collectors; empty while queued.",
+    )
+    dispatch_failed_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the queued fan-out gave up after its last attempt.",
+    )
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["requester", "created_at"]),
+            models.Index(fields=["collector", "status"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Pickup #{self.pk} {self.kind} ({self.status})"
+
+    def get_kind_label(self):
+        return _kind_label(self.kind)
+
+    def timeline(self):
+        """(from_status, to_status, actor_id, created_at) rows, oldest first."""
+        return self.transitions.order_by("created_at").values_list(
+            "from_status", "to_status", "actor_id", "created_at"
+        )
+
+    def _awaiting_dispatch(self) -> bool:
+        return self.status == self.Status.PENDING and self.dispatched_at is None
+
+    @property
+    def dispatch_stalled(self) -> bool:
+        """
+        The fan-out failed, or nothing ran it within PICKUP_DISPATCH_STALE_SECONDS
+        (e.g. no `dispatch_worker` is running).
+        """
+        if not self._awaiting_dispatch():
+            return False
+        if self.dispatch_failed_at is not None:
+            return True
+        window = timedelta(seconds=int(getattr(settings, "PICKUP_DISPATCH_STALE_SECONDS", 120)))
+        return self.created_at is not None and timezone.now() - self.created_at > window
+
+    @property
+    def is_dispatching(self) -> bool:
+        return self._awaiting_dispatch() and not self.dispatch_stalled
+
+
+class DispatchTask(models.Model):
+    """
+    Queued fan-out of one PickupJob, run by `manage.py dispatch_worker`.
+
+    Workers claim due rows with a conditional UPDATE that stamps their
+    `claim_token`, so a task is only ever run by one worker at a time. A
+    running task whose claim is older than the lease is considered abandoned
+    and can be claimed again.
+    """
+    class Status(models.TextChoices):
+        QUEUED  = "queued",  "Queued"
+        RUNNING = "running", "Running"
+        DONE    = "done",    "Done"
+        FAILED  = "failed",  "Failed"
+
+    job = models.OneToOneField(PickupJob, on_delete=models.CASCADE, related_name="dispatch_task")
+
+    status      = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts    = models.PositiveSmallIntegerField(default=0)
+    run_after   = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, default="")
+    claimed_at  = models.DateTimeField(null=True, blank=True)
+    last_error  = models.TextField(blank=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("run_after",)
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+            models.Index(fields=["claim_token"]),
+        ]
+
+    def __str__(self):
+        return f"Dispatch of pickup #{self.job_id} ({self.status}, attempt {self.attempts})"
+
+
+class PickupTransition(models.Model):
+    """
+    Append-only log of PickupJob status changes, written in the same
+    transaction as the change itself.
+
+    `from_status` is empty for the row recording the job's creation. A
+    collector turning down their offer is not a job transition: it is kept
+    on the PickupRequest, and the job stays pending.
+    """
+    job = models.ForeignKey(PickupJob, on_delete=models.CASCADE, related_name="transitions")
+    from_status = models.CharField(max_length=10, blank=True)
+    to_status   = models.CharField(max_length=10)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name="+",
+        help_text="Empty for system changes such as expiry.",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("created_at", "id")
+        indexes = [
+            # covers a job's whole timeline: one range read, no table lookups
+            models.Index(
+                fields=["job", "created_at", "from_status", "to_status", "actor"],
+                name="pickup_transition_timeline",
+            ),
+            models.Index(fields=["to_status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Pickup #{self.job_id}: {self.from_status or '-'} -> {self.to_status}"
+
 
 class PickupRequest(models.Model):
     class Status(models.TextChoices):
@@ -9,6 +183,7 @@ class PickupRequest(models.Model):
         ACCEPTED  = "accepted",  "Accepted"
         DECLINED  = "declined",  "Declined"
         COMPLETED = "completed", "Completed"
+        EXPIRED   = "expired",   "Expired"
 
     requester = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -31,6 +206,13 @@ class PickupRequest(models.Model):
         related_name="pickup_requests",
     )
 
+    job = models.ForeignKey(
+        PickupJob,
+        on_delete=models.CASCADE,
+        related_name="offers",
+        help_text="The pickup this offer belongs to.",
+    )
+
     kind      = models.CharField(max_length=10)
     weight_kg = models.DecimalField(max_digits=8, decimal_places=3, default=Decimal("0.000"))
     price     = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
@@ -44,6 +226,7 @@ class PickupRequest(models.Model):
         indexes = [
             models.Index(fields=["requester", "created_at"]),
             models.Index(fields=["collector", "status"]),
+            models.Index(fields=["status", "created_at"]),
         ]
         unique_together = (("requester", "collector", "product"),)
 
@@ -55,8 +238,4 @@ class PickupRequest(models.Model):
         super().save(*args, **kwargs)
 
     def get_kind_label(self):
-        from RecyCon.models import Product
-        try:
-            return Product.Kind(self.kind).label
-        except Exception:
-            return self.kind
+        return _kind_label(self.kind)
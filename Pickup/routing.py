@@ -0,0 +1,120 @@
+"""
+Visiting order for a collector's accepted pickups.
+
+A nearest-neighbour tour is improved with 2-opt until no segment reversal
+shortens it. Both steps work on a precomputed haversine distance matrix, and
+each 2-opt step scores every candidate reversal for one position in a single
+NumPy expression, so 200 stops plan in tens of milliseconds.
+"""
+import hashlib
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+from django.core.cache import cache
+
+from .spatial import EARTH_RADIUS_KM
+
+ROUTE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Route(NamedTuple):
+    order: list[int]          # stop ids, in visiting order
+    legs_km: list[float]      # distance to each stop from the previous one (or the start)
+    total_km: float
+    unlocated: list[int]      # stop ids without coordinates, not part of the route
+
+
+def haversine_matrix(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km."""
+    p = np.radians(lat)
+    l = np.radians(lng)
+    dp = p[:, None] - p[None, :]
+    dl = l[:, None] - l[None, :]
+    a = np.sin(dp / 2) ** 2 + np.cos(p)[:, None] * np.cos(p)[None, :] * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _nearest_neighbour(dist: np.ndarray) -> list[int]:
+    n = len(dist)
+    tour = [0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[tour[-1]])
+        nxt = int(np.argmin(row))
+        visited[nxt] = True
+        tour.append(nxt)
+    return tour
+
+
+def _two_opt(dist: np.ndarray, tour: list[int]) -> list[int]:
+    """
+    Reverse segments tour[i..j] while that shortens the tour. Position 0 and
+    the last position are fixed; callers pad the tour with an end node that
+    is free to reach, which turns the open path into a cycle-shaped problem.
+    """
+    path = np.array(tour)
+    n = len(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            a, b = path[i - 1], path[i]
+            c = path[i + 1:n - 1]
+            e = path[i + 2:n]
+            delta = dist[a, c] + dist[b, e] - dist[a, b] - dist[c, e]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 1
+                path[i:j + 1] = path[i:j + 1][::-1]
+                improved = True
+    return path.tolist()
+
+
+def plan_route(stops: Sequence[tuple[int, Optional[float], Optional[float]]], start=None) -> Route:
+    """
+    Order `stops` — (id, lat, lng) — into a short open path from `start`
+    (lat, lng). Without `start` the route may begin at any stop.
+    """
+    located = [(sid, lat, lng) for sid, lat, lng in stops if lat is not None and lng is not None]
+    unlocated = [sid for sid, lat, lng in stops if lat is None or lng is None]
+    if not located:
+        return Route([], [], 0.0, unlocated)
+
+    lat = np.array([s[1] for s in located], dtype=np.float64)
+    lng = np.array([s[2] for s in located], dtype=np.float64)
+    n = len(located)
+
+    # node 0 is the start, nodes 1..n the stops, node n+1 a free end point
+    dist = np.zeros((n + 2, n + 2))
+    if start:
+        dist[:n + 1, :n + 1] = haversine_matrix(np.r_[start[0], lat], np.r_[start[1], lng])
+    else:
+        dist[1:n + 1, 1:n + 1] = haversine_matrix(lat, lng)
+
+    tour = _nearest_neighbour(dist[:n + 1, :n + 1]) + [n + 1]
+    tour = _two_opt(dist, tour)[1:-1]
+
+    legs = [float(dist[prev, cur]) for prev, cur in zip([0] + tour[:-1], tour)]
+    return Route(
+        order=[located[i - 1][0] for i in tour],
+        legs_km=[round(x, 2) for x in legs],
+        total_km=round(sum(legs), 2),
+        unlocated=unlocated,
+    )
+
+
+def cached_route(collector_id: int, stops, start=None) -> Route:
+    """
+    `plan_route` memoised in the Django cache. The key is derived from the
+    stops and their coordinates, so accepting, completing or moving a pickup
+    yields a new key and the old plan simply stops being read.
+    """
+    fingerprint = repr((start, sorted(stops, key=lambda s: s[0]))).encode()
+    key = f"pickup:route:{collector_id}:{hashlib.sha1(fingerprint).hexdigest()}"
+    route = cache.get(key)
+    if route is None:
+        route = plan_route(stops, start)
+        cache.set(key, tuple(route), ROUTE_CACHE_TIMEOUT)
+        return route
+    return Route(*route)
@@ -0,0 +1,137 @@
+"""
+Collector ranking for dispatch.
+
+A pickup is offered to the top PICKUP_DISPATCH_K collectors out of a pool of
+the PICKUP_CANDIDATE_POOL nearest matching ones. Every term is computed over
+whole NumPy columns, so the cost is a handful of vector operations no matter
+how large the pool is.
+"""
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .collector_index import CandidatePool
+from .models import PickupJob, PickupRequest
+
+DEFAULT_WEIGHTS = {
+    "rating": 1.0,       # Bayesian-smoothed stars, 0..1
+    "confidence": 0.5,   # how many ratings back that average, 0..1
+    "load": 0.75,        # accepted pickups not yet completed, penalty 0..1
+    "decline": 1.0,      # recent share of offers declined, penalty 0..1
+    "distance": 1.0,     # km from the requester, penalty 0..1
+}
+
+# Smoothing: a collector with no ratings scores as if rated PRIOR_STARS.
+PRIOR_STARS = 3.0
+PRIOR_WEIGHT = 5.0
+# log1p(count) / log1p(CONFIDENT_RATINGS) saturates at 1.
+CONFIDENT_RATINGS = 50.0
+# Distance at which the distance penalty reaches one half.
+DISTANCE_HALF_KM = 5.0
+
+
+def _weights() -> dict[str, float]:
+    return {**DEFAULT_WEIGHTS, **getattr(settings, "PICKUP_SCORE_WEIGHTS", {})}
+
+
+def candidate_pool_size() -> int:
+    return int(getattr(settings, "PICKUP_CANDIDATE_POOL", 50))
+
+
+def _decline_window() -> timedelta:
+    return timedelta(days=int(getattr(settings, "PICKUP_DECLINE_WINDOW_DAYS", 30)))
+
+
+def score_candidates(
+    *,
+    rating: np.ndarray,
+    ratings_count: np.ndarray,
+    load: np.ndarray,
+    declined: np.ndarray,
+    offered: np.ndarray,
+    distance_km: np.ndarray,
+    weights: Optional[dict[str, float]] = None,
+) -> np.ndarray:
+    """Higher is better. All inputs are aligned 1-D arrays; NaN distance means unknown."""
+    w = _weights() if weights is None else {**DEFAULT_WEIGHTS, **weights}
+
+    smoothed = (rating * ratings_count + PRIOR_STARS * PRIOR_WEIGHT) / (ratings_count + PRIOR_WEIGHT)
+    confidence = np.minimum(np.log1p(ratings_count) / np.log1p(CONFIDENT_RATINGS), 1.0)
+    busy = load / (load + 1.0)
+    decline_rate = declined / (offered + 1.0)
+    # unknown distance ranks like a collector far away
+    far = np.nan_to_num(distance_km / (distance_km + DISTANCE_HALF_KM), nan=1.0)
+
+    return (
+        w["rating"] * (smoothed / 5.0)
+        + w["confidence"] * confidence
+        - w["load"] * busy
+        - w["decline"] * decline_rate
+        - w["distance"] * far
+    )
+
+
+def top_n(ids: np.ndarray, scores: np.ndarray, n: int) -> list[int]:
+    """The `n` best ids, best first; ties go to the lower id."""
+    if n <= 0 or not len(ids):
+        return []
+    if n < len(ids):
+        keep = np.argpartition(-scores, n - 1)[:n]
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))
+    return ids[order].tolist()
+
+
+def _activity(ids: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Current accepted load and recent offer/decline counts, aligned with `ids`."""
+    pos = {cid: i for i, cid in enumerate(ids)}
+    load = np.zeros(len(ids))
+    declined = np.zeros(len(ids))
+    offered = np.zeros(len(ids))
+
+    busy = (
+        PickupJob.objects.filter(collector_id__in=ids, status=PickupJob.Status.ACCEPTED)
+        .values("collector_id")
+        .annotate(n=Count("id"))
+        .values_list("collector_id", "n")
+    )
+    for cid, n in busy:
+        load[pos[cid]] = n
+
+    recent = (
+        PickupRequest.objects.filter(collector_id__in=ids, created_at__gte=timezone.now() - _decline_window())
+        .values("collector_id")
+        .annotate(n=Count("id"), d=Count("id", filter=Q(status=PickupRequest.Status.DECLINED)))
+        .values_list("collector_id", "n", "d")
+    )
+    for cid, n, d in recent:
+        offered[pos[cid]] = n
+        declined[pos[cid]] = d
+
+    return load, declined, offered
+
+
+def rank_pool(pool: CandidatePool, n: int) -> list[int]:
+    """
+    Pick the best `n` collectors of `pool`.
+
+    A pool no larger than `n` is returned as is: everyone gets the offer, so
+    there is nothing to rank and no activity queries are run.
+    """
+    if len(pool.ids) <= n:
+        return pool.ids.tolist()
+    ids = pool.ids.tolist()
+    load, declined, offered = _activity(ids)
+    scores = score_candidates(
+        rating=pool.rating,
+        ratings_count=pool.ratings_count,
+        load=load,
+        declined=declined,
+        offered=offered,
+        distance_km=pool.distance_km,
+    )
+    return top_n(pool.ids, scores, n)
@@ -0,0 +1,476 @@
+import math
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, DurationField, ExpressionWrapper, F, Q, Value, When, Window
+from django.db.models.functions import Ceil, Greatest, RowNumber
+from django.utils import timezone
+
+from Notifications.models import Notification
+from RecyCon.models import Product
+from .collector_index import candidate_pool
+from .models import DispatchTask, PickupJob, PickupRequest, PickupTransition
+from .scoring import candidate_pool_size, rank_pool
+
+# Rows per INSERT statement; Django further caps this to the backend's
+# parameter limit, so this is an upper bound rather than an exact size.
+DISPATCH_BATCH_SIZE = 500
+
+
+def _dispatch_k() -> int:
+    """How many of the nearest matching collectors receive each pickup."""
+    return int(getattr(settings, "PICKUP_DISPATCH_K", 10))
+
+
+def _async_dispatch() -> bool:
+    return bool(getattr(settings, "PICKUP_ASYNC_DISPATCH", False))
+
+
+def _transition(job_id: int, from_status: str, to_status: str, actor_id=None, at=None) -> PickupTransition:
+    return PickupTransition(
+        job_id=job_id,
+        from_status=from_status,
+        to_status=to_status,
+        actor_id=actor_id,
+        created_at=at or timezone.now(),
+    )
+
+
+class DispatchResult(NamedTuple):
+    created: int
+    skipped: int
+
+
+def _ranked_collector_ids(kind: str, coords) -> list[int]:
+    k = _dispatch_k()
+    return rank_pool(candidate_pool(kind, coords, max(k, candidate_pool_size())), k)
+
+
+def _offer(job: PickupJob, collector_id: int) -> PickupRequest:
+    return PickupRequest(
+        job_id=job.pk,
+        requester_id=job.requester_id,
+        collector_id=collector_id,
+        product_id=job.product_id,
+        kind=job.kind,
+        weight_kg=job.weight_kg,
+        price=job.price,
+        status=PickupRequest.Status.PENDING,
+    )
+
+
+@transaction.atomic
+def dispatch_pickup(
+    *,
+    job: PickupJob,
+    collector_ids: Optional[Iterable[int]] = None,
+    batch_size: int = DISPATCH_BATCH_SIZE,
+) -> DispatchResult:
+    """
+    Offer `job` to the PICKUP_DISPATCH_K best-scoring collectors among the
+    PICKUP_CANDIDATE_POOL nearest matching ones (or to `collector_ids` when
+    given) with chunked bulk inserts.
+
+    Offers that already exist for (requester, collector, product) are skipped
+    by the unique constraint instead of being looked up one by one.
+    """
+    if collector_ids is None:
+        collector_ids = _ranked_collector_ids(job.kind, job.requester.coordinates)
+    collector_ids = list(dict.fromkeys(collector_ids))
+    created = 0
+    if collector_ids:
+        offers = PickupRequest.objects.filter(job_id=job.pk)
+        before = offers.count()
+        PickupRequest.objects.bulk_create(
+            [_offer(job, cid) for cid in collector_ids],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        created = offers.count() - before
+
+    now = timezone.now()
+    PickupJob.objects.filter(pk=job.pk).update(dispatched_at=now, updated_at=now)
+    job.dispatched_at = now
+    return DispatchResult(created=created, skipped=len(collector_ids) - created)
+
+
+@transaction.atomic
+def create_pickup(*, requester, kind: str, weight, price) -> tuple[PickupJob, Optional[DispatchResult]]:
+    """
+    Create the product and its pickup job, then offer it to collectors.
+
+    With PICKUP_ASYNC_DISPATCH the fan-out is queued for `dispatch_worker`
+    and the result is None.
+    """
+    product = Product.objects.create(kind=kind, weight=weight, price=price)
+    job = PickupJob.objects.create(
+        requester=requester,
+        product=product,
+        kind=kind,
+        weight_kg=weight,
+        price=price,
+    )
+    _transition(job.pk, "", PickupJob.Status.PENDING, requester.pk, job.created_at).save()
+    if _async_dispatch():
+        DispatchTask.objects.create(job=job)
+        return job, None
+    return job, dispatch_pickup(job=job)
+
+
+class PickupEntry(NamedTuple):
+    kind: str
+    weight: Decimal
+    price: Decimal
+
+
+@transaction.atomic
+def create_pickups_batch(*, requester, entries: Sequence[PickupEntry]) -> list[tuple[PickupJob, int]]:
+    """
+    Create one pickup job per entry and offer them all in one transaction.
+
+    Products, jobs and offers each go in with one bulk insert. Every entry
+    shares the requester's location, so collectors are ranked once per kind
+    rather than once per entry. Returns (job, offers_sent) in entry order.
+    """
+    if not entries:
+        return []
+
+    products = Product.objects.bulk_create(
+        [Product(kind=e.kind, weight=e.weight, price=e.price) for e in entries]
+    )
+    jobs = PickupJob.objects.bulk_create(
+        [
+            PickupJob(requester=requester, product=p, kind=e.kind, weight_kg=e.weight, price=e.price)
+            for e, p in zip(entries, products)
+        ]
+    )
+    PickupTransition.objects.bulk_create(
+        [_transition(job.pk, "", PickupJob.Status.PENDING, requester.pk, job.created_at) for job in jobs]
+    )
+
+    coords = requester.coordinates
+    ranked = {kind: _ranked_collector_ids(kind, coords) for kind in {e.kind for e in entries}}
+    PickupRequest.objects.bulk_create(
+        [_offer(job, cid) for job in jobs for cid in ranked[job.kind]],
+        batch_size=DISPATCH_BATCH_SIZE,
+    )
+
+    now = timezone.now()
+    PickupJob.objects.filter(pk__in=[j.pk for j in jobs]).update(dispatched_at=now, updated_at=now)
+    for job in jobs:
+        job.dispatched_at = now
+    return [(job, len(ranked[job.kind])) for job in jobs]
+
+
+def accept_pickup(*, job_id: int, collector) -> bool:
+    """
+    First-accept-wins claim of a pending job by one of its offered collectors.
+
+    The claim is a compare-and-swap on the job row: UPDATE ... WHERE status is
+    still pending. Exactly one concurrent caller gets a row count of 1; every
+    other caller gets False straight away and never waits on a row lock.
+    """
+    pending = PickupJob.objects.filter(pk=job_id, status=PickupJob.Status.PENDING)
+    if not pending.exists():
+        return False
+
+    now = timezone.now()
+    with transaction.atomic():
+        taken = pending.update(
+            status=PickupJob.Status.ACCEPTED,
+            collector=collector,
+            accepted_at=now,
+            updated_at=now,
+        )
+        if taken:
+            _transition(job_id, PickupJob.Status.PENDING, PickupJob.Status.ACCEPTED, collector.pk, now).save()
+    return bool(taken)
+
+
+def decline_offer(*, offer: PickupRequest, collector) -> None:
+    """
+    Turn down one collector's offer. The decline is recorded on the offer
+    (status and updated_at); the job stays pending for the others, so its
+    transition log is left alone.
+    """
+    offer.status = PickupRequest.Status.DECLINED
+    offer.save(update_fields=["status", "updated_at"])
+
+
+def complete_pickup(*, job: PickupJob, collector) -> bool:
+    """
+    Mark `collector`'s accepted job completed. The guarded UPDATE decides
+    between a double-submit or two concurrent completions: only the one that
+    flips the row logs the transition. Returns whether this call completed it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        done = PickupJob.objects.filter(
+            pk=job.pk, collector_id=collector.pk, status=PickupJob.Status.ACCEPTED
+        ).update(status=PickupJob.Status.COMPLETED, updated_at=now)
+        if done:
+            _transition(job.pk, PickupJob.Status.ACCEPTED, PickupJob.Status.COMPLETED, collector.pk, now).save()
+    if done:
+        job.status, job.updated_at = PickupJob.Status.COMPLETED, now
+    return bool(done)
+
+
+def _complete_accepted(ids: list[int], now) -> list[int]:
+    """
+    Flip the still-accepted jobs among `ids` to completed and return the ids
+    this call flipped. One guarded UPDATE does it when it changes every row;
+    otherwise another writer completed some of them first, so the UPDATE is
+    rolled back and the rows are flipped one guarded UPDATE at a time.
+    """
+    accepted = PickupJob.objects.filter(status=PickupJob.Status.ACCEPTED)
+    with transaction.atomic():
+        if accepted.filter(pk__in=ids).update(status=PickupJob.Status.COMPLETED, updated_at=now) == len(ids):
+            return ids
+        transaction.set_rollback(True)
+    return [
+        pk for pk in ids
+        if accepted.filter(pk=pk).update(status=PickupJob.Status.COMPLETED, updated_at=now)
+    ]
+
+
+@transaction.atomic
+def complete_pickups_bulk(*, job_ids: Iterable[int], collector) -> list[int]:
+    """
+    Complete many of `collector`'s accepted jobs at once: one guarded UPDATE
+    for the statuses (see `_complete_accepted`), one INSERT for the transitions, and the requester and collector
+    rewards applied through `log_activities_bulk`. Ids that are not this
+    collector's accepted jobs are ignored. Returns the ids completed.
+    """
+    from Rewards.ledger import pickup_key
+    from Rewards.services import log_activities_bulk
+
+    accepted = PickupJob.objects.filter(
+        pk__in=set(job_ids), collector_id=collector.pk, status=PickupJob.Status.ACCEPTED
+    )
+    ids = list(accepted.values_list("id", flat=True))
+    if not ids:
+        return []
+
+    now = timezone.now()
+    ids = _complete_accepted(ids, now)
+    if not ids:
+        return []
+    jobs = list(
+        PickupJob.objects.filter(pk__in=ids)
+        .select_related("product")
+        .only("id", "requester_id", "weight_kg", "product")
+    )
+    PickupTransition.objects.bulk_create(
+        [_transition(j.pk, PickupJob.Status.ACCEPTED, PickupJob.Status.COMPLETED, collector.pk, now) for j in jobs]
+    )
+    log_activities_bulk(
+        [(j.requester_id, j.product, j.weight_kg, pickup_key(j.pk, "requester")) for j in jobs]
+        + [(collector.pk, j.product, j.weight_kg, pickup_key(j.pk, "collector")) for j in jobs]
+    )
+    return [j.pk for j in jobs]
+
+
+def pickup_latency_percentiles(*, since=None, percentiles=(50, 90, 99)) -> dict[str, dict]:
+    """
+    Acceptance latency (created -> accepted) and completion time
+    (accepted -> completed) percentiles in seconds.
+
+    One query ranks each kind's durations with ROW_NUMBER() and sizes it
+    with COUNT() OVER the same partition, then keeps only the rows at the
+    nearest ranks of `percentiles`; at most len(percentiles) rows per kind
+    leave the database, however many pickups there are.
+    """
+    started = Case(
+        When(to_status=PickupJob.Status.ACCEPTED, then=F("job__created_at")),
+        default=F("job__accepted_at"),
+    )
+    duration = ExpressionWrapper(F("created_at") - started, output_field=DurationField())
+    per_kind = {"partition_by": [F("to_status")]}
+    ranked = (
+        PickupTransition.objects.filter(
+            to_status__in=[PickupJob.Status.ACCEPTED, PickupJob.Status.COMPLETED],
+            **({"created_at__gte": since} if since else {}),
+        )
+        .annotate(duration=duration)
+        .exclude(duration__isnull=True)
+        .annotate(
+            rn=Window(RowNumber(), order_by=[duration.asc()], **per_kind),
+            n=Window(Count("id"), **per_kind),
+            mean=Window(Avg(duration), **per_kind),
+        )
+    )
+    nearest = Q()
+    for p in percentiles:
+        nearest |= Q(rn=Greatest(Ceil(F("n") * p / 100.0), Value(1.0)))
+    rows = ranked.filter(nearest).order_by().values_list("to_status", "rn", "n", "mean", "duration")
+
+    stats: dict[str, dict] = {PickupJob.Status.ACCEPTED: {"count": 0}, PickupJob.Status.COMPLETED: {"count": 0}}
+    for to_status, rn, n, mean, value in rows:
+        out = stats[to_status]
+        out.update(count=n, mean=_seconds(mean))
+        for p in percentiles:
+            if rn == max(math.ceil(p / 100 * n), 1):
+                out[f"p{p}"] = _seconds(value)
+    return {"accept": stats[PickupJob.Status.ACCEPTED], "complete": stats[PickupJob.Status.COMPLETED]}
+
+
+def _seconds(value) -> float:
+    # SQLite hands durations back as microseconds; other backends as timedelta
+    return value.total_seconds() if isinstance(value, timedelta) else float(value) / 1e6
+
+
+# --- Dispatch queue ---------------------------------------------------------
+
+def _max_attempts() -> int:
+    return int(getattr(settings, "PICKUP_DISPATCH_MAX_ATTEMPTS", 5))
+
+
+def _backoff(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` + 1: base, 2x base, 4x base, ..."""
+    base = float(getattr(settings, "PICKUP_DISPATCH_BACKOFF_SECONDS", 5))
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "PICKUP_DISPATCH_LEASE_SECONDS", 300)))
+
+
+def claim_dispatch_tasks(*, batch_size: int = 50) -> list[DispatchTask]:
+    """
+    Claim up to `batch_size` due tasks for this caller.
+
+    Candidates are read without locks; the claim itself is one conditional
+    UPDATE that only matches rows still queued (or whose lease ran out), so
+    two workers racing for the same rows split them instead of both running
+    them.
+    """
+    now = timezone.now()
+    due = Q(status=DispatchTask.Status.QUEUED, run_after__lte=now) | Q(
+        status=DispatchTask.Status.RUNNING, claimed_at__lt=now - _lease()
+    )
+    ids = list(DispatchTask.objects.filter(due).order_by("run_after").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    DispatchTask.objects.filter(due, pk__in=ids).update(
+        status=DispatchTask.Status.RUNNING,
+        claim_token=token,
+        claimed_at=now,
+        attempts=F("attempts") + 1,
+        updated_at=now,
+    )
+    return list(
+        DispatchTask.objects.filter(claim_token=token)
+        .select_related("job", "job__requester")
+        .order_by("run_after")
+    )
+
+
+def run_dispatch_task(task: DispatchTask) -> Optional[DispatchResult]:
+    """
+    Fan out a claimed task and record the outcome.
+
+    A failure puts the task back in the queue with exponential backoff until
+    PICKUP_DISPATCH_MAX_ATTEMPTS, after which it is marked failed. Returns
+    None when the attempt failed.
+    """
+    mine = DispatchTask.objects.filter(pk=task.pk, claim_token=task.claim_token)
+    if task.job.status != PickupJob.Status.PENDING:
+        # expired (or otherwise closed) while queued; nobody should be offered it
+        mine.update(status=DispatchTask.Status.DONE, updated_at=timezone.now())
+        return DispatchResult(created=0, skipped=0)
+    try:
+        result = dispatch_pickup(job=task.job)
+    except Exception as exc:
+        now = timezone.now()
+        if task.attempts >= _max_attempts():
+            if mine.update(status=DispatchTask.Status.FAILED, last_error=repr(exc), updated_at=now):
+                PickupJob.objects.filter(pk=task.job_id).update(dispatch_failed_at=now, updated_at=now)
+        else:
+            mine.update(
+                status=DispatchTask.Status.QUEUED,
+                run_after=now + _backoff(task.attempts),
+                last_error=repr(exc),
+                updated_at=now,
+            )
+        return None
+
+    mine.update(status=DispatchTask.Status.DONE, last_error="", updated_at=timezone.now())
+    return result
+
+
+# --- Expiry -----------------------------------------------------------------
+
+EXPIRY_BATCH_SIZE = 500
+
+
+def _expire_batches(model, stale, batch_size: int, on_batch=None):
+    """
+    Flip `stale` rows of `model` to EXPIRED, `batch_size` at a time.
+
+    Each batch is a short (status, created_at) index scan for ids followed by
+    one UPDATE in its own transaction, so the write lock is only ever held
+    for a single batch. `on_batch(ids)` runs inside that transaction. Yields
+    rows updated per batch.
+    """
+    while True:
+        ids = list(stale.order_by("created_at", "id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            updated = model.objects.filter(pk__in=ids, status="pending").update(
+                status=model.Status.EXPIRED, updated_at=now,
+            )
+            if on_batch is not None:
+                on_batch(ids)
+        yield updated
+
+
+def expire_stale_offers(*, cutoff, batch_size: int = EXPIRY_BATCH_SIZE):
+    """Expire pending offers created before `cutoff`. Yields rows expired per batch."""
+    stale = PickupRequest.objects.filter(status=PickupRequest.Status.PENDING, created_at__lt=cutoff)
+    yield from _expire_batches(PickupRequest, stale, batch_size)
+
+
+def expire_stale_jobs(*, cutoff, batch_size: int = EXPIRY_BATCH_SIZE):
+    """
+    Expire pickups nobody accepted before `cutoff` and tell each requester.
+    Yields rows expired per batch.
+    """
+    stale = PickupJob.objects.filter(status=PickupJob.Status.PENDING, created_at__lt=cutoff)
+
+    def notify(ids):
+        expired = list(PickupJob.objects.filter(pk__in=ids, status=PickupJob.Status.EXPIRED).values_list(
+            "id", "requester_id", "kind", "weight_kg", "updated_at"
+        ))
+        PickupTransition.objects.bulk_create(
+            [
+                _transition(job_id, PickupJob.Status.PENDING, PickupJob.Status.EXPIRED, at=at)
+                for job_id, _, _, _, at in expired
+            ],
+            batch_size=batch_size,
+        )
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=requester_id,
+                    title="Pickup request expired",
+                    message=(
+                        f"No collector accepted your {weight} kg {kind.replace('_', '-')} pickup. "
+                        "You can submit it again from your dashboard."
+                    ),
+                    category=Notification.Category.SYSTEM,
+                    payload={"pickup_id": job_id},
+                )
+                for job_id, requester_id, kind, weight, _ in expired
+            ],
+            batch_size=batch_size,
+        )
+
+    yield from _expire_batches(PickupJob, stale, batch_size, on_batch=notify)
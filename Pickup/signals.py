@@ -1,17 +1,18 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import PickupRequest
+from User.models import CollectorRating
+from .collector_index import invalidate_collector_index
 
-@receiver(post_save, sender=PickupRequest)
-def _on_pickup_completed(sender, instance: PickupRequest, created, **kwargs):
-    if created or instance.status != PickupRequest.Status.COMPLETED:
-        return
-    try:
-        from Rewards.services import log_activity_and_update
-        log_activity_and_update(
-            user=instance.requester,          
-            product=instance.product,
-            weight_kg=instance.weight_kg,
-        )
-    except Exception:
-        pass
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _on_collector_deleted(sender, instance, **kwargs):
+    # a deleted collector must never be offered a pickup from a stale index
+    if instance.role == "collector" and instance.is_approved:
+        invalidate_collector_index()
+
+@receiver(post_save, sender=CollectorRating)
+@receiver(post_delete, sender=CollectorRating)
+def _on_rating_changed(sender, instance, **kwargs):
+    # ratings feed dispatch scoring; the index carries them as columns
+    transaction.on_commit(invalidate_collector_index)
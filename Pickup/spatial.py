@@ -0,0 +1,94 @@
+import heapq
+import math
+from typing import Iterable
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+# ~5.5 km cells: a city district holds a handful of collectors per cell.
+DEFAULT_CELL_DEG = 0.05
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid for k-nearest-neighbour lookups.
+
+    Points are bucketed into square cells; a query scans rings of cells
+    outwards from its own cell and stops once no unscanned ring can hold
+    anything closer than the current k-th best. Distances are equirectangular
+    approximations in km, which rank correctly at city scale.
+    """
+
+    def __init__(self, points: Iterable[tuple[int, float, float]], cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.cells: dict[tuple[int, int], list[tuple[int, float, float]]] = {}
+        for pid, lat, lng in points:
+            self.cells.setdefault(self._cell(lat, lng), []).append((pid, lat, lng))
+        self.size = sum(len(v) for v in self.cells.values())
+        if self.cells:
+            rows = [i for i, _ in self.cells]
+            cols = [j for _, j in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self._bounds = (0, 0, 0, 0)
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _ring(self, ci: int, cj: int, r: int):
+        if r == 0:
+            yield ci, cj
+            return
+        for dj in range(-r, r + 1):
+            yield ci - r, cj + dj
+            yield ci + r, cj + dj
+        for di in range(-r + 1, r):
+            yield ci + di, cj - r
+            yield ci + di, cj + r
+
+    def nearest(self, lat: float, lng: float, k: int) -> list[tuple[float, int]]:
+        """Up to `k` (distance_km, id) pairs, closest first."""
+        if k <= 0 or not self.size:
+            return []
+
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        kx = KM_PER_DEG_LAT * cos_lat
+        # km covered by one cell along its shorter side
+        ring_km = self.cell_deg * KM_PER_DEG_LAT * min(1.0, cos_lat)
+
+        ci, cj = self._cell(lat, lng)
+        min_i, max_i, min_j, max_j = self._bounds
+        max_ring = max(ci - min_i, max_i - ci, cj - min_j, max_j - cj, 0)
+
+        heap: list[tuple[float, int]] = []  # max-heap on squared distance
+        cells = self.cells
+        for r in range(max_ring + 1):
+            for cell in self._ring(ci, cj, r):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for pid, plat, plng in bucket:
+                    dy = (plat - lat) * KM_PER_DEG_LAT
+                    dx = (plng - lng) * kx
+                    d2 = dx * dx + dy * dy
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, pid))
+                    elif d2 < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d2, pid))
+            if len(heap) >= k:
+                bound = r * ring_km
+                if -heap[0][0] <= bound * bound:
+                    break
+
+        return sorted((math.sqrt(-nd2), pid) for nd2, pid in heap)
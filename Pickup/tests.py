@@ -1,3 +1,262 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .collector_index import invalidate_collector_index
+from Notifications.models import Notification
+from .models import DispatchTask, PickupJob, PickupRequest, PickupTransition
+from .services import (
+    _complete_accepted, accept_pickup, complete_pickup, create_pickup, pickup_latency_percentiles,
+)
+
+User = get_user_model()
+
+
+def make_user(email: str, role: str, **extra):
+    return User.objects.create_user(
+        email=email, password="pw", role=role, is_active=True, is_approved=True, **extra
+    )
+
+
+@override_settings(PICKUP_ASYNC_DISPATCH=True, PICKUP_DISPATCH_MAX_ATTEMPTS=1)
+class DispatchStateTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        self.household = make_user("house@example.com", "household")
+        make_user("col@example.com", "collector", collector_product="plastic")
+        self.job, _ = create_pickup(requester=self.household, kind="plastic", weight=1, price=1)
+        self.client.force_login(self.household)
+
+    def test_queued_job_refreshes_the_dashboard(self):
+        self.assertTrue(self.job.is_dispatching)
+        response = self.client.get(reverse("household:dashboard"))
+        self.assertTrue(response.context["dispatching"])
+
+    def test_failed_dispatch_stops_waiting(self):
+        with mock.patch("Pickup.services.dispatch_pickup", side_effect=RuntimeError("boom")):
+            err = StringIO()
+            call_command("dispatch_worker", "--once", stdout=StringIO(), stderr=err)
+        self.assertIn(f"pickup #{self.job.pk}: attempt 1 failed", err.getvalue())
+        self.assertEqual(DispatchTask.objects.get().status, DispatchTask.Status.FAILED)
+
+        self.job.refresh_from_db()
+        self.assertIsNotNone(self.job.dispatch_failed_at)
+        self.assertFalse(self.job.is_dispatching)
+        self.assertTrue(self.job.dispatch_stalled)
+        response = self.client.get(reverse("household:dashboard"))
+        self.assertFalse(response.context["dispatching"])
+        self.assertContains(response, "Not sent yet")
+
+    @override_settings(PICKUP_DISPATCH_STALE_SECONDS=60)
+    def test_unclaimed_dispatch_goes_stale(self):
+        PickupJob.objects.filter(pk=self.job.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.job.refresh_from_db()
+        self.assertFalse(self.job.is_dispatching)
+        self.assertTrue(self.job.dispatch_stalled)
+
+
+class AcceptPickupTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        household = make_user("house@example.com", "household")
+        self.collectors = [make_user(f"c{i}@example.com", "collector", collector_product="plastic") for i in range(2)]
+        self.job, _ = create_pickup(requester=household, kind="plastic", weight=1, price=1)
+
+    def assertOwnedBy(self, collector):
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.collector_id), (PickupJob.Status.ACCEPTED, collector.pk))
+        self.assertEqual(
+            PickupTransition.objects.filter(job=self.job, to_status=PickupJob.Status.ACCEPTED).count(), 1
+        )
+
+    def test_second_accept_loses(self):
+        first, second = self.collectors
+        self.assertTrue(accept_pickup(job_id=self.job.pk, collector=first))
+        self.assertFalse(accept_pickup(job_id=self.job.pk, collector=second))
+        self.assertOwnedBy(first)
+
+    def test_update_decides_when_both_pass_the_precheck(self):
+        first, second = self.collectors
+        with mock.patch.object(QuerySet, "exists", return_value=True):
+            self.assertTrue(accept_pickup(job_id=self.job.pk, collector=first))
+            self.assertFalse(accept_pickup(job_id=self.job.pk, collector=second))
+        self.assertOwnedBy(first)
+
+    def test_dashboard_reports_a_taken_pickup(self):
+        first, second = self.collectors
+        accept_pickup(job_id=self.job.pk, collector=first)
+        self.client.force_login(second)
+        response = self.client.post(
+            reverse("collector:dashboard"), {"action": "pickup_accept", "pickup_id": self.job.pk}, follow=True
+        )
+        self.assertIn("already been taken", " ".join(str(m) for m in response.context["messages"]))
+        self.assertOwnedBy(first)
+
+
+class CompletePickupTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        household = make_user("house@example.com", "household")
+        self.collector = make_user("col@example.com", "collector", collector_product="plastic")
+        self.job, _ = create_pickup(requester=household, kind="plastic", weight=1, price=1)
+        accept_pickup(job_id=self.job.pk, collector=self.collector)
+
+    def completions(self):
+        return PickupTransition.objects.filter(job=self.job, to_status=PickupJob.Status.COMPLETED).count()
+
+    def test_second_completion_loses(self):
+        stale = PickupJob.objects.get(pk=self.job.pk)
+        self.assertTrue(complete_pickup(job=self.job, collector=self.collector))
+        self.assertFalse(complete_pickup(job=stale, collector=self.collector))
+        self.assertEqual(self.completions(), 1)
+
+    def test_double_submit_credits_once(self):
+        self.client.force_login(self.collector)
+        for _ in range(2):
+            self.client.post(reverse("collector:dashboard"), {"action": "pickup_complete", "pickup_id": self.job.pk})
+        self.assertEqual(self.completions(), 1)
+        self.collector.refresh_from_db()
+        self.assertEqual(self.collector.total_pickups, 1)
+
+    def test_bulk_flip_skips_jobs_completed_meanwhile(self):
+        others = [create_pickup(requester=self.job.requester, kind="plastic", weight=1, price=1)[0] for _ in range(2)]
+        for job in others:
+            accept_pickup(job_id=job.pk, collector=self.collector)
+        complete_pickup(job=self.job, collector=self.collector)
+
+        ids = [self.job.pk] + [j.pk for j in others]
+        self.assertEqual(_complete_accepted(ids, timezone.now()), ids[1:])
+        self.assertEqual(_complete_accepted(ids[1:], timezone.now()), [])
+
+
+class ExpirePickupsTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        self.household = make_user("house@example.com", "household")
+        self.collectors = [make_user(f"c{i}@example.com", "collector", collector_product="plastic") for i in range(2)]
+        self.jobs = [
+            create_pickup(requester=self.household, kind="plastic", weight=1, price=1)[0] for _ in range(5)
+        ]
+        accept_pickup(job_id=self.jobs[0].pk, collector=self.collectors[0])
+        old = timezone.now() - timedelta(hours=100)
+        PickupJob.objects.filter(pk__in=[j.pk for j in self.jobs[:4]]).update(created_at=old)
+        PickupRequest.objects.filter(job__in=self.jobs[:4]).update(created_at=old)
+
+    def expire(self):
+        out = StringIO()
+        call_command("expire_pickups", max_age_hours=72, batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_old_pending_pickups_expire_once(self):
+        report = self.expire()
+        self.assertIn("pickups : expired 3 in 2 batch(es)", report)
+
+        self.assertEqual(
+            [PickupJob.objects.get(pk=j.pk).status for j in self.jobs],
+            ["accepted", "expired", "expired", "expired", "pending"],
+        )
+        # every old offer still pending, including those on the accepted job
+        self.assertEqual(PickupRequest.objects.filter(status="expired").count(), 8)
+        self.assertFalse(PickupRequest.objects.filter(job=self.jobs[4]).exclude(status="pending").exists())
+        self.assertEqual(PickupTransition.objects.filter(to_status="expired").count(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.household, title="Pickup request expired").count(), 3)
+
+        self.assertIn("pickups : expired 0 in 0 batch(es)", self.expire())
+        self.assertEqual(Notification.objects.filter(title="Pickup request expired").count(), 3)
+
+
+class TransitionLogTests(TestCase):
+    def setUp(self):
+        invalidate_collector_index()
+        self.household = make_user("house@example.com", "household")
+        self.collectors = [make_user(f"c{i}@example.com", "collector", collector_product="plastic") for i in range(2)]
+
+    def post(self, collector, action, job):
+        self.client.force_login(collector)
+        self.client.post(reverse("collector:dashboard"), {"action": action, "pickup_id": job.pk})
+
+    def test_timeline_skips_offer_declines(self):
+        job, _ = create_pickup(requester=self.household, kind="plastic", weight=1, price=1)
+        first, second = self.collectors
+        self.post(second, "pickup_decline", job)
+        self.post(first, "pickup_accept", job)
+        self.post(first, "pickup_complete", job)
+
+        self.assertEqual(
+            [(f, t, actor) for f, t, actor, _ in job.timeline()],
+            [("", "pending", self.household.pk), ("pending", "accepted", first.pk),
+             ("accepted", "completed", first.pk)],
+        )
+        self.assertEqual(job.offers.get(collector=second).status, PickupRequest.Status.DECLINED)
+
+    def test_latency_percentiles(self):
+        now = timezone.now()
+        for minutes in range(1, 11):
+            job, _ = create_pickup(requester=self.household, kind="plastic", weight=1, price=1)
+            accept_pickup(job_id=job.pk, collector=self.collectors[0])
+            PickupJob.objects.filter(pk=job.pk).update(created_at=now - timedelta(minutes=minutes),
+                                                       accepted_at=now)
+            PickupTransition.objects.filter(job=job, to_status="accepted").update(created_at=now)
+
+        stats = pickup_latency_percentiles(percentiles=(10, 50, 90, 100))
+        self.assertEqual(
+            stats["accept"],
+            {"count": 10, "mean": 330.0, "p10": 60.0, "p50": 300.0, "p90": 540.0, "p100": 600.0},
+        )
+        self.assertEqual(stats["complete"], {"count": 0})
+        self.assertEqual(pickup_latency_percentiles(since=now + timedelta(seconds=1))["accept"], {"count": 0})
+
+
+class PickupJobBackfillTests(TransactionTestCase):
+    before = [("Pickup", "0001_initial")]
+    after = [("Pickup", "0002_pickupjob")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_offers_are_grouped_into_one_job_per_product(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        # the user table is still at its latest migration
+        apps = executor.loader.project_state(self.before + executor.loader.graph.leaf_nodes("User")).apps
+        users = apps.get_model("User", "User").objects
+        products = apps.get_model("RecyCon", "Product").objects
+        offers = apps.get_model("Pickup", "PickupRequest").objects
+
+        house = users.create(email="house@example.com", role="household")
+        collectors = [users.create(email=f"c{i}@example.com", role="collector") for i in range(3)]
+        taken, open_, declined = (products.create(kind="plastic", weight=2, price=5) for _ in range(3))
+        for c, status in zip(collectors, ("pending", "accepted", "declined")):
+            offers.create(requester=house, collector=c, product=taken, kind="plastic", weight_kg=2, price=5,
+                          status=status)
+        for c in collectors[:2]:
+            offers.create(requester=house, collector=c, product=open_, kind="plastic", weight_kg=2, price=5)
+        offers.create(requester=house, collector=collectors[0], product=declined, kind="plastic", weight_kg=2,
+                      price=5, status="declined")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        jobs = apps.get_model("Pickup", "PickupJob").objects
+
+        self.assertEqual(
+            {j.product_id: (j.status, j.collector_id, j.accepted_at is not None) for j in jobs.all()},
+            {
+                taken.pk: ("accepted", collectors[1].pk, True),
+                open_.pk: ("pending", None, False),
+                declined.pk: ("declined", None, False),
+            },
+        )
+        offers = apps.get_model("Pickup", "PickupRequest").objects
+        self.assertFalse(offers.filter(job__isnull=True).exists())
+        self.assertEqual(offers.filter(job__product_id=taken.pk).count(), 3)
@@ -0,0 +1,56 @@
+"""
+Shared plumbing for the concurrency benchmark commands.
+
+Benchmarks run their workers on threads, and every thread has its own
+connection, so fixture rows must be committed before the run starts. The
+rows are tagged with a reserved email domain and removed afterwards by
+`bench_fixtures`, even when the run fails.
+"""
+from contextlib import ExitStack, contextmanager
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+
+UserModel = get_user_model()
+
+
+def percentile(sorted_values, pct) -> float:
+    """Nearest-rank `pct` percentile of already sorted values (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+class BenchFixtures:
+    """Committed benchmark users under `domain`, plus cleanups for their other rows."""
+
+    def __init__(self, domain: str, stack: ExitStack):
+        self.domain = domain
+        self._stack = stack
+
+    @property
+    def users(self):
+        return UserModel.objects.filter(email__endswith=f"@{self.domain}")
+
+    def user(self, name: str, role: str, **extra):
+        """An unsaved, approved fixture user for `create_users`."""
+        return UserModel(
+            email=f"{name}@{self.domain}", password="!", role=role,
+            is_active=True, is_approved=True, **extra,
+        )
+
+    def create_users(self, users: Iterable) -> None:
+        UserModel.objects.bulk_create(list(users))
+
+    def on_exit(self, callback, *args, **kwargs) -> None:
+        """Run `callback` on exit, before the users are deleted; last registered runs first."""
+        self._stack.callback(callback, *args, **kwargs)
+
+
+@contextmanager
+def bench_fixtures(domain: str) -> Iterator[BenchFixtures]:
+    with ExitStack() as stack:
+        fixtures = BenchFixtures(domain, stack)
+        stack.callback(lambda: fixtures.users.delete())
+        yield fixtures
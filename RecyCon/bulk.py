@@ -0,0 +1,25 @@
+from typing import Sequence
+
+from django.db import connection
+from django.db.models import Model, QuerySet
+
+
+def insert_from(model: type[Model], fields: Sequence[str], queryset: QuerySet, *, ignore_conflicts: bool = False) -> int:
+    """
+    INSERT INTO `model` (`fields`) SELECT ... from `queryset`, whose
+    `values_list` must yield the columns in the same order. Rows never
+    leave the database. Returns the number of rows inserted.
+    """
+    qn = connection.ops.quote_name
+    opts = model._meta
+    columns = ", ".join(qn(opts.get_field(f).column) for f in fields)
+    select, params = queryset.query.sql_with_params()
+    sql = f"INSERT INTO {qn(opts.db_table)} ({columns}) "
+    if ignore_conflicts:
+        # the WHERE keeps SQLite from reading ON CONFLICT as part of the SELECT
+        sql += f"SELECT * FROM ({select}) src WHERE 1 = 1 ON CONFLICT DO NOTHING"
+    else:
+        sql += select
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
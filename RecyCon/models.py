@@ -59,4 +59,16 @@ class Product(models.Model):
     def co2_saved_for_weight(self, weight: Decimal | None = None) -> Decimal:
         """CO2 saved = weight * factor (Decimal)"""
         w = Decimal(weight if weight is not None else self.weight or 0)
-        return (w * self.co2_per_kg).quantize(Decimal("0.001"))
\ No newline at end of file
+        return (w * self.co2_per_kg).quantize(Decimal("0.001"))
+
+class VersionStamp(models.Model):
+    """
+    Shared version stamp for data that processes cache locally or in the
+    Django cache (see `RecyCon.versioning`). Kept in the database so that a
+    bump in one process is seen by every other one.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
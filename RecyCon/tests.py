@@ -1,3 +1,36 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase
 
-# Create your tests here.
+from .models import VersionStamp
+from .versioning import bump_version, get_version
+
+
+class VersionStampTests(TransactionTestCase):
+    def test_bump_is_seen_through_another_connection_and_cache(self):
+        before = get_version("test:stamp")
+        bumped = bump_version("test:stamp")
+        self.assertNotEqual(bumped, before)
+
+        # another process: its own cache and its own database connection
+        cache.clear()
+        other = connections.create_connection("default")
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT version FROM {VersionStamp._meta.db_table} WHERE name = %s", ["test:stamp"]
+                )
+                self.assertEqual(cursor.fetchone()[0], bumped)
+        finally:
+            other.close()
+        self.assertEqual(get_version("test:stamp"), bumped)
+
+    def test_rolled_back_bump_is_not_kept(self):
+        committed = bump_version("test:stamp")
+        try:
+            with transaction.atomic():
+                self.assertNotEqual(bump_version("test:stamp"), committed)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(get_version("test:stamp"), committed)
@@ -0,0 +1,33 @@
+"""
+Version stamps for cached data.
+
+Readers put the stamp of what they cache into the cache key (or keep it
+next to an in-process snapshot) and rebuild when it moves. The stamps live
+in the VersionStamp table rather than in the Django cache, which is
+per-process by default and may evict or reset them.
+
+A bump made inside a transaction becomes visible to other processes when
+that transaction commits, together with the change it announces, and
+disappears with it on rollback. Each bump draws a fresh random stamp, so a
+rolled-back stamp is never reused for different data.
+"""
+import secrets
+
+from .models import VersionStamp
+
+INITIAL_VERSION = 1
+
+
+def get_version(name: str) -> int:
+    """Current version stamp for `name`."""
+    version = VersionStamp.objects.filter(name=name).values_list("version", flat=True).first()
+    return INITIAL_VERSION if version is None else version
+
+
+def bump_version(name: str) -> int:
+    """Invalidate everything cached under `name` by giving it a new stamp."""
+    version = secrets.randbits(62) + INITIAL_VERSION + 1
+    if not VersionStamp.objects.filter(name=name).update(version=version):
+        VersionStamp.objects.bulk_create([VersionStamp(name=name, version=version)], ignore_conflicts=True)
+        VersionStamp.objects.filter(name=name).update(version=version)
+    return version
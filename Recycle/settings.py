@@ -152,6 +152,37 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 EMAIL_TIMEOUT = 20
 
+# --- Pickup dispatch ---
+PICKUP_ASYNC_DISPATCH = False   # True queues fan-out for `manage.py dispatch_worker` (see README)
+PICKUP_DISPATCH_MAX_ATTEMPTS = 5
+PICKUP_DISPATCH_BACKOFF_SECONDS = 5   # doubled after each failed attempt
+PICKUP_DISPATCH_LEASE_SECONDS = 300   # a running task older than this is re-claimed
+PICKUP_DISPATCH_STALE_SECONDS = 120   # dashboards stop waiting for a queued fan-out after this
+PICKUP_BATCH_MAX_ENTRIES = 100   # entries accepted by household pickups/batch/
+PICKUP_OFFER_MAX_AGE_HOURS = 72   # `manage.py expire_pickups` expires older pending pickups
+PICKUP_DISPATCH_K = 10   # best-scoring collectors offered each pickup
+PICKUP_CANDIDATE_POOL = 50   # nearest matching collectors considered for scoring
+PICKUP_DECLINE_WINDOW_DAYS = 30
+PICKUP_SCORE_WEIGHTS = {
+    "rating": 1.0,
+    "confidence": 0.5,
+    "load": 0.75,
+    "decline": 1.0,
+    "distance": 1.0,
+}
+
+# --- Rewards ---
+REWARDS_LEADERBOARD_SIZE = 100
+REWARDS_LEADERBOARD_CACHE_SECONDS = 300   # top-N lists; also dropped on every change to the period
+REWARDS_LEADERBOARD_KEEP_PERIODS = 1   # finished weeks/months `manage.py prune_leaderboard` keeps
+REWARDS_ASYNC_BADGES = False   # True leaves badges to `manage.py badge_worker` (see README)
+REWARDS_BADGE_BATCH_SIZE = 500
+REWARDS_BADGE_WINDOW_SECONDS = 2   # badge_worker drains the queue this often
+REWARDS_QUEUE_PAGE_SIZE = 200   # redemptions per page of the admin fulfilment queue
+REWARDS_AREA_RADIUS_KM = 2.5   # map coordinates this close to an area centre count for that area
+REWARDS_AREA_CACHE_SECONDS = 60   # area standings may lag live activity by this much
+REWARDS_POINTS_EXPIRY_DAYS = 365   # `manage.py expire_points` expires unspent points earned before this; None disables
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
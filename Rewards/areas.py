@@ -0,0 +1,185 @@
+"""
+Monthly recycling totals per area for area-vs-area challenges.
+
+A user's area is read from their address ("..., Dhanmondi, Dhaka") or, when
+the address names no known area, is the nearest area centre within
+REWARDS_AREA_RADIUS_KM of their map coordinates. `record_activities` adds
+freshly logged activities to this month's AreaStat rows in the caller's
+transaction; `standings` serves a month's rows from the cache for
+REWARDS_AREA_CACHE_SECONDS, so live counts show up within that window;
+`rebuild_area_stats` regenerates every row from Activity and bumps the
+version stamp so its result is served at once.
+
+Live counters credit an activity to the area of the user's address at the
+time it is logged, while a rebuild groups every activity by the user's
+address today. After a user moves, a rebuild therefore shifts their past
+activities to the new area; that is the intended correction, and rebuilding
+is how a month is restated.
+"""
+import re
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DateField, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from Pickup.spatial import haversine_km
+from RecyCon.versioning import bump_version, get_version
+from .leaderboard import Period, period_start
+from .models import Activity, AreaStat
+
+UserModel = get_user_model()
+
+VERSION_NAME = "rewards:areas"
+
+# name -> (centre lat, centre lng, other spellings found in addresses)
+AREAS = {
+    "Dhanmondi":   (23.7461, 90.3742, ("dhanmandi",)),
+    "Gulshan":     (23.7925, 90.4147, ()),
+    "Banani":      (23.7937, 90.4013, ()),
+    "Baridhara":   (23.8015, 90.4218, ()),
+    "Mohakhali":   (23.7778, 90.4050, ()),
+    "Mohammadpur": (23.7577, 90.3622, ("mohammedpur",)),
+    "Mirpur":      (23.8069, 90.3687, ()),
+    "Uttara":      (23.8747, 90.3984, ()),
+    "Bashundhara": (23.8191, 90.4526, ("bashundhara r/a",)),
+    "Badda":       (23.7800, 90.4267, ()),
+    "Tejgaon":     (23.7631, 90.3915, ("farmgate",)),
+    "Motijheel":   (23.7330, 90.4180, ()),
+    "Khilgaon":    (23.7515, 90.4280, ()),
+    "Lalbagh":     (23.7186, 90.3881, ("old dhaka", "puran dhaka")),
+}
+
+_SPELLINGS = {
+    spelling.lower(): name
+    for name, (_, _, aliases) in AREAS.items()
+    for spelling in (name, *aliases)
+}
+_ADDRESS_RE = re.compile(
+    r"\b(" + "|".join(re.escape(s) for s in sorted(_SPELLINGS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def area_for(address: str = "", lat: Optional[float] = None, lng: Optional[float] = None) -> Optional[str]:
+    """The area named first in `address`, else the nearest centre in range of (lat, lng)."""
+    m = _ADDRESS_RE.search(address or "")
+    if m:
+        return _SPELLINGS[m.group(1).lower()]
+    if lat is None or lng is None:
+        return None
+    radius = getattr(settings, "REWARDS_AREA_RADIUS_KM", 2.5)
+    dist, name = min((haversine_km(lat, lng, a_lat, a_lng), name) for name, (a_lat, a_lng, _) in AREAS.items())
+    return name if dist <= radius else None
+
+
+def _invalidate() -> None:
+    bump_version(VERSION_NAME)
+
+
+def month_of(day: Optional[date] = None) -> date:
+    """First day of `day`'s month (default today)."""
+    return period_start(Period.MONTH, day)
+
+
+def record_activities(activities: Iterable[Activity]) -> int:
+    """
+    Add `activities` to this month's totals of their users' areas: one
+    read of the users' addresses, one INSERT of missing rows and one UPDATE.
+    Returns the number of areas touched.
+    """
+    activities = list(activities)
+    users = {
+        uid: area_for(address, lat, lng)
+        for uid, address, lat, lng in UserModel.objects.filter(
+            pk__in={a.user_id for a in activities}
+        ).values_list("id", "address", "latitude", "longitude")
+    }
+    deltas: dict[str, list] = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+    for act in activities:
+        area = users.get(act.user_id)
+        if area:
+            d = deltas[area]
+            d[0] += Decimal(act.weight_kg)
+            d[1] += Decimal(act.co2_saved_kg)
+            d[2] += 1
+    if not deltas:
+        return 0
+
+    month = month_of()
+    AreaStat.objects.bulk_create([AreaStat(area=a, month=month) for a in deltas], ignore_conflicts=True)
+
+    def bump(i, output_field):
+        return Case(
+            *[When(area=a, then=Value(d[i])) for a, d in deltas.items()],
+            default=Value(0), output_field=output_field,
+        )
+
+    money = DecimalField(max_digits=14, decimal_places=3)
+    AreaStat.objects.filter(month=month, area__in=deltas).update(
+        weight_kg=F("weight_kg") + bump(0, money),
+        co2_kg=F("co2_kg") + bump(1, money),
+        activities=F("activities") + bump(2, IntegerField()),
+    )
+    return len(deltas)
+
+
+class AreaStanding(NamedTuple):
+    area: str
+    weight_kg: Decimal
+    co2_kg: Decimal
+    activities: int
+
+
+def standings(month: Optional[date] = None) -> list[AreaStanding]:
+    """A month's areas, most CO2 saved first (default: this month), at most REWARDS_AREA_CACHE_SECONDS old."""
+    month = month_of(month)
+    key = f"rewards:areas:{month}:v{get_version(VERSION_NAME)}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = [
+            tuple(r) for r in
+            AreaStat.objects.filter(month=month).order_by("-co2_kg", "area")
+            .values_list("area", "weight_kg", "co2_kg", "activities")
+        ]
+        cache.set(key, rows, getattr(settings, "REWARDS_AREA_CACHE_SECONDS", 60))
+    return [AreaStanding(*r) for r in rows]
+
+
+@transaction.atomic
+def rebuild_area_stats() -> int:
+    """
+    Regenerate every AreaStat row from Activity with one query grouped by
+    user address and month; returns the number of rows written.
+    """
+    totals: dict[tuple[str, date], list] = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+    grouped = (
+        Activity.objects.order_by()
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("user__address", "user__latitude", "user__longitude", "month")
+        .annotate(w=Sum("weight_kg"), c=Sum("co2_saved_kg"), n=Count("id"))
+        .values_list("user__address", "user__latitude", "user__longitude", "month", "w", "c", "n")
+    )
+    for address, lat, lng, month, w, c, n in grouped.iterator(chunk_size=2000):
+        area = area_for(address, lat, lng)
+        if area:
+            t = totals[(area, month)]
+            t[0] += w or 0
+            t[1] += c or 0
+            t[2] += n
+
+    AreaStat.objects.all().delete()
+    AreaStat.objects.bulk_create(
+        AreaStat(area=area, month=month, weight_kg=w, co2_kg=c, activities=n)
+        for (area, month), (w, c, n) in totals.items()
+    )
+    _invalidate()
+    return len(totals)
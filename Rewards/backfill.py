@@ -0,0 +1,112 @@
+"""
+Set-based badge backfill.
+
+A threshold badge added after users already passed its threshold reaches
+them only on their next activity. `backfill_badge` awards it to everyone who
+qualifies at once: one INSERT ... SELECT each into UserBadge, PointsLedger
+and Notification, one UPDATE of the users' points, and one INSERT and one
+UPDATE per leaderboard. No user row is loaded into Python.
+"""
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (
+    CharField, DateTimeField, DecimalField, Exists, F, IntegerField, JSONField, OuterRef, Value,
+)
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from Notifications.models import Notification
+from RecyCon.bulk import insert_from
+from .badge_rules import rule_for
+from .leaderboard import credit_users
+from .models import Badge, PointsLedger, UserBadge
+from .signals import badge_notification
+
+UserModel = get_user_model()
+
+
+class BackfillResult(NamedTuple):
+    qualifying: int   # users whose counters reach the badge but do not hold it
+    awarded: int      # badges inserted by this run
+    credited: int     # users whose points were raised by the bonus
+
+
+def qualifying_users(badge: Badge):
+    """Users whose counters reach `badge`'s threshold and who do not hold it yet."""
+    rule = rule_for(badge.code)
+    if rule is None:
+        raise ValueError(f"{badge.code!r} is not a pickups_N / co2_N threshold badge")
+    counter, threshold = rule
+    field = "total_pickups" if counter == "pickups" else "total_co2_saved_kg"
+    return UserModel.objects.filter(**{f"{field}__gte": threshold}).exclude(
+        Exists(UserBadge.objects.filter(user_id=OuterRef("pk"), badge_id=badge.pk))
+    )
+
+
+@transaction.atomic
+def backfill_badge(badge: Badge, *, dry_run: bool = False) -> BackfillResult:
+    """Award `badge` to every qualifying user; see the module docstring."""
+    users = qualifying_users(badge)
+    if dry_run:
+        return BackfillResult(users.count(), 0, 0)
+
+    # every row written by this run carries the same timestamp, which is how
+    # the later statements find this run's awards
+    now = timezone.now()
+    awarded = insert_from(
+        UserBadge,
+        ["user", "badge", "awarded_at"],
+        users.order_by().annotate(
+            bf_badge=Value(badge.pk),
+            bf_at=Value(now, output_field=DateTimeField()),
+        ).values_list("id", "bf_badge", "bf_at"),
+    )
+    if not awarded:
+        return BackfillResult(0, 0, 0)
+    awards = UserBadge.objects.filter(badge_id=badge.pk, awarded_at=now).order_by()
+
+    credited = 0
+    bonus = int(badge.points_bonus or 0)
+    if bonus:
+        entries = awards.annotate(
+            bf_key=Concat(
+                Value(f"badge:{badge.pk}:"), Cast("user_id", CharField()), output_field=CharField()
+            ),
+        ).exclude(Exists(PointsLedger.objects.filter(key=OuterRef("bf_key"))))
+        insert_from(
+            PointsLedger,
+            ["user", "key", "reason", "points", "co2_kg", "pickups", "created_at"],
+            entries.annotate(
+                bf_reason=Value(PointsLedger.Reason.BADGE),
+                bf_points=Value(bonus),
+                bf_co2=Value(0, output_field=DecimalField(max_digits=12, decimal_places=3)),
+                bf_pickups=Value(0),
+                bf_at=Value(now, output_field=DateTimeField()),
+            ).values_list("user_id", "bf_key", "bf_reason", "bf_points", "bf_co2", "bf_pickups", "bf_at"),
+        )
+        # the bonus entries are the only ledger change, so add rather than re-project
+        credited_ids = PointsLedger.objects.filter(
+            user_id__in=awards.values("user_id"), key__startswith=f"badge:{badge.pk}:", created_at=now,
+        ).order_by().values("user_id")
+        credited = UserModel.objects.filter(pk__in=credited_ids).update(
+            points=F("points") + bonus
+        )
+        credit_users(UserModel.objects.filter(pk__in=credited_ids), bonus)
+
+    note = badge_notification(badge)
+    insert_from(
+        Notification,
+        ["user", "title", "message", "category", "link_url", "payload", "is_read", "created_at"],
+        awards.annotate(
+            bf_title=Value(note["title"]),
+            bf_message=Value(note["message"]),
+            bf_category=Value(Notification.Category.BADGE),
+            bf_link=Value(""),
+            bf_payload=Value(note["data"], output_field=JSONField()),
+            bf_read=Value(False),
+            bf_at=Value(now, output_field=DateTimeField()),
+        ).values_list("user_id", "bf_title", "bf_message", "bf_category", "bf_link", "bf_payload", "bf_read", "bf_at"),
+    )
+    return BackfillResult(awarded, awarded, credited)
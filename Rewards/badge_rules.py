@@ -0,0 +1,168 @@
+"""
+Compiled badge rule set.
+
+Every threshold badge — the core ones plus admin-created `pickups_N` /
+`co2_N` codes — is compiled into two sorted threshold arrays held per
+process. The set is rebuilt lazily when its version stamp moves, which
+`Rewards.signals` does whenever a Badge is saved or deleted. Finding the
+badges a user qualifies for is then a bisect against their counters.
+"""
+import re
+import threading
+from bisect import bisect_right
+from decimal import Decimal
+from typing import NamedTuple, Optional, Union
+
+from django.db import connection, transaction
+
+from RecyCon.versioning import bump_version, get_version
+from .models import Badge
+
+VERSION_NAME = "rewards:badge_rules"
+
+CORE_BADGES = {
+    "first_recycler": dict(name="Eco Starter", description="First Recycler of Recyconnect",
+                           emoji="💚", rarity=Badge.Rarity.EXCLUSIVE, points_bonus=250),
+    "first_timer": dict(name="First Timer", description="Completed First Pickup",
+                        emoji="🌟", rarity=Badge.Rarity.COMMON, points_bonus=100),
+    "pickups_20": dict(name="Eco Warrior", description="Completed 20+ successful pickups",
+                       emoji="♻️", rarity=Badge.Rarity.RARE, points_bonus=300),
+    "CO2_50": dict(name="Planet Protector", description="Saved 50 KG+ CO2 Emission",
+                   emoji="🌍", rarity=Badge.Rarity.EPIC, points_bonus=500),
+}
+
+# Core codes whose rule is not spelled out in the code itself.
+_STATIC_RULES = {"first_timer": ("pickups", 1)}
+_RULE_RE = re.compile(r"^(pickups|co2)_(\d+)$", re.IGNORECASE)
+
+_lock = threading.Lock()
+_compiled = None
+_core_ensured = False
+
+
+def _mark_core_ensured(value: bool = True) -> None:
+    global _core_ensured
+    _core_ensured = value
+
+
+def ensure_core_badges() -> int:
+    """
+    Create any missing core badge; returns how many were created.
+
+    Migration 0004 seeds them, so this is a safety net: once a process has
+    seen them committed it does not look again until a core badge is deleted.
+    """
+    if _core_ensured:
+        return 0
+    existing = set(Badge.objects.filter(code__in=CORE_BADGES).values_list("code", flat=True))
+    created = 0
+    for code, defaults in CORE_BADGES.items():
+        if code not in existing:
+            created += Badge.objects.get_or_create(code=code, defaults=defaults)[1]
+    transaction.on_commit(_mark_core_ensured)
+    return created
+
+
+def core_badge_deleted() -> None:
+    _mark_core_ensured(False)
+
+
+def rule_for(code: str) -> Optional[tuple[str, int]]:
+    """("pickups" | "co2", threshold) for a threshold badge code, else None."""
+    code = (code or "").strip()
+    rule = _STATIC_RULES.get(code)
+    if rule is None:
+        m = _RULE_RE.match(code)
+        if m:
+            rule = (m.group(1).lower(), int(m.group(2)))
+    return rule
+
+
+class Progress(NamedTuple):
+    """How far a user's counter is toward one threshold badge."""
+    badge: Badge
+    counter: str                  # "pickups" or "co2"
+    current: Union[int, Decimal]
+    threshold: Union[int, Decimal]
+
+    @property
+    def percent(self) -> int:
+        if not self.threshold:
+            return 100
+        return min(100, int(self.current * 100 / self.threshold))
+
+    @property
+    def reached(self) -> bool:
+        return self.current >= self.threshold
+
+    @property
+    def remaining(self) -> Union[int, Decimal]:
+        return max(self.threshold - self.current, 0)
+
+
+class CompiledRules:
+    """Badges keyed by threshold; `*_at[i]` is the threshold of `*_badges[i]`."""
+    __slots__ = ("version", "pickups_at", "pickups_badges", "co2_at", "co2_badges", "first_recycler")
+
+    def __init__(self, version: int, badges):
+        self.version = version
+        self.first_recycler: Optional[Badge] = None
+        pickups, co2 = [], []
+        for badge in badges:
+            code = (badge.code or "").strip()
+            if code == "first_recycler":
+                self.first_recycler = badge
+                continue
+            rule = rule_for(code)
+            if rule is None:
+                continue
+            (pickups if rule[0] == "pickups" else co2).append((rule[1], badge.pk, badge))
+
+        pickups.sort(key=lambda t: t[:2])
+        co2.sort(key=lambda t: t[:2])
+        self.pickups_at = [t[0] for t in pickups]
+        self.pickups_badges = [t[2] for t in pickups]
+        self.co2_at = [Decimal(t[0]) for t in co2]
+        self.co2_badges = [t[2] for t in co2]
+
+    def progress(self, *, total_pickups: int, total_co2: Decimal) -> list[Progress]:
+        """Progress toward every threshold badge, pickups first, lowest thresholds first."""
+        pickups, co2 = int(total_pickups or 0), Decimal(total_co2 or 0)
+        return [
+            Progress(badge, "pickups", pickups, at) for at, badge in zip(self.pickups_at, self.pickups_badges)
+        ] + [
+            Progress(badge, "co2", co2, at) for at, badge in zip(self.co2_at, self.co2_badges)
+        ]
+
+    def qualifying(self, *, total_pickups: int, total_co2: Decimal) -> list[Badge]:
+        """Threshold badges reached by these counters, lowest thresholds first."""
+        return (
+            self.pickups_badges[:bisect_right(self.pickups_at, int(total_pickups or 0))]
+            + self.co2_badges[:bisect_right(self.co2_at, Decimal(total_co2 or 0))]
+        )
+
+
+def _build(version: int) -> CompiledRules:
+    badges = Badge.objects.only("id", "code", "name", "points_bonus")
+    return CompiledRules(version, list(badges))
+
+
+def compiled_rules() -> CompiledRules:
+    global _compiled
+    version = get_version(VERSION_NAME)
+    rules = _compiled
+    if rules is not None and rules.version == version:
+        return rules
+
+    with _lock:
+        rules = _compiled
+        if rules is None or rules.version != get_version(VERSION_NAME):
+            if ensure_core_badges() and connection.in_atomic_block:
+                # the new badges may still be rolled back; use them without caching
+                return _build(get_version(VERSION_NAME))
+            rules = _compiled = _build(get_version(VERSION_NAME))
+    return rules
+
+
+def invalidate_badge_rules() -> None:
+    bump_version(VERSION_NAME)
@@ -0,0 +1,53 @@
+"""
+Cached badge and reward catalogs.
+
+Both lists change a few times a month, so they are stored in the Django
+cache under a catalog version stamp that `Rewards.signals` bumps whenever a
+Badge or RewardItem is saved or deleted. Stock moves on every redemption
+without a save, so it is read fresh and laid over the cached rewards.
+"""
+from django.core.cache import cache
+
+from RecyCon.versioning import bump_version, get_version
+from .models import Badge, RewardItem
+
+VERSION_NAME = "rewards:catalog"
+CATALOG_TIMEOUT = 60 * 60 * 24
+
+
+def _cached(name: str, build):
+    key = f"rewards:catalog:{name}:v{get_version(VERSION_NAME)}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = tuple(build())
+        cache.set(key, rows, CATALOG_TIMEOUT)
+    return rows
+
+
+def badges() -> tuple[Badge, ...]:
+    """Every badge, cheapest bonus first."""
+    return _cached("badges", lambda: Badge.objects.order_by("points_bonus", "name"))
+
+
+def _rewards() -> tuple[RewardItem, ...]:
+    return _cached("rewards", lambda: RewardItem.objects.order_by("-is_active", "cost_points", "pk"))
+
+
+def rewards(*, active_only: bool = True) -> list[RewardItem]:
+    """
+    Reward items, active ones by cost (or every item, active first, for
+    admins), with `stock` refreshed by one query over the listed ids.
+    """
+    items = [r for r in _rewards() if r.is_active or not active_only]
+    if active_only:
+        items.sort(key=lambda r: r.cost_points)
+    stock = dict(
+        RewardItem.objects.filter(pk__in=[r.pk for r in items]).order_by().values_list("id", "stock")
+    )
+    for item in items:
+        item.stock = stock.get(item.pk, item.stock)
+    return items
+
+
+def invalidate_catalog() -> None:
+    bump_version(VERSION_NAME)
@@ -0,0 +1,102 @@
+"""
+Expiring points that were earned too long ago and never spent.
+
+Points are spent oldest first, so a user's expired amount is what they
+earned before the cutoff minus everything already debited (redemptions,
+negative adjustments and earlier expiries), capped at their balance. Users
+with a balance are walked in primary key order, `batch_size` at a time; each
+batch is one grouped SUM over their ledger rows followed by a short
+transaction that posts one expiry entry per user, re-projects their totals
+and adds one summary notification each. Expiry entries do not touch the
+leaderboards: spent or expired, earned points stay earned.
+"""
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from Notifications.models import Notification
+from .ledger import post_entries
+from .models import PointsLedger
+
+UserModel = get_user_model()
+
+
+class ExpiryBatch(NamedTuple):
+    checked: int                 # users with a balance in this batch
+    expired: dict[int, int]      # user id -> points expired
+
+
+def expiry_key(cutoff: datetime, user_id: int) -> str:
+    return f"expiry:{cutoff:%Y-%m-%d}:{user_id}"
+
+
+def _due(user_ids: list[int], cutoff: datetime) -> dict[int, int]:
+    rows = (
+        PointsLedger.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .values("user_id")
+        .annotate(
+            old=Sum("points", filter=Q(points__gt=0, created_at__lt=cutoff)),
+            debited=Sum("points", filter=Q(points__lt=0)),
+            balance=Sum("points"),
+        )
+        .values_list("user_id", "old", "debited", "balance")
+    )
+    due = {}
+    for uid, old, debited, balance in rows:
+        amount = min((old or 0) + (debited or 0), balance or 0)
+        if amount > 0:
+            due[uid] = amount
+    return due
+
+
+def _expire(due: dict[int, int], cutoff: datetime, days: int) -> None:
+    with transaction.atomic():
+        posted = post_entries(
+            PointsLedger(user_id=uid, key=expiry_key(cutoff, uid), reason=PointsLedger.Reason.EXPIRY,
+                         points=-amount)
+            for uid, amount in due.items()
+        )
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=e.user_id,
+                category=Notification.Category.POINTS,
+                title="⏳ Points Expired",
+                message=f"{-e.points} points earned more than {days} days ago expired unused.",
+                payload={"points_expired": -e.points, "cutoff": cutoff.date().isoformat()},
+            )
+            for e in posted
+        ])
+
+
+def expire_points(
+    *, days: Optional[int] = None, batch_size: int = 1000, dry_run: bool = False
+) -> Iterator[ExpiryBatch]:
+    """
+    Expire points earned more than `days` (default REWARDS_POINTS_EXPIRY_DAYS)
+    ago, batch by batch, yielding each batch's outcome. Does nothing when
+    expiry is switched off.
+    """
+    days = days if days is not None else getattr(settings, "REWARDS_POINTS_EXPIRY_DAYS", None)
+    if not days:
+        return
+    cutoff = timezone.now() - timedelta(days=days)
+
+    last = 0
+    while True:
+        user_ids = list(
+            UserModel.objects.filter(pk__gt=last, points__gt=0).order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return
+        due = _due(user_ids, cutoff)
+        if due and not dry_run:
+            _expire(due, cutoff, days)
+        yield ExpiryBatch(len(user_ids), due)
+        last = user_ids[-1]
@@ -0,0 +1,68 @@
+"""
+Redemption fulfilment: pending -> packed -> shipped, or cancelled before
+shipping.
+
+Every transition is one conditional UPDATE over the selected redemptions;
+rows not in an allowed source state are left alone, so a stale admin page or
+two admins acting at once cannot move a redemption backwards. Cancelling also
+refunds the points through the ledger and puts the stock back, all in the
+same transaction.
+"""
+from collections import Counter
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .ledger import post_entries
+from .models import PointsLedger, Redemption, RewardItem
+
+Status = Redemption.Status
+
+# target status -> statuses it may be reached from
+TRANSITIONS = {
+    Status.PACKED: {Status.PENDING},
+    Status.SHIPPED: {Status.PACKED},
+    Status.CANCELLED: {Status.PENDING, Status.PACKED},
+}
+
+
+def refund_key(redemption_id: int) -> str:
+    return f"refund:{redemption_id}"
+
+
+@transaction.atomic
+def transition(redemption_ids: Iterable[int], status: str) -> int:
+    """Move the given redemptions to `status`; returns how many moved."""
+    if status not in TRANSITIONS:
+        raise ValueError(f"unknown redemption status {status!r}")
+    ids = set(redemption_ids)
+    if not ids:
+        return 0
+
+    # the run's timestamp tells the rows this UPDATE moved from rows that
+    # were already in `status`
+    now = timezone.now()
+    moved = Redemption.objects.filter(pk__in=ids, status__in=TRANSITIONS[status]).update(
+        status=status, status_changed_at=now
+    )
+    if moved and status == Status.CANCELLED:
+        _refund(Redemption.objects.filter(pk__in=ids, status=status, status_changed_at=now))
+    return moved
+
+
+def _refund(cancelled) -> None:
+    rows = list(cancelled.values_list("pk", "user_id", "reward_id", "points_spent"))
+    post_entries(
+        PointsLedger(user_id=uid, key=refund_key(pk), reason=PointsLedger.Reason.REFUND, points=spent)
+        for pk, uid, _, spent in rows
+    )
+    per_reward = Counter(reward_id for _, _, reward_id, _ in rows)
+    # unlimited (NULL) stock stays NULL
+    RewardItem.objects.filter(pk__in=per_reward, stock__isnull=False).update(
+        stock=F("stock") + Case(
+            *(When(pk=reward_id, then=Value(n)) for reward_id, n in per_reward.items()),
+            default=Value(0), output_field=IntegerField(),
+        )
+    )
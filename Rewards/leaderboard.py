@@ -0,0 +1,241 @@
+"""
+Period-aware leaderboards materialised in LeaderboardEntry.
+
+`record_entries` is called by `Rewards.ledger.post_entries` and adds the
+points each user earned to this week's, this month's and the all-time board
+with one grouped UPDATE per board. Top-N lists are cached in the Django
+cache under a per-period version stamp. "Your rank" counts the entries
+above yours on the `leaderboard_role_rank` index, so it costs the same
+however large the board grows. Each entry carries its user's role, which
+`Rewards.signals` rewrites when the role changes; `prune_past_periods`
+drops weekly and monthly rows once their period is over.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, QuerySet, Sum, Value, When
+from django.utils import timezone
+
+from RecyCon.bulk import insert_from
+from RecyCon.versioning import bump_version, get_version
+from .models import LeaderboardEntry, PointsLedger
+
+UserModel = get_user_model()
+
+Period = LeaderboardEntry.Period
+ALL_TIME_START = date(1970, 1, 1)
+UPDATE_CHUNK = 500
+
+# Reasons that count as earning points; opening balances only count all-time.
+_EARNING = {PointsLedger.Reason.PICKUP, PointsLedger.Reason.BADGE, PointsLedger.Reason.ADJUSTMENT}
+_ALL_TIME_ONLY = {PointsLedger.Reason.OPENING}
+
+
+def period_start(period: str, day: Optional[date] = None) -> date:
+    day = day or timezone.localdate()
+    if period == Period.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == Period.MONTH:
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _version_name(period: str) -> str:
+    return f"rewards:leaderboard:{period}"
+
+
+def _invalidate(period: str) -> None:
+    bump_version(_version_name(period))
+
+
+def record_entries(entries: Iterable[PointsLedger]) -> int:
+    """Add the points earned by freshly posted ledger `entries` to the current boards."""
+    today = timezone.localdate()
+    deltas: dict[tuple[str, int], int] = defaultdict(int)
+    for entry in entries:
+        if not entry.points:
+            continue
+        if entry.reason in _EARNING:
+            periods = Period.values
+        elif entry.reason in _ALL_TIME_ONLY:
+            periods = [Period.ALL]
+        else:
+            continue
+        for period in periods:
+            deltas[(period, entry.user_id)] += entry.points
+    if not deltas:
+        return 0
+
+    roles = dict(
+        UserModel.objects.filter(pk__in={uid for _, uid in deltas}).values_list("id", "role")
+    )
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(period=p, period_start=period_start(p, today), user_id=uid, role=roles.get(uid, ""))
+            for p, uid in deltas
+        ],
+        ignore_conflicts=True,
+    )
+
+    by_period: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    for (period, uid), points in deltas.items():
+        by_period[period].append((uid, points))
+    for period, rows in by_period.items():
+        start = period_start(period, today)
+        for i in range(0, len(rows), UPDATE_CHUNK):
+            chunk = rows[i:i + UPDATE_CHUNK]
+            LeaderboardEntry.objects.filter(
+                period=period, period_start=start, user_id__in=[uid for uid, _ in chunk]
+            ).update(points=F("points") + Case(
+                *[When(user_id=uid, then=Value(points)) for uid, points in chunk],
+                default=Value(0), output_field=IntegerField(),
+            ))
+        _invalidate(period)
+    return len(deltas)
+
+
+def credit_users(users: QuerySet, points: int) -> None:
+    """
+    Add the same earned `points` to every user in `users` (a User queryset)
+    on each current board, with one INSERT ... SELECT and one UPDATE per board.
+    """
+    if not points:
+        return
+    today = timezone.localdate()
+    for period in Period.values:
+        start = period_start(period, today)
+        insert_from(
+            LeaderboardEntry,
+            ["period", "period_start", "role", "user", "points"],
+            users.order_by().annotate(
+                lb_period=Value(period),
+                lb_start=Value(start),
+                lb_points=Value(0),
+            ).values_list("lb_period", "lb_start", "role", "id", "lb_points"),
+            ignore_conflicts=True,
+        )
+        LeaderboardEntry.objects.filter(
+            period=period, period_start=start, user_id__in=users.order_by().values("id")
+        ).update(points=F("points") + points)
+        _invalidate(period)
+
+
+class Standing(NamedTuple):
+    name: str
+    email: str
+    role: str
+    points: int
+
+
+def top(period: str = Period.ALL, role: Optional[str] = None, n: Optional[int] = None) -> list[Standing]:
+    """The `n` highest scorers on a board; all roles when `role` is None."""
+    n = n or getattr(settings, "REWARDS_LEADERBOARD_SIZE", 100)
+    start = period_start(period)
+    key = f"rewards:leaderboard:{period}:{start}:{role or '*'}:{n}:v{get_version(_version_name(period))}"
+    rows = cache.get(key)
+    if rows is None:
+        qs = LeaderboardEntry.objects.filter(period=period, period_start=start, points__gt=0)
+        if role:
+            qs = qs.filter(role=role)
+        rows = [
+            tuple(r) for r in
+            qs.order_by("-points", "user_id").values_list("user__name", "user__email", "role", "points")[:n]
+        ]
+        cache.set(key, rows, getattr(settings, "REWARDS_LEADERBOARD_CACHE_SECONDS", 300))
+    return [Standing(*r) for r in rows]
+
+
+class Rank(NamedTuple):
+    rank: Optional[int]   # None when the user has earned nothing this period
+    points: int
+    of: int
+
+
+def _board_size(period: str, start: date, role: str) -> int:
+    key = f"rewards:leaderboard:{period}:{start}:{role}:size:v{get_version(_version_name(period))}"
+    return cache.get_or_set(
+        key,
+        lambda: LeaderboardEntry.objects.filter(
+            period=period, period_start=start, role=role, points__gt=0
+        ).count(),
+        getattr(settings, "REWARDS_LEADERBOARD_CACHE_SECONDS", 300),
+    )
+
+
+def rank_of(user, period: str = Period.ALL) -> Rank:
+    """`user`'s 1-based rank among their role on a board."""
+    start = period_start(period)
+    board = LeaderboardEntry.objects.filter(period=period, period_start=start, role=user.role)
+    mine = board.filter(user_id=user.pk).values_list("points", flat=True).first() or 0
+    of = _board_size(period, start, user.role)
+    if mine <= 0:
+        return Rank(None, 0, of)
+    above = board.filter(points__gt=mine).count()
+    return Rank(above + 1, mine, max(of, above + 1))
+
+
+def set_role(user_id: int, role: str) -> int:
+    """Move `user_id`'s entries on every board to `role`; returns rows changed."""
+    changed = LeaderboardEntry.objects.filter(user_id=user_id).exclude(role=role).update(role=role)
+    if changed:
+        for period in Period.values:
+            _invalidate(period)
+    return changed
+
+
+def prune_past_periods(*, keep: Optional[int] = None, batch_size: int = 5000) -> Iterator[int]:
+    """
+    Delete weekly and monthly rows older than the current period and the
+    `keep` (default REWARDS_LEADERBOARD_KEEP_PERIODS) periods before it, in
+    primary key batches. Yields rows deleted per batch.
+    """
+    keep = keep if keep is not None else getattr(settings, "REWARDS_LEADERBOARD_KEEP_PERIODS", 1)
+    today = timezone.localdate()
+    week = period_start(Period.WEEK, today) - timedelta(weeks=keep)
+    month = period_start(Period.MONTH, today)
+    for _ in range(keep):
+        month = period_start(Period.MONTH, month - timedelta(days=1))
+    past = LeaderboardEntry.objects.filter(
+        Q(period=Period.WEEK, period_start__lt=week) | Q(period=Period.MONTH, period_start__lt=month)
+    )
+    while True:
+        ids = list(past.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        yield LeaderboardEntry.objects.filter(pk__in=ids).delete()[0]
+
+
+@transaction.atomic
+def rebuild_current_boards() -> int:
+    """Recompute this week's, this month's and the all-time board from the ledger."""
+    today = timezone.localdate()
+    created = 0
+    for period in Period.values:
+        start = period_start(period, today)
+        earning = Q(reason__in=_EARNING)
+        if period == Period.ALL:
+            earning |= Q(reason__in=_ALL_TIME_ONLY)
+        else:
+            earning &= Q(created_at__date__gte=start)
+        totals = (
+            PointsLedger.objects.filter(earning)
+            .values("user_id", "user__role")
+            .annotate(total=Sum("points"))
+            .exclude(total=0)
+            .order_by()
+        )
+        LeaderboardEntry.objects.filter(period=period, period_start=start).delete()
+        created += len(LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(
+                period=period, period_start=start, user_id=row["user_id"],
+                role=row["user__role"], points=row["total"],
+            )
+            for row in totals.iterator()
+        ))
+        _invalidate(period)
+    return created
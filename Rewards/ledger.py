@@ -0,0 +1,126 @@
+"""
+Posting to the points ledger and projecting it onto User totals.
+
+Callers build unsaved PointsLedger rows with a deterministic `key` and hand
+them to `post_entries`; rows whose key is already in the ledger are dropped,
+so retries and duplicate signals cost one indexed lookup and change nothing.
+"""
+from decimal import Decimal
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .leaderboard import record_entries
+from .models import PointsLedger
+
+UserModel = get_user_model()
+
+
+def pickup_key(job_id: int, party: str) -> str:
+    """Ledger key for one party's credit on a completed pickup ("requester"/"collector")."""
+    return f"pickup:{job_id}:{party}"
+
+
+def badge_key(badge_id: int, user_id: int) -> str:
+    return f"badge:{badge_id}:{user_id}"
+
+
+def posted_keys(keys: Iterable[str]) -> set[str]:
+    keys = list(keys)
+    if not keys:
+        return set()
+    return set(PointsLedger.objects.filter(key__in=keys).values_list("key", flat=True))
+
+
+def _total(field: str, output_field):
+    per_user = (
+        PointsLedger.objects.filter(user_id=OuterRef("pk"))
+        .order_by()
+        .values("user_id")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(Subquery(per_user, output_field=output_field), Value(0), output_field=output_field)
+
+
+def _projection() -> dict:
+    return {
+        "points": _total("points", IntegerField()),
+        "total_co2_saved_kg": _total("co2_kg", DecimalField(max_digits=12, decimal_places=3)),
+        "total_pickups": _total("pickups", IntegerField()),
+    }
+
+
+def refresh_totals(user_ids: Iterable[int]) -> int:
+    """Recompute the cached totals of `user_ids` from their ledger rows."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    return UserModel.objects.filter(pk__in=user_ids).update(**_projection())
+
+
+def rebuild_all_totals() -> int:
+    """Recompute every user's cached totals in one UPDATE."""
+    return UserModel.objects.update(**_projection())
+
+
+def _insert(entries: list[PointsLedger]) -> list[PointsLedger]:
+    """
+    INSERT `entries` and return the ones this call wrote. One statement
+    normally; only when a racing writer got a key in first (the unique index
+    rejects the batch) are the rows retried one savepoint each, so the
+    caller knows exactly which keys are its own.
+    """
+    try:
+        with transaction.atomic():
+            return PointsLedger.objects.bulk_create(entries)
+    except IntegrityError:
+        pass
+    inserted = []
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                entry.save(force_insert=True)
+        except IntegrityError:
+            continue
+        inserted.append(entry)
+    return inserted
+
+
+@transaction.atomic
+def post_entries(entries: Iterable[PointsLedger]) -> list[PointsLedger]:
+    """
+    Append `entries` whose key is not in the ledger yet, refresh the
+    affected users' totals and credit their leaderboard standings. Returns
+    the entries this call inserted; a key a concurrent post wrote first is
+    left out, so each event is credited to the boards exactly once.
+    """
+    fresh: dict[str, PointsLedger] = {}
+    for entry in entries:
+        fresh.setdefault(entry.key, entry)
+    for key in posted_keys(fresh):
+        del fresh[key]
+    if not fresh:
+        return []
+
+    inserted = _insert(list(fresh.values()))
+    if not inserted:
+        return []
+    refresh_totals(e.user_id for e in inserted)
+    record_entries(inserted)
+    return inserted
+
+
+def entry_for_activity(*, user_id: int, key: str, co2: Decimal) -> PointsLedger:
+    """Ledger row for one recycling activity: 2 points per whole kg of CO2 saved."""
+    return PointsLedger(
+        user_id=user_id,
+        key=key,
+        reason=PointsLedger.Reason.PICKUP,
+        points=int(co2) * 2,
+        co2_kg=co2,
+        pickups=1,
+    )
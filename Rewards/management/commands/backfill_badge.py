@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Rewards.backfill import backfill_badge
+from Rewards.badge_rules import rule_for
+from Rewards.models import Badge
+
+
+class Command(BaseCommand):
+    help = (
+        "Award threshold badges (pickups_N / co2_N) to every user whose counters already "
+        "reach them, with set-based INSERT ... SELECT statements."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--code", action="append", help="Badge code; repeat for several.")
+        target.add_argument("--all", action="store_true", help="Every threshold badge.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many users qualify.")
+
+    def handle(self, *args, code=None, all=False, dry_run=False, **opts):
+        if all:
+            badges = [b for b in Badge.objects.order_by("code") if rule_for(b.code)]
+        else:
+            badges = list(Badge.objects.filter(code__in=code).order_by("code"))
+            missing = set(code) - {b.code for b in badges}
+            if missing:
+                raise CommandError(f"unknown badge code(s): {', '.join(sorted(missing))}")
+            not_threshold = [b.code for b in badges if not rule_for(b.code)]
+            if not_threshold:
+                raise CommandError(f"not a threshold badge: {', '.join(not_threshold)}")
+
+        for badge in badges:
+            start = time.perf_counter()
+            result = backfill_badge(badge, dry_run=dry_run)
+            elapsed = (time.perf_counter() - start) * 1000
+            if dry_run:
+                self.stdout.write(f"{badge.code}: {result.qualifying} user(s) would qualify ({elapsed:.0f} ms)")
+            else:
+                self.stdout.write(
+                    f"{badge.code}: awarded to {result.awarded} user(s), "
+                    f"+{badge.points_bonus} pts credited to {result.credited} ({elapsed:.0f} ms)"
+                )
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Rewards.services import run_pending_badge_checks
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate badges for users queued by recent activity. Everything queued "
+        "within one window is evaluated together, each user once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--window", type=float, default=None,
+                            help="Seconds between drains (default REWARDS_BADGE_WINDOW_SECONDS).")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain what is queued now, then exit.")
+
+    def handle(self, *args, **opts):
+        window = opts["window"]
+        if window is None:
+            window = getattr(settings, "REWARDS_BADGE_WINDOW_SECONDS", 2)
+        verbosity = opts["verbosity"]
+        total = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                evaluated = run_pending_badge_checks(batch_size=opts["batch_size"])
+                total += evaluated
+                if evaluated and verbosity > 1:
+                    ms = (time.perf_counter() - start) * 1000
+                    self.stdout.write(f"evaluated {evaluated} user(s) in {ms:.0f} ms")
+                if opts["once"]:
+                    break
+                time.sleep(window)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"evaluated badges for {total} user(s)"))
@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from RecyCon.bench import bench_fixtures, percentile
+from Rewards.ledger import refresh_totals
+from Rewards.models import PointsLedger, Redemption, RewardItem
+
+UserModel = get_user_model()
+
+EMAIL_DOMAIN = "redeem.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Flash-drop benchmark: many users redeem one limited-stock reward at "
+        "once. Fails unless exactly `stock` redemptions succeed and no balance "
+        "goes negative. Fixture rows are committed (threads need their own "
+        "connections) and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--redeemers", type=int, default=2000)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--threads", type=int, default=64)
+        parser.add_argument("--cost", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        n, stock, cost = opts["redeemers"], opts["stock"], opts["cost"]
+        if n < 1 or stock < 0:
+            raise CommandError("Need at least one redeemer and a non-negative stock.")
+
+        with bench_fixtures(EMAIL_DOMAIN) as fx:
+            fx.create_users(fx.user(f"redeemer-{i}", "household") for i in range(n))
+            reward = RewardItem.objects.create(title="Flash drop", cost_points=cost, stock=stock, is_active=True)
+            fx.on_exit(reward.delete)
+            fx.on_exit(Redemption.objects.filter(reward=reward).delete)
+            user_ids = list(fx.users.values_list("id", flat=True))
+            # every redeemer can afford exactly one
+            PointsLedger.objects.bulk_create([
+                PointsLedger(user_id=uid, key=f"bench-redeem:{uid}", reason=PointsLedger.Reason.ADJUSTMENT, points=cost)
+                for uid in user_ids
+            ])
+            refresh_totals(user_ids)
+            self._flash_drop(user_ids, reward, opts["threads"])
+            self._verify(fx.users, reward, stock, cost)
+
+    def _flash_drop(self, user_ids, reward, threads):
+        outcomes = {"won": 0, "sold_out": 0, "refused": 0, "db_error": 0}
+        latencies = []
+        lock = threading.Lock()
+        start_gate = threading.Event()
+
+        def redeem(uid):
+            start_gate.wait()
+            start = time.perf_counter()
+            try:
+                Redemption.redeem(user=UserModel(pk=uid), reward=reward)
+                outcome = "won"
+            except ValidationError as exc:
+                outcome = "sold_out" if "stock" in exc.message else "refused"
+            except OperationalError:
+                outcome = "db_error"
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(elapsed)
+
+        def run(uid):
+            try:
+                redeem(uid)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            wall = time.perf_counter()
+            futures = [pool.submit(run, uid) for uid in user_ids]
+            start_gate.set()
+            for f in futures:
+                f.result()
+            wall = time.perf_counter() - wall
+
+        latencies.sort()
+        self.stdout.write(f"attempts      : {len(user_ids)} in {wall:.2f} s ({len(user_ids) / wall:.0f}/s)")
+        self.stdout.write(
+            f"outcomes      : {outcomes['won']} redeemed, {outcomes['sold_out']} sold out, "
+            f"{outcomes['refused']} refused, {outcomes['db_error']} db errors"
+        )
+        self.stdout.write(
+            f"latency ms    : p50={percentile(latencies, 50):.1f} "
+            f"p99={percentile(latencies, 99):.1f} max={latencies[-1]:.1f}"
+        )
+
+    def _verify(self, fixtures, reward, stock, cost):
+        reward.refresh_from_db()
+        sold = Redemption.objects.filter(reward=reward).count()
+        negative = fixtures.filter(points__lt=0).count()
+        spent = fixtures.filter(points=0).count()
+        if reward.stock < 0 or sold > stock:
+            raise CommandError(f"Oversold: {sold} redemptions for {stock} stock (stock now {reward.stock}).")
+        if sold != stock - reward.stock or spent != sold or negative:
+            raise CommandError(
+                f"Inconsistent: {sold} redemptions, stock {reward.stock}, "
+                f"{spent} spent balances, {negative} negative balances."
+            )
+        self.stdout.write(self.style.SUCCESS(f"OK: {sold} of {stock} sold, no oversell, no negative balance."))
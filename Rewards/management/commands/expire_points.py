@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Rewards.expiry import expire_points
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire unspent points earned more than REWARDS_POINTS_EXPIRY_DAYS ago, walking users "
+        "with a balance in keyset batches. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Override REWARDS_POINTS_EXPIRY_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would expire.")
+
+    def handle(self, *args, days=None, batch_size=1000, dry_run=False, **opts):
+        days = days if days is not None else getattr(settings, "REWARDS_POINTS_EXPIRY_DAYS", None)
+        if not days:
+            self.stdout.write("points expiry is switched off")
+            return
+
+        start = time.perf_counter()
+        checked = users = points = 0
+        for batch in expire_points(days=days, batch_size=batch_size, dry_run=dry_run):
+            checked += batch.checked
+            users += len(batch.expired)
+            points += sum(batch.expired.values())
+        elapsed = time.perf_counter() - start
+        verb = "would expire" if dry_run else "expired"
+        self.stdout.write(
+            f"checked {checked} user(s) in {elapsed:.1f} s; {verb} {points} point(s) from {users} user(s)"
+        )
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Rewards.leaderboard import prune_past_periods
+
+
+class Command(BaseCommand):
+    help = "Delete weekly and monthly leaderboard rows of finished periods, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=None,
+                            help="Finished periods to keep (default REWARDS_LEADERBOARD_KEEP_PERIODS).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, keep=None, batch_size=5000, **opts):
+        start = time.perf_counter()
+        rows = batches = 0
+        for n in prune_past_periods(keep=keep, batch_size=batch_size):
+            rows += n
+            batches += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"pruned {rows} leaderboard row(s) in {batches} batch(es), {elapsed:.2f}s")
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Rewards.areas import rebuild_area_stats
+
+
+class Command(BaseCommand):
+    help = "Regenerate the monthly per-area recycling totals from Activity with one grouped query."
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        rows = rebuild_area_stats()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"rebuilt {rows} area-month row(s) in {elapsed * 1000:.0f} ms")
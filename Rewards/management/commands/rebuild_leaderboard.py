@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Rewards.leaderboard import rebuild_current_boards
+
+
+class Command(BaseCommand):
+    help = "Recompute this week's, this month's and the all-time leaderboards from the points ledger."
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        rows = rebuild_current_boards()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"rebuilt {rows} leaderboard row(s) in {elapsed * 1000:.0f} ms")
@@ -0,0 +1,24 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from Rewards.ledger import rebuild_all_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's points, CO2 and pickup totals from the points ledger in one UPDATE."
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        before = dict(User.objects.values_list("id", "points"))
+
+        start = time.perf_counter()
+        updated = rebuild_all_totals()
+        elapsed = time.perf_counter() - start
+
+        after = dict(User.objects.values_list("id", "points"))
+        changed = sum(1 for uid, pts in after.items() if before.get(uid) != pts)
+        self.stdout.write(
+            f"rebuilt {updated} user(s) in {elapsed * 1000:.0f} ms; points changed for {changed}"
+        )
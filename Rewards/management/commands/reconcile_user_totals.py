@@ -0,0 +1,51 @@
+import csv
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from Rewards.reconcile import FIELDS, drift_batches, fix_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every user's points, CO2 and pickup totals with the points ledger, and the ledger "
+        "with the activities, pickups, badges and redemptions it credits, in keyset batches. Writes "
+        "the drifted users as CSV; --fix re-projects stored totals from the ledger (ledger vs "
+        "source differences are reported only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--report", default="-", help="CSV path for the drift report; '-' for stdout.")
+        parser.add_argument("--fix", action="store_true", help="Rewrite drifted totals from the ledger.")
+
+    def handle(self, *args, batch_size=5000, report="-", fix=False, **opts):
+        target = nullcontext(self.stdout) if report == "-" else open(report, "w", newline="", encoding="utf-8")
+        with target as out:
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(
+                ["user_id", "fields"]
+                + [f"{f}_{side}" for f in FIELDS for side in ("stored", "ledger", "source")]
+                + ["activities", "completed_pickups"]
+            )
+
+            start = time.perf_counter()
+            checked = drifted = fixed = 0
+            for count, batch in drift_batches(batch_size):
+                checked += count
+                drifted += len(batch)
+                for d in batch:
+                    writer.writerow(
+                        [d.user_id, " ".join(d.fields() + d.source_fields())]
+                        + [v for triple in zip(d.stored, d.expected, d.source) for v in triple]
+                        + [d.activities, d.jobs]
+                    )
+                if fix and batch:
+                    fixed += fix_batch(batch)
+            elapsed = time.perf_counter() - start
+
+        self.stderr.write(
+            f"checked {checked} user(s) in {elapsed:.1f} s; {drifted} drifted"
+            + (f", {fixed} fixed" if fix else "")
+        )
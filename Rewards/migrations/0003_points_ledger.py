@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    """One opening entry per user so the ledger projects today's totals exactly."""
+    User = apps.get_model("User", "User")
+    PointsLedger = apps.get_model("Rewards", "PointsLedger")
+    rows = (
+        User.objects.exclude(points=0, total_co2_saved_kg=0, total_pickups=0)
+        .values_list("id", "points", "total_co2_saved_kg", "total_pickups")
+    )
+    PointsLedger.objects.bulk_create(
+        [
+            PointsLedger(
+                user_id=uid, key=f"opening:{uid}", reason="opening",
+                points=points, co2_kg=co2, pickups=pickups,
+            )
+            for uid, points, co2, pickups in rows.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0002_activity_badge_redemption_rewarditem_userbadge_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('User', '0010_user_latitude_longitude'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('reason', models.CharField(choices=[('opening', 'Opening balance'), ('pickup', 'Pickup'), ('badge', 'Badge bonus'), ('redemption', 'Redemption'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('points', models.IntegerField(default=0)),
+                ('co2_kg', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('pickups', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['user', 'points', 'co2_kg', 'pickups'], name='ledger_user_totals'), models.Index(fields=['user', 'created_at'], name='Rewards_poi_user_id_e9d6ea_idx')],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Frozen copy of Rewards.badge_rules.CORE_BADGES at the time of this migration.
+CORE_BADGES = {
+    "first_recycler": dict(name="Eco Starter", description="First Recycler of Recyconnect",
+                           emoji="💚", rarity="Exclusive", points_bonus=250),
+    "first_timer": dict(name="First Timer", description="Completed First Pickup",
+                        emoji="🌟", rarity="Common", points_bonus=100),
+    "pickups_20": dict(name="Eco Warrior", description="Completed 20+ successful pickups",
+                       emoji="♻️", rarity="Rare", points_bonus=300),
+    "CO2_50": dict(name="Planet Protector", description="Saved 50 KG+ CO2 Emission",
+                   emoji="🌍", rarity="Epic", points_bonus=500),
+}
+
+
+def seed_core_badges(apps, schema_editor):
+    Badge = apps.get_model("Rewards", "Badge")
+    existing_codes = set(Badge.objects.values_list("code", flat=True))
+    existing_names = set(Badge.objects.values_list("name", flat=True))
+    Badge.objects.bulk_create([
+        Badge(code=code, **defaults)
+        for code, defaults in CORE_BADGES.items()
+        if code not in existing_codes and defaults["name"] not in existing_names
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0003_points_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_core_badges, migrations.RunPython.noop),
+    ]
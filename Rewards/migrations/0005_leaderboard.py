@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:49
+
+import django.db.models.deletion
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def fill_current_boards(apps, schema_editor):
+    """Seed this week's, this month's and the all-time board from the ledger."""
+    PointsLedger = apps.get_model("Rewards", "PointsLedger")
+    LeaderboardEntry = apps.get_model("Rewards", "LeaderboardEntry")
+    today = timezone.localdate()
+    boards = {
+        "week": (today - timedelta(days=today.weekday()), ["pickup", "badge", "adjustment"]),
+        "month": (today.replace(day=1), ["pickup", "badge", "adjustment"]),
+        "all": (date(1970, 1, 1), ["opening", "pickup", "badge", "adjustment"]),
+    }
+    for period, (start, reasons) in boards.items():
+        totals = (
+            PointsLedger.objects.filter(reason__in=reasons, created_at__date__gte=start)
+            .values("user_id", "user__role")
+            .annotate(total=Sum("points"))
+            .exclude(total=0)
+            .order_by()
+        )
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(
+                    period=period, period_start=start, user_id=row["user_id"],
+                    role=row["user__role"], points=row["total"],
+                )
+                for row in totals.iterator()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0004_seed_core_badges'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'This week'), ('month', 'This month'), ('all', 'All time')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('role', models.CharField(max_length=20)),
+                ('points', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start', 'role', '-points'], name='leaderboard_role_rank'), models.Index(fields=['period', 'period_start', '-points'], name='leaderboard_rank')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'user'), name='leaderboard_unique_user')],
+            },
+        ),
+        migrations.RunPython(fill_current_boards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0005_leaderboard'),
+        ('User', '0010_user_latitude_longitude'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingBadgeCheck',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('queued_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
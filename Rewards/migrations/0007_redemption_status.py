@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def close_existing_redemptions(apps, schema_editor):
+    # redemptions made before fulfilment was tracked were handled by hand;
+    # leaving them pending would let an admin cancel (and refund) them now
+    Redemption = apps.get_model("Rewards", "Redemption")
+    Redemption.objects.update(status="shipped", status_changed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0006_pending_badge_check'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='redemption',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('packed', 'Packed'), ('shipped', 'Shipped'), ('cancelled', 'Cancelled')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='redemption',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(close_existing_redemptions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pointsledger',
+            name='reason',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('pickup', 'Pickup'), ('badge', 'Badge bonus'), ('redemption', 'Redemption'), ('adjustment', 'Adjustment'), ('refund', 'Refund')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='redemption',
+            index=models.Index(fields=['status', 'created_at'], name='redemption_queue'),
+        ),
+    ]
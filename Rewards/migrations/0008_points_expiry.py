@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0007_redemption_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pointsledger',
+            name='reason',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('pickup', 'Pickup'), ('badge', 'Badge bonus'), ('redemption', 'Redemption'), ('adjustment', 'Adjustment'), ('refund', 'Refund'), ('expiry', 'Expiry')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:21
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Rewards', '0008_points_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.CharField(max_length=50)),
+                ('month', models.DateField()),
+                ('weight_kg', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('co2_kg', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('activities', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'area'), name='areastat_unique_month_area')],
+            },
+        ),
+    ]
@@ -52,21 +52,119 @@ class Activity(models.Model):
         "e_waste": Decimal("5.0"),
     }
 
-    def _factor_for_kind(self) -> Decimal:
-        kind_key = str(self.product.kind)
-        return self.CO2_PER_KG.get(kind_key, Decimal("0.0"))
+    @classmethod
+    def co2_for(cls, kind, weight_kg) -> Decimal:
+        """CO2 saved by recycling `weight_kg` of `kind`, to the gram."""
+        factor = cls.CO2_PER_KG.get(str(kind), Decimal("0.0"))
+        return (Decimal(weight_kg) * factor).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
 
     def save(self, *args, **kwargs):
         if not self.co2_saved_kg or self.co2_saved_kg == Decimal("0.000"):
-            factor = self._factor_for_kind()
-            self.co2_saved_kg = (Decimal(self.weight_kg) * factor).quantize(
-                Decimal("0.001"), rounding=ROUND_HALF_UP
-            )
+            self.co2_saved_kg = self.co2_for(self.product.kind, self.weight_kg)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user_id} {self.weight_kg}kg {getattr(self.product, 'kind', '-')}"
 
+class PointsLedger(models.Model):
+    """
+    Append-only record of every change to a user's points, CO2 and pickup
+    totals. `key` names the event that caused it (e.g. "pickup:42:requester",
+    "badge:3:17", "redemption:9"), so posting the same event twice is a no-op.
+    The totals on User are a projection of these rows.
+    """
+    class Reason(models.TextChoices):
+        OPENING    = "opening",    "Opening balance"
+        PICKUP     = "pickup",     "Pickup"
+        BADGE      = "badge",      "Badge bonus"
+        REDEMPTION = "redemption", "Redemption"
+        ADJUSTMENT = "adjustment", "Adjustment"
+        REFUND     = "refund",     "Refund"
+        EXPIRY     = "expiry",     "Expiry"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+    )
+    key = models.CharField(max_length=100, unique=True)
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+
+    points = models.IntegerField(default=0)
+    co2_kg = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal("0.000"))
+    pickups = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            # lets the per-user SUMs read only the index
+            models.Index(fields=["user", "points", "co2_kg", "pickups"], name="ledger_user_totals"),
+            models.Index(fields=["user", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.points:+d} pts"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Points earned by one user in one leaderboard period, kept current by
+    `Rewards.leaderboard` as ledger entries are posted. Spending points does
+    not lower a standing. `period_start` is the Monday of the week, the first
+    of the month, or `ALL_TIME_START` for the all-time board.
+    """
+    class Period(models.TextChoices):
+        WEEK  = "week",  "This week"
+        MONTH = "month", "This month"
+        ALL   = "all",   "All time"
+
+    period = models.CharField(max_length=5, choices=Period.choices)
+    period_start = models.DateField()
+    role = models.CharField(max_length=20)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries",
+    )
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "period_start", "user"], name="leaderboard_unique_user"),
+        ]
+        indexes = [
+            # top-N and rank lookups read one board in points order from these
+            models.Index(fields=["period", "period_start", "role", "-points"], name="leaderboard_role_rank"),
+            models.Index(fields=["period", "period_start", "-points"], name="leaderboard_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.period}@{self.period_start} {self.user_id}: {self.points}"
+
+
+class AreaStat(models.Model):
+    """
+    Kilograms and CO2 recycled in one area in one calendar month, bumped by
+    `Rewards.areas.record_activities` in the transaction that logs the
+    activities. `month` is the first day of the month.
+    """
+    area = models.CharField(max_length=50)
+    month = models.DateField()
+    weight_kg = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal("0.000"))
+    co2_kg = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal("0.000"))
+    activities = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["month", "area"], name="areastat_unique_month_area"),
+        ]
+
+    def __str__(self):
+        return f"{self.area} {self.month:%Y-%m}: {self.weight_kg} kg"
+
+
 class Badge(models.Model):
     class Rarity(models.TextChoices):
         COMMON     = "Common", "Common"
@@ -125,6 +223,23 @@ class UserBadge(models.Model):
     def __str__(self):
         return f"{self.user_id} ↦ {self.badge.name}"
 
+class PendingBadgeCheck(models.Model):
+    """
+    A user whose counters changed and whose badges are due for evaluation.
+    One row per user, so every activity in a window collapses into one
+    check; `Rewards.services.run_pending_badge_checks` drains the table.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    queued_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"badge check for {self.user_id}"
+
 class RewardItem(models.Model):
     title = models.CharField(max_length=120)
     image = models.ImageField(upload_to="reward_items/%Y/%m/", blank=True, null=True)
@@ -157,7 +272,15 @@ class Redemption(models.Model):
         on_delete=models.PROTECT,
         related_name="redemptions",
     )
+    class Status(models.TextChoices):
+        PENDING   = "pending",   "Pending"
+        PACKED    = "packed",    "Packed"
+        SHIPPED   = "shipped",   "Shipped"
+        CANCELLED = "cancelled", "Cancelled"
+
     points_spent = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    status_changed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -165,6 +288,8 @@ class Redemption(models.Model):
         indexes = [
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["reward", "created_at"]),
+            # the fulfilment queue reads one status oldest first
+            models.Index(fields=["status", "created_at"], name="redemption_queue"),
         ]
 
     def __str__(self):
@@ -172,28 +297,39 @@ class Redemption(models.Model):
 
     @classmethod
     def redeem(cls, *, user, reward: RewardItem):
+        """
+        Spend the user's points on `reward`. Both guards are conditional
+        UPDATEs whose row counts decide the outcome, so concurrent redeemers
+        can neither overdraw a balance nor oversell stock, with or without
+        row locks; a failed guard rolls the other back.
+        """
         if not getattr(user, "pk", None):
             raise ValidationError("User must be authenticated.")
 
         with transaction.atomic():
-            u = UserModel.objects.select_for_update().get(pk=user.pk)
-            r = RewardItem.objects.select_for_update().get(pk=reward.pk, is_active=True)
-
-            user_points = int(u.points or 0)
-            cost = int(r.cost_points or 0)
-            stock_val = r.stock if r.stock is None else int(r.stock)
-
-            if user_points < cost:
+            # Open with the stock write: once a drop sells out, losers leave
+            # after one UPDATE that matched nothing, and SQLite queues a
+            # transaction that starts by writing rather than failing its
+            # read-to-write lock upgrade. NULL stock (unlimited) stays NULL.
+            in_stock = models.Q(stock__gt=0) | models.Q(stock__isnull=True)
+            if not RewardItem.objects.filter(in_stock, pk=reward.pk, is_active=True).update(stock=F("stock") - 1):
+                if RewardItem.objects.filter(pk=reward.pk, is_active=True).exists():
+                    raise ValidationError("Reward out of stock.")
+                raise ValidationError("Reward is no longer available.")
+
+            cost = RewardItem.objects.values_list("cost_points", flat=True).get(pk=reward.pk)
+            if not UserModel.objects.filter(pk=user.pk, points__gte=cost).update(points=F("points") - cost):
                 raise ValidationError("Not enough points to redeem.")
-            if stock_val is not None and stock_val <= 0:
-                raise ValidationError("Reward out of stock.")
-            
-            u.points = F("points") - cost
-          
-            if stock_val is not None:
-                r.stock = F("stock") - 1
-
-            u.save(update_fields=["points"])
-            r.save()
-
-            return cls.objects.create(user=u, reward=r, points_spent=cost)
\ No newline at end of file
+
+            redemption = cls.objects.create(user_id=user.pk, reward_id=reward.pk, points_spent=cost)
+
+            from .ledger import post_entries
+            post_entries([
+                PointsLedger(
+                    user_id=user.pk,
+                    key=f"redemption:{redemption.pk}",
+                    reason=PointsLedger.Reason.REDEMPTION,
+                    points=-cost,
+                )
+            ])
+            return redemption
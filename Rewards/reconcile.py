@@ -0,0 +1,142 @@
+"""
+Reconciling the cached User totals with the points ledger, and the ledger
+with the records it was credited for.
+
+`points`, `total_co2_saved_kg` and `total_pickups` are a projection of
+PointsLedger (see `Rewards.ledger`). `drift_batches` walks users in primary
+key order, `batch_size` at a time, and compares each batch with grouped
+SUMs over the rows of the same id range, so memory stays bounded by the
+batch however many users there are:
+
+* the ledger, which the stored totals must equal;
+* the source records: activities (CO2 and 2 points per whole kg), completed
+  pickup jobs as requester or collector, held badges' bonuses and
+  uncancelled redemptions, plus the ledger's manual adjustments and
+  expiries, which have no other record. The ledger's opening entries are
+  left out, so credits baked into them at migration time show up here.
+
+`fix_batch` re-projects users whose stored totals left the ledger in one
+UPDATE. A ledger that disagrees with its sources is only reported: which
+side is wrong takes a person to decide, and the fix is an adjustment entry.
+"""
+from decimal import Decimal
+from typing import Iterator, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Floor
+
+from Pickup.models import PickupJob
+from .ledger import refresh_totals
+from .models import Activity, PointsLedger, Redemption, UserBadge
+
+UserModel = get_user_model()
+
+FIELDS = ("points", "total_co2_saved_kg", "total_pickups")
+
+
+ZERO = (0, Decimal(0), 0)
+
+
+class Drift(NamedTuple):
+    user_id: int
+    stored: tuple       # (points, co2, pickups) on the User row
+    expected: tuple     # the same totals summed from the ledger
+    source: tuple       # the same totals re-derived from the source records
+    activities: int     # Activity rows, one per credited pickup
+    jobs: int           # completed pickup jobs as requester or collector
+
+    def fields(self) -> list[str]:
+        """Stored totals that differ from the ledger (what `fix_batch` repairs)."""
+        return [f for f, s, e in zip(FIELDS, self.stored, self.expected) if s != e]
+
+    def source_fields(self) -> list[str]:
+        """Ledger totals that differ from the source records; "activities" when
+        activities and completed pickups disagree (a pickup credited twice)."""
+        fields = [f"{f}_source" for f, e, s in zip(FIELDS, self.expected, self.source) if e != s]
+        if self.activities != self.jobs:
+            fields.append("activities")
+        return fields
+
+
+def _grouped(qs, **totals) -> dict[int, tuple]:
+    rows = qs.order_by().values("user_id").annotate(**totals).values_list("user_id", *totals)
+    return {uid: tuple(v or 0 for v in values) for uid, *values in rows}
+
+
+def _ledger_totals(first_id: int, last_id: int) -> dict[int, tuple]:
+    rows = _grouped(
+        PointsLedger.objects.filter(user_id__gte=first_id, user_id__lte=last_id),
+        p=Sum("points"), c=Sum("co2_kg"), n=Sum("pickups"),
+    )
+    return {uid: (p, Decimal(c), n) for uid, (p, c, n) in rows.items()}
+
+
+def _source_totals(first_id: int, last_id: int) -> dict[int, tuple]:
+    """Per user: ((points, co2, pickups), activities, jobs) from six grouped queries."""
+    in_range = Q(user_id__gte=first_id, user_id__lte=last_id)
+    activities = _grouped(
+        Activity.objects.filter(in_range),
+        p=Sum(Floor("co2_saved_kg")), c=Sum("co2_saved_kg"), n=Count("id"),
+    )
+    badges = _grouped(UserBadge.objects.filter(in_range), p=Sum("badge__points_bonus"))
+    spent = _grouped(
+        Redemption.objects.filter(in_range).exclude(status=Redemption.Status.CANCELLED),
+        p=Sum("points_spent"),
+    )
+    manual = _grouped(
+        PointsLedger.objects.filter(
+            in_range, reason__in=(PointsLedger.Reason.ADJUSTMENT, PointsLedger.Reason.EXPIRY)
+        ),
+        p=Sum("points"), c=Sum("co2_kg"), n=Sum("pickups"),
+    )
+    completed = PickupJob.objects.filter(status=PickupJob.Status.COMPLETED)
+    jobs: dict[int, int] = {}
+    for party in ("requester", "collector"):
+        rows = (
+            completed.filter(**{f"{party}_id__gte": first_id, f"{party}_id__lte": last_id})
+            .order_by().values(party).annotate(n=Count("id")).values_list(party, "n")
+        )
+        for uid, n in rows:
+            jobs[uid] = jobs.get(uid, 0) + n
+
+    totals = {}
+    for uid in {*activities, *badges, *spent, *manual, *jobs}:
+        act_p, act_c, act_n = activities.get(uid, (0, 0, 0))
+        man_p, man_c, man_n = manual.get(uid, (0, 0, 0))
+        points = int(act_p) * 2 + badges.get(uid, (0,))[0] - spent.get(uid, (0,))[0] + man_p
+        co2 = Decimal(act_c) + Decimal(man_c)
+        totals[uid] = ((points, co2, jobs.get(uid, 0) + man_n), act_n, jobs.get(uid, 0))
+    return totals
+
+
+def drift_batches(batch_size: int = 5000) -> Iterator[tuple[int, list[Drift]]]:
+    """
+    Yield (users checked, drifted users) per batch: a keyset page of users,
+    then the grouped ledger and source sums for its id range. A user whose
+    totals move between the reads may be reported; fixing such a user is
+    harmless because the fix re-derives from the ledger.
+    """
+    last = 0
+    while True:
+        users = list(
+            UserModel.objects.filter(pk__gt=last).order_by("pk")
+            .values_list("pk", *FIELDS)[:batch_size]
+        )
+        if not users:
+            return
+        expected = _ledger_totals(users[0][0], users[-1][0])
+        sources = _source_totals(users[0][0], users[-1][0])
+        drifted = []
+        for uid, points, co2, pickups in users:
+            stored = (points or 0, Decimal(co2 or 0), pickups or 0)
+            d = Drift(uid, stored, expected.get(uid, ZERO), *sources.get(uid, (ZERO, 0, 0)))
+            if d.fields() or d.source_fields():
+                drifted.append(d)
+        yield len(users), drifted
+        last = users[-1][0]
+
+
+def fix_batch(drifted: list[Drift]) -> int:
+    """Re-project the users whose stored totals left the ledger; returns rows updated."""
+    return refresh_totals(d.user_id for d in drifted if d.fields())
@@ -1,13 +1,18 @@
-import re
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Min
 
-from .models import Activity, Badge, UserBadge, RewardItem, Redemption
+from Notifications.models import Notification
+from .areas import record_activities
+from .badge_rules import compiled_rules
+from .ledger import badge_key, entry_for_activity, post_entries, posted_keys
+from .models import Activity, Badge, PendingBadgeCheck, PointsLedger, UserBadge, RewardItem, Redemption
+from .signals import badge_notification
 
 UserModel = get_user_model()
 
@@ -17,214 +22,188 @@ else:
     UserType = Any
 
 
-def _ensure_badge(
-    code: str, *, name: str, description: str, emoji: str, rarity: str, points_bonus: int
-) -> Badge:
-    badge, _ = Badge.objects.get_or_create(
-        code=code,
-        defaults={
-            "name": name,
-            "description": description,
-            "emoji": emoji,
-            "rarity": rarity,
-            "points_bonus": points_bonus,
-        },
+def _first_recycler_award(rules, users) -> list[tuple[int, Badge]]:
+    """
+    The platform-wide first_recycler badge while nobody holds it: the
+    household in `users` with the earliest activity claims it by posting the
+    badge's one-off ledger key, which the unique index lets only one writer
+    do, so no lock is held while completions run.
+    """
+    badge = rules.first_recycler
+    if badge is None or UserBadge.objects.filter(badge_id=badge.pk).exists():
+        return []
+    households = [u.pk for u in users if u.role == "household" and u.total_pickups]
+    first = (
+        Activity.objects.filter(user_id__in=households)
+        .values("user_id").annotate(first=Min("created_at")).order_by("first", "user_id")
+        .values_list("user_id", flat=True).first()
     )
-    return badge
-
-
-def _award_badge(user: "UserType", badge: Badge) -> bool:
-   
-    created = UserBadge.objects.get_or_create(user_id=user.pk, badge=badge)[1]
-    if created and badge.points_bonus:
-        UserModel.objects.filter(pk=user.pk).update(points=F("points") + badge.points_bonus)
-    return created
-
+    if first is None:
+        return []
+    if not post_entries([
+        PointsLedger(user_id=first, key=f"first_recycler:{badge.pk}", reason=PointsLedger.Reason.BADGE,
+                     points=badge.points_bonus)
+    ]):
+        return []
+    return [(first, badge)]
 
-def _has_badge(user: "UserType", code: str) -> bool:
-    return UserBadge.objects.filter(user_id=user.pk, badge__code=code).exists()
 
-
-# Special-case: first_recycler 
-def award_first_recycler_global(*, user: "UserType", is_first_for_user: bool) -> None:
-    """Platform-wide unique (household only). Creates the badge if missing."""
-    if user.role != "household" or not is_first_for_user:
-        return
-
-    badge = _ensure_badge(
-        "first_recycler",
-        name="Eco Starter",
-        description="First Recycler of Recyconnect",
-        emoji="💚",
-        rarity=Badge.Rarity.EXCLUSIVE,
-        points_bonus=250,
+def evaluate_badges(user_ids: Iterable[int]) -> int:
+    """
+    Award every badge the users' counters reach and they do not hold yet.
+    A batch costs a fixed handful of queries however many users it holds:
+    their counters, their earned badges, one INSERT of awards, one ledger
+    post of the bonuses and one INSERT of notifications. Returns the number
+    of badges awarded.
+    """
+    users = list(
+        UserModel.objects.filter(pk__in=set(user_ids))
+        .only("id", "role", "total_pickups", "total_co2_saved_kg")
     )
+    if not users:
+        return 0
+    rules = compiled_rules()
 
-    badge = Badge.objects.select_for_update().get(pk=badge.pk)
-    if UserBadge.objects.filter(badge=badge).exists():
-        return
-
-    _award_badge(user, badge)
-
-def award_first_timer(user: "UserType") -> None:
-    if _has_badge(user, "first_timer"):
-        return
-    badge = _ensure_badge(
-        "first_timer",
-        name="First Timer",
-        description="Completed First Pickup",
-        emoji="🌟",
-        rarity=Badge.Rarity.COMMON,
-        points_bonus=100,
+    earned = set(
+        UserBadge.objects.filter(user_id__in=[u.pk for u in users]).values_list("user_id", "badge_id")
     )
-    if user.total_pickups >= 1:
-        _award_badge(user, badge)
-
-
-def award_pickups_20(user: "UserType") -> None:
-    if _has_badge(user, "pickups_20"):
-        return
-    badge = _ensure_badge(
-        "pickups_20",
-        name="Eco Warrior",
-        description="Completed 20+ successful pickups",
-        emoji="♻️",
-        rarity=Badge.Rarity.RARE,
-        points_bonus=300,
+    awards = [
+        (u.pk, badge)
+        for u in users
+        for badge in rules.qualifying(total_pickups=u.total_pickups, total_co2=u.total_co2_saved_kg)
+        if (u.pk, badge.pk) not in earned
+    ]
+    claimed = _first_recycler_award(rules, users)
+    if not awards and not claimed:
+        return 0
+
+    UserBadge.objects.bulk_create(
+        [UserBadge(user_id=uid, badge=badge) for uid, badge in awards + claimed], ignore_conflicts=True
     )
-    if user.total_pickups >= 20:
-        _award_badge(user, badge)
-
-
-def award_co2_50(user: "UserType") -> None:
-    if _has_badge(user, "CO2_50"):
-        return
-    badge = _ensure_badge(
-        "CO2_50",
-        name="Planet Protector",
-        description="Saved 50 KG+ CO2 Emission",
-        emoji="🌍",
-        rarity=Badge.Rarity.EPIC,
-        points_bonus=500,
-    )
-    if user.total_co2_saved_kg >= Decimal("50"):
-        _award_badge(user, badge)
-
-
-# Dynamic rules from DB (admin-created) 
-_PICKUP_RE = re.compile(r"^(pickups)_(\d+)$", re.IGNORECASE)
-_CO2_RE    = re.compile(r"^(co2)_(\d+)$",      re.IGNORECASE)
-
-def _iter_dynamic_badges():
-    qs = Badge.objects.filter(code__iregex=r'^(pickups|co2)_[0-9]+$') \
-                      .only("id", "code", "points_bonus", "name", "description", "emoji", "rarity")
-    for b in qs:
-        code = (b.code or "").strip()
-        m = _PICKUP_RE.match(code) or _CO2_RE.match(code)
-        if not m:
-            continue
-        kind, num = m.group(1).lower(), int(m.group(2))
-        yield kind, num, b
-
-
-def _award_dynamic_badges_from_db(user: "UserType") -> None:
- 
-    earned_codes_lower = set(
-        (c or "").lower()
-        for c in UserBadge.objects.filter(user_id=user.pk).values_list("badge__code", flat=True)
+    posted = {
+        e.key for e in post_entries(
+            PointsLedger(user_id=uid, key=badge_key(badge.pk, uid),
+                         reason=PointsLedger.Reason.BADGE, points=badge.points_bonus)
+            for uid, badge in awards if badge.points_bonus
+        )
+    }
+    # a bonus already in the ledger means another evaluation awarded it first
+    fresh = [
+        (uid, badge) for uid, badge in awards
+        if not badge.points_bonus or badge_key(badge.pk, uid) in posted
+    ] + claimed
+    Notification.objects.bulk_create([
+        Notification(user_id=uid, category=Notification.Category.BADGE, **_notification_fields(badge))
+        for uid, badge in fresh
+    ])
+    return len(fresh)
+
+
+def _notification_fields(badge: Badge) -> dict:
+    note = badge_notification(badge)
+    return {"title": note["title"], "message": note["message"], "payload": note["data"]}
+
+
+def queue_badge_checks(user_ids: Iterable[int]) -> None:
+    """
+    Mark users for badge evaluation. The marks are part of the caller's
+    transaction and coalesce per user; they are drained after commit, or by
+    `manage.py badge_worker` when REWARDS_ASYNC_BADGES is on.
+    """
+    PendingBadgeCheck.objects.bulk_create(
+        [PendingBadgeCheck(user_id=uid) for uid in set(user_ids)], ignore_conflicts=True
     )
+    if not getattr(settings, "REWARDS_ASYNC_BADGES", False):
+        transaction.on_commit(run_pending_badge_checks)
 
-    rules = sorted(_iter_dynamic_badges(), key=lambda t: t[1])  
-
-    total_pickups = int(user.total_pickups or 0)
-    total_co2 = Decimal(user.total_co2_saved_kg or Decimal("0"))
 
-    for kind, threshold, badge in rules:
-        code_lc = (badge.code or "").lower()
-        if code_lc in earned_codes_lower:
-            continue
-
-        if kind == "pickups":
-            if total_pickups >= threshold and _award_badge(user, badge):
-                earned_codes_lower.add(code_lc)
-        elif kind == "co2":
-            if total_co2 >= Decimal(threshold) and _award_badge(user, badge):
-                earned_codes_lower.add(code_lc)
-
-
-def _evaluate_all_badges(*, user: "UserType", is_first_for_user: bool) -> None:
+def run_pending_badge_checks(*, batch_size: Optional[int] = None) -> int:
     """
-    Run badge engine after an activity: special -> static -> dynamic.
+    Evaluate queued users in batches, oldest first, until the queue is
+    empty. Each batch is claimed by deleting its rows in the transaction that
+    awards its badges, so a failed batch stays queued. Returns users evaluated.
     """
-    user = UserModel.objects.only(
-        "id", "role", "total_pickups", "total_co2_saved_kg", "points"
-    ).get(pk=user.pk)
-
-    award_first_recycler_global(user=user, is_first_for_user=is_first_for_user)
-    award_first_timer(user)
-    award_pickups_20(user)
-    award_co2_50(user)
-    _award_dynamic_badges_from_db(user)
+    batch_size = batch_size or getattr(settings, "REWARDS_BADGE_BATCH_SIZE", 500)
+    evaluated = 0
+    while True:
+        with transaction.atomic():
+            user_ids = list(
+                PendingBadgeCheck.objects.order_by("queued_at")
+                .values_list("user_id", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                return evaluated
+            PendingBadgeCheck.objects.filter(user_id__in=user_ids).delete()
+            evaluate_badges(user_ids)
+        evaluated += len(user_ids)
 
 
 #  Public services
 @transaction.atomic
-def log_activity_and_update(*, user: "UserType", product, weight_kg: Decimal) -> Activity:
- 
-    is_first_for_user = not Activity.objects.filter(user=user).exists()
+def log_activity_and_update(
+    *, user: "UserType", product, weight_kg: Decimal, key: Optional[str] = None
+) -> Optional[Activity]:
+    """
+    Record a recycling activity, credit it through the points ledger and
+    add it to its area's monthly totals. Badges are evaluated after commit
+    (see `queue_badge_checks`).
 
-    act = Activity.objects.create(user=user, product=product, weight_kg=weight_kg)
+    `key` identifies the event (see `Rewards.ledger.pickup_key`); when it is
+    already in the ledger nothing happens and None is returned.
+    """
+    if key and posted_keys([key]):
+        return None
 
-    co2 = act.co2_saved_kg
-    add_points = int(co2) * 2
+    act = Activity.objects.create(user=user, product=product, weight_kg=weight_kg)
+    posted = post_entries([
+        entry_for_activity(user_id=user.pk, key=key or f"activity:{act.pk}", co2=act.co2_saved_kg)
+    ])
+    if not posted:
+        # a concurrent caller posted the same key first
+        act.delete()
+        return None
+
+    record_activities([act])
+    queue_badge_checks([user.pk])
+    return act
 
-    UserModel.objects.filter(pk=user.pk).update(
-        total_co2_saved_kg=F("total_co2_saved_kg") + co2,
-        total_pickups=F("total_pickups") + 1,
-        points=F("points") + add_points,
-    )
 
-    _evaluate_all_badges(user=user, is_first_for_user=is_first_for_user)
-    return act
+@transaction.atomic
+def log_activities_bulk(entries) -> list[Activity]:
+    """
+    Bulk form of `log_activity_and_update` for many (user_id, product,
+    weight_kg, key) entries: entries whose key is already posted are
+    skipped, the rest become one INSERT of activities and one of ledger rows,
+    each affected user's totals are re-projected once, and every user is
+    queued for one badge evaluation.
+    """
+    done = posted_keys(key for _, _, _, key in entries)
+    entries = [e for e in entries if e[3] not in done]
+    if not entries:
+        return []
+
+    acts, ledger = [], []
+    for user_id, product, weight_kg, key in entries:
+        co2 = Activity.co2_for(product.kind, weight_kg)
+        acts.append(Activity(user_id=user_id, product=product, weight_kg=weight_kg, co2_saved_kg=co2))
+        ledger.append(entry_for_activity(user_id=user_id, key=key, co2=co2))
+    acts = Activity.objects.bulk_create(acts)
+    posted = {e.key: e for e in post_entries(ledger)}
+    # an entry whose key was repeated, or posted first by a concurrent
+    # caller, keeps no activity of its own
+    dropped = {a.pk for a, e in zip(acts, ledger) if posted.get(e.key) is not e}
+    if dropped:
+        Activity.objects.filter(pk__in=dropped).delete()
+        acts = [a for a in acts if a.pk not in dropped]
+        if not acts:
+            return []
+    record_activities(acts)
+
+    queue_badge_checks(user_id for user_id, _, _, _ in entries)
+    return acts
 
 
 @transaction.atomic
 def redeem_reward(*, user: "UserType", reward: RewardItem) -> Redemption:
     """User-initiated redemption (atomic + checks handled in model)."""
-    print("[DEBUG] redeem_reward called for user:", user.pk, "reward:", reward.pk)
     return Redemption.redeem(user=user, reward=reward)
-
-
-def ensure_core_badges() -> None:
-    _ensure_badge(
-        "first_recycler",
-        name="Eco Starter",
-        description="First Recycler of Recyconnect",
-        emoji="💚",
-        rarity=Badge.Rarity.EXCLUSIVE,
-        points_bonus=250,
-    )
-    _ensure_badge(
-        "first_timer",
-        name="First Timer",
-        description="Completed First Pickup",
-        emoji="🌟",
-        rarity=Badge.Rarity.COMMON,
-        points_bonus=100,
-    )
-    _ensure_badge(
-        "pickups_20",
-        name="Eco Warrior",
-        description="Completed 20+ successful pickups",
-        emoji="♻️",
-        rarity=Badge.Rarity.RARE,
-        points_bonus=300,
-    )
-    _ensure_badge(
-        "CO2_50",
-        name="Planet Protector",
-        description="Saved 50 KG+ CO2 Emission",
-        emoji="🌍",
-        rarity=Badge.Rarity.EPIC,
-        points_bonus=500,
-    )
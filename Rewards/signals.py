@@ -1,27 +1,30 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
-from .models import UserBadge, Activity   
+from .badge_rules import CORE_BADGES, core_badge_deleted, invalidate_badge_rules
+from .catalog import invalidate_catalog
+from .leaderboard import set_role
+from .models import Badge, UserBadge, Activity, RewardItem
 from Notifications.services import create_notification
 
 User = get_user_model()
 
+def badge_notification(badge: Badge) -> dict:
+    """Title, message and data of the "new badge" notification."""
+    bonus = int(getattr(badge, "points_bonus", 0) or 0)
+    return {
+        "title": "🎉 New Badge Earned!",
+        "message": f"You earned {badge.name}" + (f" (+{bonus} pts)" if bonus else ""),
+        "data": {"badge_id": badge.id, "badge_name": badge.name, "points_bonus": bonus},
+    }
+
+
 @receiver(post_save, sender=UserBadge)
 def notify_on_new_badge(sender, instance: UserBadge, created, **kwargs):
     if not created:
         return
-    b = instance.badge
-    bonus = int(getattr(b, "points_bonus", 0) or 0)
-    msg = f"You earned {b.name}" + (f" (+{bonus} pts)" if bonus else "")
-    create_notification(
-        user=instance.user,
-        title="🎉 New Badge Earned!",
-        message=msg,
-        category="badge",
-        data={"badge_id": b.id, "badge_name": b.name, "points_bonus": bonus},
-        link_url="",  
-    )
+    create_notification(user=instance.user, category="badge", link_url="", **badge_notification(instance.badge))
 
 @receiver(post_save, sender=Activity)
 def notify_on_points_activity(sender, instance: Activity, created, **kwargs):
@@ -48,3 +51,33 @@ def notify_on_points_activity(sender, instance: Activity, created, **kwargs):
         },
         link_url="",  
     )
+
+@receiver(post_save, sender=Badge)
+@receiver(post_delete, sender=Badge)
+def invalidate_rules_on_badge_change(sender, instance: Badge, **kwargs):
+    invalidate_badge_rules()
+    if kwargs.get("signal") is post_delete and instance.code in CORE_BADGES:
+        core_badge_deleted()
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=RewardItem)
+@receiver(post_delete, sender=RewardItem)
+def invalidate_catalog_on_reward_change(sender, instance: RewardItem, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_role(sender, instance, **kwargs):
+    # read from __dict__ so a deferred role is not fetched just for this
+    instance._loaded_role = instance.__dict__.get("role")
+
+
+@receiver(post_save, sender=User)
+def move_leaderboard_role(sender, instance, created, update_fields=None, **kwargs):
+    # boards are filtered by the role stored on each entry
+    loaded, instance._loaded_role = instance._loaded_role, instance.role
+    if created or (update_fields is not None and "role" not in update_fields):
+        return
+    if loaded is None or loaded != instance.role:
+        set_role(instance.pk, instance.role)
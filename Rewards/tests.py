@@ -1,3 +1,617 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Notifications.models import Notification
+from Pickup.models import PickupJob
+from RecyCon.models import Product, VersionStamp
+from . import areas, badge_rules, fulfilment, leaderboard
+from .badge_rules import CORE_BADGES, compiled_rules
+from .expiry import ExpiryBatch, expire_points
+from .ledger import pickup_key, post_entries, refresh_totals
+from .models import Activity, AreaStat, Badge, LeaderboardEntry, PointsLedger, Redemption, RewardItem, UserBadge
+from .reconcile import drift_batches
+from .services import evaluate_badges, log_activities_bulk, log_activity_and_update
+
+User = get_user_model()
+
+
+class RewardsPageQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="house@example.com", password="pw", name="House", role="household",
+            is_active=True, is_approved=True,
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("rewards:household")
+
+    def _page_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def _add_catalog(self, start: int, count: int):
+        badges = Badge.objects.bulk_create(
+            Badge(code=f"pickups_{1000 + i}", name=f"Badge {i}") for i in range(start, start + count)
+        )
+        UserBadge.objects.bulk_create(UserBadge(user=self.user, badge=b) for b in badges[::2])
+        RewardItem.objects.bulk_create(
+            RewardItem(title=f"Reward {i}", cost_points=10 * i) for i in range(start, start + count)
+        )
+
+    def test_core_badges_are_seeded(self):
+        self.assertEqual(Badge.objects.filter(code__in=CORE_BADGES).count(), len(CORE_BADGES))
+
+    def test_get_does_not_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        writes = [q["sql"] for q in ctx.captured_queries
+                  if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+        self.assertEqual(writes, [])
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        self._add_catalog(0, 3)
+        baseline = self._page_queries()
+        self._add_catalog(3, 60)
+        self.assertEqual(self._page_queries(), baseline)
+        self.assertLessEqual(baseline, 12)
+
+
+class RewardsCatalogCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="cat@example.com", password="pw", name="Cat", role="household",
+            is_active=True, is_approved=True,
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("rewards:household")
+        self.item = RewardItem.objects.create(title="Mug", cost_points=10, stock=1)
+
+    def _catalog_queries(self) -> list[str]:
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        selects = [q["sql"].split(" FROM ")[0] for q in ctx.captured_queries]
+        return [
+            s for s in selects
+            if s.startswith('SELECT "Rewards_badge".') or ('SELECT "Rewards_rewarditem".' in s and '"title"' in s)
+        ]
+
+    def test_catalogs_are_read_once_per_version(self):
+        self._catalog_queries()
+        self.assertEqual(self._catalog_queries(), [])
+        Badge.objects.create(code="pickups_500", name="Five hundred")
+        self.assertTrue(self._catalog_queries())
+
+    def test_stock_is_fresh_without_a_catalog_change(self):
+        self.client.get(self.url)
+        RewardItem.objects.filter(pk=self.item.pk).update(stock=0)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Out of Stock")
+
+
+class BadgeProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="prog@example.com", password="pw", name="Prog", role="household",
+            is_active=True, is_approved=True,
+        )
+        User.objects.filter(pk=self.user.pk).update(total_pickups=5, total_co2_saved_kg=Decimal("12.500"))
+        Badge.objects.create(code="pickups_10", name="Ten pickups")
+        self.client.force_login(self.user)
+
+    def test_progress_json(self):
+        response = self.client.get(reverse("rewards:progress"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        by_code = {row["code"]: row for row in data["badges"]}
+        self.assertEqual(by_code["pickups_10"]["percent"], 50)
+        self.assertEqual(by_code["first_timer"]["percent"], 100)
+        self.assertEqual(by_code["CO2_50"]["percent"], 25)
+        self.assertEqual(data["next"]["pickups"]["code"], "pickups_10")
+        self.assertEqual(data["next"]["co2"]["code"], "CO2_50")
+
+    def test_page_shows_progress(self):
+        response = self.client.get(reverse("rewards:household"))
+        self.assertContains(response, "5 / 10 pickups")
+
+
+class ReconcileTotalsTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                email=f"r{i}@example.com", password="pw", name=f"R{i}", role="household",
+                is_active=True, is_approved=True,
+            )
+            for i in range(3)
+        ]
+        PointsLedger.objects.bulk_create(
+            PointsLedger(user=u, key=f"adjustment:{u.pk}", reason=PointsLedger.Reason.ADJUSTMENT,
+                         points=40, co2_kg=Decimal("3.500"), pickups=2)
+            for u in self.users
+        )
+        refresh_totals(u.pk for u in self.users)
+        User.objects.filter(pk=self.users[1].pk).update(points=90, total_pickups=3)
+
+    def test_reports_and_fixes_drift(self):
+        report = StringIO()
+        call_command("reconcile_user_totals", batch_size=2, stdout=report, stderr=StringIO())
+        rows = report.getvalue().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith(f"{self.users[1].pk},points total_pickups,90,40,"))
+
+        drifted = [d for _, batch in drift_batches(2) for d in batch]
+        self.assertEqual([d.user_id for d in drifted], [self.users[1].pk])
+        self.assertEqual(drifted[0].fields(), ["points", "total_pickups"])
+
+        call_command("reconcile_user_totals", fix=True, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual([d for _, batch in drift_batches(2) for d in batch], [])
+        self.users[1].refresh_from_db()
+        self.assertEqual((self.users[1].points, self.users[1].total_pickups), (40, 2))
+
+    def test_reports_credits_baked_into_the_opening_balance(self):
+        user = self.users[2]
+        product = Product.objects.create(kind="plastic", weight=10, price=1)
+        PickupJob.objects.create(requester=user, product=product, kind="plastic", weight_kg=10, price=1,
+                                 status=PickupJob.Status.COMPLETED)
+        # the pickup was credited twice before the ledger, then opened as-is
+        Activity.objects.bulk_create([Activity(user=user, product=product, weight_kg=10,
+                                               co2_saved_kg=Decimal("15.000")) for _ in range(2)])
+        PointsLedger.objects.create(user=user, key=f"opening:{user.pk}", reason=PointsLedger.Reason.OPENING,
+                                    points=60, co2_kg=Decimal("30.000"), pickups=2)
+        refresh_totals([user.pk])
+
+        drifted = {d.user_id: d for _, batch in drift_batches(2) for d in batch}
+        d = drifted[user.pk]
+        self.assertEqual(d.fields(), [])
+        self.assertEqual(d.source_fields(), ["total_pickups_source", "activities"])
+        self.assertEqual((d.activities, d.jobs), (2, 1))
+
+        report = StringIO()
+        call_command("reconcile_user_totals", fix=True, stdout=report, stderr=StringIO())
+        self.assertIn(f"{user.pk},total_pickups_source activities,", report.getvalue())
+        user.refresh_from_db()
+        self.assertEqual(user.total_pickups, 4)
+
+    def test_report_file_is_utf8(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "drift.csv")
+            call_command("reconcile_user_totals", report=path, stdout=StringIO(), stderr=StringIO())
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 2)
+
+
+class RedeemGuardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="redeem@example.com", password="pw", name="Redeemer", role="household",
+            is_active=True, is_approved=True,
+        )
+        post_entries([PointsLedger(user=self.user, key="adjustment:redeem", reason=PointsLedger.Reason.ADJUSTMENT,
+                                   points=150)])
+
+    def assertBalance(self, points):
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, points)
+        self.assertEqual(self.user.points, sum(PointsLedger.objects.filter(user=self.user).values_list("points", flat=True)))
+
+    def test_redeem_spends_points_and_stock(self):
+        reward = RewardItem.objects.create(title="Mug", cost_points=100, stock=2)
+        redemption = Redemption.redeem(user=self.user, reward=reward)
+
+        reward.refresh_from_db()
+        self.assertEqual((redemption.points_spent, reward.stock), (100, 1))
+        self.assertBalance(50)
+        self.assertTrue(PointsLedger.objects.filter(key=f"redemption:{redemption.pk}", points=-100).exists())
+
+    def test_points_guard_rolls_back_the_stock(self):
+        reward = RewardItem.objects.create(title="Bike", cost_points=1000, stock=1)
+        with self.assertRaisesMessage(ValidationError, "Not enough points"):
+            Redemption.redeem(user=self.user, reward=reward)
+
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 1)
+        self.assertBalance(150)
+        self.assertFalse(Redemption.objects.exists())
+
+    def test_stock_guard(self):
+        reward = RewardItem.objects.create(title="Pen", cost_points=10, stock=1)
+        Redemption.redeem(user=self.user, reward=reward)
+        with self.assertRaisesMessage(ValidationError, "out of stock"):
+            Redemption.redeem(user=self.user, reward=reward)
+
+        reward.refresh_from_db()
+        self.assertEqual(reward.stock, 0)
+        self.assertBalance(140)
+        self.assertEqual(Redemption.objects.count(), 1)
+
+    def test_inactive_and_unlimited_rewards(self):
+        hidden = RewardItem.objects.create(title="Old", cost_points=10, stock=5, is_active=False)
+        with self.assertRaisesMessage(ValidationError, "no longer available"):
+            Redemption.redeem(user=self.user, reward=hidden)
+
+        unlimited = RewardItem.objects.create(title="Tree", cost_points=10, stock=None)
+        Redemption.redeem(user=self.user, reward=unlimited)
+        unlimited.refresh_from_db()
+        self.assertIsNone(unlimited.stock)
+        self.assertBalance(140)
+
+
+class FulfilmentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ful@example.com", password="pw", name="Ful", role="household",
+            is_active=True, is_approved=True,
+        )
+        post_entries([PointsLedger(user=self.user, key="adjustment:ful", reason=PointsLedger.Reason.ADJUSTMENT,
+                                   points=500)])
+        self.reward = RewardItem.objects.create(title="Mug", cost_points=100, stock=5)
+        self.redemptions = [Redemption.redeem(user=self.user, reward=self.reward) for _ in range(3)]
+
+    def _ids(self, *idx):
+        return [self.redemptions[i].pk for i in idx]
+
+    def test_transitions_only_move_forward(self):
+        self.assertEqual(fulfilment.transition(self._ids(0, 1, 2), Redemption.Status.SHIPPED), 0)
+        self.assertEqual(fulfilment.transition(self._ids(0, 1), Redemption.Status.PACKED), 2)
+        self.assertEqual(fulfilment.transition(self._ids(0, 1, 2), Redemption.Status.SHIPPED), 2)
+        self.assertEqual(
+            dict(Redemption.objects.values_list("pk", "status")),
+            {self.redemptions[0].pk: "shipped", self.redemptions[1].pk: "shipped", self.redemptions[2].pk: "pending"},
+        )
+
+    def test_cancel_refunds_points_and_stock_once(self):
+        fulfilment.transition(self._ids(0), Redemption.Status.PACKED)
+        fulfilment.transition(self._ids(0), Redemption.Status.SHIPPED)
+
+        self.assertEqual(fulfilment.transition(self._ids(0, 1, 2), Redemption.Status.CANCELLED), 2)
+        self.assertEqual(fulfilment.transition(self._ids(0, 1, 2), Redemption.Status.CANCELLED), 0)
+
+        self.user.refresh_from_db()
+        self.reward.refresh_from_db()
+        self.assertEqual(self.user.points, 400)
+        self.assertEqual(self.reward.stock, 4)
+        self.assertEqual(PointsLedger.objects.filter(reason=PointsLedger.Reason.REFUND).count(), 2)
+
+    def test_admin_bulk_action(self):
+        admin = User.objects.create_user(
+            email="staff@example.com", password="pw", name="Staff", role="admin",
+            is_active=True, is_approved=True, is_staff=True,
+        )
+        self.client.force_login(admin)
+        url = reverse("rewards:admin")
+        response = self.client.post(url, {
+            "action": "admin_redemptions", "status": "packed", "queue": "pending",
+            "redemption_id": self._ids(0, 1, 2),
+        })
+        self.assertRedirects(response, f"{url}?queue=pending", fetch_redirect_response=False)
+        self.assertEqual(Redemption.objects.filter(status="packed").count(), 3)
+
+        response = self.client.get(url, {"queue": "packed"})
+        self.assertContains(response, "Packed (3)")
+        self.assertContains(response, "Mark shipped")
+
+
+class RedemptionStatusMigrationTests(TransactionTestCase):
+    before = [("Rewards", "0006_pending_badge_check")]
+    after = [("Rewards", "0007_redemption_status")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_redemptions_are_closed(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        user = apps.get_model("User", "User").objects.create(email="old@example.com", role="household")
+        reward = apps.get_model("Rewards", "RewardItem").objects.create(title="Mug", cost_points=100)
+        old = apps.get_model("Rewards", "Redemption").objects.create(user=user, reward=reward, points_spent=100)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        redemption = Redemption.objects.get(pk=old.pk)
+        self.assertEqual(redemption.status, Redemption.Status.SHIPPED)
+        self.assertEqual(redemption.status_changed_at, redemption.created_at)
+        self.assertEqual(fulfilment.transition([old.pk], Redemption.Status.CANCELLED), 0)
+
+
+class LeaderboardRankTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                email=f"lb{i}@example.com", password="pw", name=f"LB{i}", role="household",
+                is_active=True, is_approved=True,
+            )
+            for i in range(5)
+        ]
+        post_entries(
+            PointsLedger(user=u, key=f"adjustment:lb{u.pk}", reason=PointsLedger.Reason.ADJUSTMENT, points=points)
+            for u, points in zip(self.users, (50, 80, 80, 20))
+        )
+
+    def test_rank_counts_the_entries_above(self):
+        ranks = [leaderboard.rank_of(u, "week") for u in self.users]
+        self.assertEqual(
+            [(r.rank, r.points, r.of) for r in ranks],
+            [(3, 50, 4), (1, 80, 4), (1, 80, 4), (4, 20, 4), (None, 0, 4)],
+        )
+        with self.assertNumQueries(3):  # my entry, the version stamp, the count above me
+            leaderboard.rank_of(self.users[0], "week")
+
+    def test_role_change_moves_the_entries(self):
+        mover = self.users[1]
+        mover.role = "buyer"
+        mover.save()
+
+        self.assertEqual(set(LeaderboardEntry.objects.filter(user=mover).values_list("role", flat=True)), {"buyer"})
+        self.assertEqual(leaderboard.rank_of(mover, "all"), leaderboard.Rank(1, 80, 1))
+        self.assertEqual(leaderboard.rank_of(self.users[0], "all"), leaderboard.Rank(2, 50, 3))
+        self.assertEqual([s.name for s in leaderboard.top("all", "buyer")], ["LB1"])
+
+    def test_saves_that_keep_the_role_leave_the_entries_alone(self):
+        with mock.patch("Rewards.signals.set_role") as set_role:
+            user = User.objects.get(pk=self.users[0].pk)
+            user.name = "Renamed"
+            user.save()
+            User.objects.only("id", "name").get(pk=user.pk).save()
+            set_role.assert_not_called()
+
+            user.role = "buyer"
+            user.save()
+            user.save()
+            set_role.assert_called_once_with(user.pk, "buyer")
+
+    def test_prune_keeps_the_current_and_previous_period(self):
+        today = timezone.localdate()
+        week = leaderboard.period_start("week", today)
+        month = leaderboard.period_start("month", today)
+        for weeks_back in (1, 2, 3):
+            LeaderboardEntry.objects.create(period="week", period_start=week - timedelta(weeks=weeks_back),
+                                            user=self.users[4], role="household", points=1)
+        last_month = leaderboard.period_start("month", month - timedelta(days=1))
+        for start in (last_month, leaderboard.period_start("month", last_month - timedelta(days=1))):
+            LeaderboardEntry.objects.create(period="month", period_start=start,
+                                            user=self.users[4], role="household", points=1)
+
+        out = StringIO()
+        call_command("prune_leaderboard", batch_size=2, stdout=out)
+        self.assertIn("pruned 3 leaderboard row(s) in 2 batch(es)", out.getvalue())
+        self.assertEqual(
+            sorted(LeaderboardEntry.objects.filter(user=self.users[4]).values_list("period", "period_start")),
+            [("month", last_month), ("week", week - timedelta(weeks=1))],
+        )
+        self.assertEqual(LeaderboardEntry.objects.filter(user=self.users[0]).count(), 3)
+
+
+class PointsExpiryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="exp@example.com", password="pw", name="Exp", role="household",
+            is_active=True, is_approved=True,
+        )
+        post_entries([
+            PointsLedger(user=self.user, key="adjustment:old", reason=PointsLedger.Reason.ADJUSTMENT, points=300),
+            PointsLedger(user=self.user, key="adjustment:new", reason=PointsLedger.Reason.ADJUSTMENT, points=50),
+        ])
+        PointsLedger.objects.filter(key="adjustment:old").update(created_at=timezone.now() - timedelta(days=400))
+        Redemption.redeem(user=self.user, reward=RewardItem.objects.create(title="Cap", cost_points=100))
+
+    def test_expires_unspent_old_points_once(self):
+        batches = list(expire_points(days=365, batch_size=10))
+        self.assertEqual(batches[0].expired, {self.user.pk: 200})
+        self.assertEqual(list(expire_points(days=365)), [ExpiryBatch(1, {})])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 50)
+        self.assertEqual(
+            Notification.objects.filter(user=self.user, category=Notification.Category.POINTS,
+                                        title__contains="Expired").count(),
+            1,
+        )
+        # expiry does not lower the boards
+        self.assertEqual(leaderboard.top("all", "household")[0].points, 350)
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(list(expire_points(days=365, dry_run=True))[0].expired, {self.user.pk: 200})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 250)
+
+
+class DuplicatePickupCreditTests(TestCase):
+    """Two completions of one pickup that both pass the already-posted check."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="dup@example.com", password="pw", name="Dup", role="household",
+            is_active=True, is_approved=True,
+        )
+        self.product = Product.objects.create(kind="plastic", weight=10, price=1)
+        self.key = pickup_key(7, "requester")
+        racing = mock.patch("Rewards.ledger.posted_keys", return_value=set())
+        racing_services = mock.patch("Rewards.services.posted_keys", return_value=set())
+        racing.start()
+        racing_services.start()
+        self.addCleanup(racing.stop)
+        self.addCleanup(racing_services.stop)
+
+    def assertCreditedOnce(self):
+        self.user.refresh_from_db()
+        self.assertEqual(PointsLedger.objects.filter(key=self.key).count(), 1)
+        self.assertEqual((self.user.points, self.user.total_pickups), (30, 1))
+        self.assertEqual(
+            sorted(LeaderboardEntry.objects.filter(user=self.user).values_list("period", "points")),
+            [("all", 30), ("month", 30), ("week", 30)],
+        )
+        self.assertEqual(Activity.objects.filter(user=self.user).count(), 1)
+
+    def test_single_completions(self):
+        for expected in (True, False):
+            act = log_activity_and_update(user=self.user, product=self.product, weight_kg=10, key=self.key)
+            self.assertEqual(act is not None, expected)
+        self.assertCreditedOnce()
+
+    def test_bulk_completions(self):
+        entry = (self.user.pk, self.product, Decimal("10"), self.key)
+        self.assertEqual(len(log_activities_bulk([entry, entry])), 1)
+        self.assertEqual(log_activities_bulk([entry]), [])
+        self.assertCreditedOnce()
+
+
+class AreaChallengeTests(TestCase):
+    def setUp(self):
+        self.dhanmondi = User.objects.create_user(
+            email="dh@example.com", password="pw", name="Dh", role="household",
+            is_active=True, is_approved=True, address="House 5, Road 27, Dhanmondi, Dhaka",
+        )
+        self.gulshan = User.objects.create_user(
+            email="gu@example.com", password="pw", name="Gu", role="household",
+            is_active=True, is_approved=True,
+        )
+        User.objects.filter(pk=self.gulshan.pk).update(latitude=23.7930, longitude=90.4150)
+        self.product = Product.objects.create(kind="plastic", weight=10, price=1)
+        cache.clear()
+
+    def test_area_for(self):
+        self.assertEqual(areas.area_for("12/A, dhanmandi r/a"), "Dhanmondi")
+        self.assertEqual(areas.area_for("", 23.7930, 90.4150), "Gulshan")
+        self.assertIsNone(areas.area_for("Chattogram", 22.3569, 91.7832))
+
+    def test_counters_match_rebuild(self):
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("4"), key="t:1")
+        log_activities_bulk([
+            (self.gulshan.pk, self.product, Decimal("2"), "t:2"),
+            (self.gulshan.pk, self.product, Decimal("1.5"), "t:3"),
+            (self.dhanmondi.pk, self.product, Decimal("1"), "t:4"),
+        ])
+        live = areas.standings()
+        self.assertEqual(
+            [(s.area, s.weight_kg, s.activities) for s in live],
+            [("Dhanmondi", Decimal("5.000"), 2), ("Gulshan", Decimal("3.500"), 2)],
+        )
+        self.assertEqual(areas.rebuild_area_stats(), 2)
+        self.assertEqual(areas.standings(), live)
+
+    def test_standings_are_cached_between_rebuilds(self):
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("4"), key="t:1")
+        self.assertEqual([s.activities for s in areas.standings()], [1])
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("1"), key="t:2")
+        with self.assertNumQueries(1):  # the version stamp
+            self.assertEqual([s.activities for s in areas.standings()], [1])
+        cache.clear()  # the TTL runs out
+        self.assertEqual([s.activities for s in areas.standings()], [2])
+
+    def test_rebuild_moves_past_activity_to_the_current_address(self):
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("4"), key="t:1")
+        User.objects.filter(pk=self.dhanmondi.pk).update(address="Sector 7, Uttara, Dhaka")
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("1"), key="t:2")
+        self.assertEqual(
+            dict(AreaStat.objects.values_list("area", "activities")), {"Dhanmondi": 1, "Uttara": 1}
+        )
+
+        areas.rebuild_area_stats()
+        self.assertEqual([(s.area, s.activities) for s in areas.standings()], [("Uttara", 2)])
+
+    def test_json_compares_chosen_areas(self):
+        log_activity_and_update(user=self.dhanmondi, product=self.product, weight_kg=Decimal("4"), key="t:1")
+        self.client.force_login(self.gulshan)
+        data = self.client.get(reverse("rewards:areas"), {"area": ["Gulshan", "Dhanmondi"]}).json()
+        self.assertEqual([row["area"] for row in data["areas"]], ["Dhanmondi"])
+        self.assertEqual(self.client.get(reverse("rewards:areas"), {"month": "May"}).status_code, 400)
+
+
+class BadgeBackfillTests(TestCase):
+    def setUp(self):
+        product = Product.objects.create(kind="plastic", weight=10, price=1)
+        self.users = [
+            User.objects.create_user(
+                email=f"bf{i}@example.com", password="pw", name=f"BF{i}", role="household",
+                is_active=True, is_approved=True,
+            )
+            for i in range(4)
+        ]
+        log_activities_bulk([
+            (u.pk, product, Decimal("1"), f"bf:{i}:{k}") for i, u in enumerate(self.users) for k in range(i)
+        ])
+        self.badge = Badge.objects.bulk_create([Badge(code="pickups_2", name="Two", points_bonus=40)])[0]
+
+    def backfill(self, **opts):
+        out = StringIO()
+        call_command("backfill_badge", stdout=out, **opts)
+        return out.getvalue()
+
+    def test_backfill_is_idempotent(self):
+        self.assertIn("2 user(s) would qualify", self.backfill(code=["pickups_2"], dry_run=True))
+        self.assertFalse(UserBadge.objects.filter(badge=self.badge).exists())
+        # one qualifying user already earned it the normal way
+        evaluate_badges([self.users[3].pk])
+        before = dict(User.objects.values_list("pk", "points"))
+
+        self.assertIn("awarded to 1 user(s)", self.backfill(code=["pickups_2"]))
+        self.assertIn("pickups_2: awarded to 0 user(s)", self.backfill(code=["pickups_2"]))
+
+        holders = set(UserBadge.objects.filter(badge=self.badge).values_list("user_id", flat=True))
+        self.assertEqual(holders, {self.users[2].pk, self.users[3].pk})
+        self.assertEqual(PointsLedger.objects.filter(key__startswith=f"badge:{self.badge.pk}:").count(), 2)
+        self.assertEqual(Notification.objects.filter(payload__badge_id=self.badge.pk).count(), 2)
+        for u in self.users:
+            u.refresh_from_db()
+            self.assertEqual(u.points, before[u.pk] + (40 if u.pk == self.users[2].pk else 0))
+            self.assertEqual(u.points, sum(PointsLedger.objects.filter(user=u).values_list("points", flat=True)))
+
+
+class CompiledBadgeRulesTests(TestCase):
+    def test_thresholds(self):
+        Badge.objects.create(code="pickups_5", name="Five")
+        Badge.objects.create(code="co2_10", name="Ten kg")
+        Badge.objects.create(code="special_event", name="Not a rule")
+        rules = compiled_rules()
+
+        def codes(pickups, co2):
+            return [b.code for b in rules.qualifying(total_pickups=pickups, total_co2=Decimal(co2))]
+
+        self.assertEqual(codes(0, "0"), [])
+        self.assertEqual(codes(1, "9.999"), ["first_timer"])
+        self.assertEqual(codes(5, "10"), ["first_timer", "pickups_5", "co2_10"])
+        self.assertEqual(codes(20, "50"), ["first_timer", "pickups_5", "pickups_20", "co2_10", "CO2_50"])
+        self.assertEqual(rules.first_recycler.code, "first_recycler")
+        self.assertNotIn("special_event", [p.badge.code for p in rules.progress(total_pickups=0, total_co2=0)])
+
+    def test_cached_until_a_badge_changes(self):
+        rules = compiled_rules()
+        with self.assertNumQueries(1):  # the version stamp
+            self.assertIs(compiled_rules(), rules)
+
+        badge = Badge.objects.create(code="pickups_3", name="Three")
+        rules = compiled_rules()
+        self.assertIn(badge, rules.pickups_badges)
+
+        badge.code = "pickups_4"
+        badge.save()
+        self.assertEqual(compiled_rules().pickups_at, [1, 4, 20])
+        badge.delete()
+        self.assertEqual(compiled_rules().pickups_at, [1, 20])
+
+
+class BadgeRulesVersionTests(TestCase):
+    def test_rules_follow_a_bump_from_another_process(self):
+        self.assertNotIn("pickups_7", [b.code for b in compiled_rules().pickups_badges])
+        # another process adds a badge: no signal runs here, only the shared stamp moves
+        Badge.objects.bulk_create([Badge(code="pickups_7", name="Seven")])
+        VersionStamp.objects.update_or_create(name=badge_rules.VERSION_NAME, defaults={"version": 424242})
+        self.assertIn("pickups_7", [b.code for b in compiled_rules().pickups_badges])
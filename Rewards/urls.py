@@ -8,4 +8,6 @@ urlpatterns = [
     path("buyer/",      views.rewards_page, {"role": "buyer"},      name="buyer"),
     path("household/",  views.rewards_page, {"role": "household"},  name="household"),
     path("admin/",      views.rewards_page, {"role": "admin"},      name="admin"),
+    path("progress/",   views.badge_progress,                       name="progress"),
+    path("areas/",      views.area_challenge,                       name="areas"),
 ]
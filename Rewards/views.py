@@ -1,19 +1,27 @@
+from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Tuple
 
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import IntegrityError
-from django.db.models import Sum
+from django.db.models import Count, Sum
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_GET
 
-from .models import Badge, UserBadge, RewardItem
-from .services import redeem_reward, ensure_core_badges
-from Pickup.models import PickupRequest
+from . import areas, catalog, fulfilment, leaderboard
+from .badge_rules import Progress, compiled_rules
+from .models import Badge, LeaderboardEntry, Redemption, UserBadge, RewardItem
+from .services import redeem_reward
+from Pickup.models import PickupJob
 
-User = get_user_model()
+
+# roles with their own leaderboard; the admin page shows every role together
+_BOARD_ROLES = {"household", "collector", "buyer"}
 
 
 # helpers
@@ -47,20 +55,56 @@ def _role_pickup_qs(user, role: str):
     
     role = (role or "").lower()
     if role == "collector":
-        return PickupRequest.objects.filter(
+        return PickupJob.objects.filter(
             collector_id=user.id,
-            status=PickupRequest.Status.COMPLETED,
+            status=PickupJob.Status.COMPLETED,
         )
-    return PickupRequest.objects.filter(
+    return PickupJob.objects.filter(
         requester_id=user.id,
-        status=PickupRequest.Status.COMPLETED,
+        status=PickupJob.Status.COMPLETED,
+    )
+
+
+def _badge_progress(user) -> list[Progress]:
+    # from the counters already on request.user; no queries
+    return compiled_rules().progress(
+        total_pickups=user.total_pickups, total_co2=user.total_co2_saved_kg
     )
 
 
+def _fulfilment_queue(request) -> dict:
+    """One page of redemptions in the chosen status, oldest first, plus per-status counts."""
+    status = request.GET.get("queue") or Redemption.Status.PENDING
+    if status not in Redemption.Status.values:
+        status = Redemption.Status.PENDING
+    counts = dict(Redemption.objects.order_by().values_list("status").annotate(n=Count("id")))
+
+    qs = (
+        Redemption.objects.filter(status=status)
+        .select_related("user", "reward")
+        .order_by("created_at", "id")
+    )
+    paginator = Paginator(qs, getattr(settings, "REWARDS_QUEUE_PAGE_SIZE", 200))
+    try:
+        page_obj = paginator.page(_to_int(request.GET.get("page"), 1))
+    except (EmptyPage, PageNotAnInteger):
+        page_obj = paginator.page(1)
+
+    return {
+        "queue_status": status,
+        "queue_page": page_obj,
+        "queue_tabs": [(value, label, counts.get(value, 0)) for value, label in Redemption.Status.choices],
+        "queue_actions": [
+            (value, label) for value, label in Redemption.Status.choices
+            if status in fulfilment.TRANSITIONS.get(value, ())
+        ],
+    }
+
+
 def _completed_stats_for_role(user, role: str) -> Tuple[int, Decimal]:
-    qs = _role_pickup_qs(user, role)
-    completed_count = qs.count()
-    total_weight = qs.aggregate(s=Sum("weight_kg"))["s"] or Decimal("0")
+    stats = _role_pickup_qs(user, role).aggregate(n=Count("id"), s=Sum("weight_kg"))
+    completed_count = stats["n"]
+    total_weight = stats["s"] or Decimal("0")
     try:
         total_weight = Decimal(str(total_weight)).quantize(Decimal("0.001"))
     except Exception:
@@ -72,8 +116,6 @@ def _completed_stats_for_role(user, role: str) -> Tuple[int, Decimal]:
 def rewards_page(request, role: str):
     template = _template_for_role(role)
 
-    ensure_core_badges()
-
     # POST actions 
     if request.method == "POST":
         action = (request.POST.get("action") or "").strip()
@@ -93,8 +135,6 @@ def rewards_page(request, role: str):
                 messages.success(request, "You will get your reward soon.")
             except ValidationError as e:
                 messages.error(request, e.message)
-            except Exception as e:
-                messages.error(request, f"Redemption failed: {e}")
             return redirect(request.path)
 
         # Admin: create/update badge
@@ -134,6 +174,7 @@ def rewards_page(request, role: str):
                         points_bonus=points_bonus,
                     )
                     messages.success(request, "Badge created.")
+                catalog.invalidate_catalog()
             except IntegrityError:
                 messages.error(request, "Badge code or name must be unique.")
             return redirect(request.path)
@@ -172,10 +213,31 @@ def rewards_page(request, role: str):
                         image=image,
                     )
                     messages.success(request, "Reward created.")
+                catalog.invalidate_catalog()
             except Exception as e:
                 messages.error(request, f"Failed to save reward item: {e}")
             return redirect(request.path)
 
+        # Admin: move selected redemptions along the fulfilment queue
+        elif action == "admin_redemptions":
+            if not _is_admin(request.user):
+                messages.error(request, "Unauthorized.")
+                return redirect(request.path)
+
+            ids = [i for i in (_to_int(v) for v in request.POST.getlist("redemption_id")) if i]
+            status = request.POST.get("status") or ""
+            back = f"{request.path}?queue={request.POST.get('queue') or Redemption.Status.PENDING}"
+            if status not in fulfilment.TRANSITIONS or not ids:
+                messages.error(request, "Select redemptions and an action.")
+                return redirect(back)
+
+            moved = fulfilment.transition(ids, status)
+            label = Redemption.Status(status).label.lower()
+            messages.success(request, f"{moved} redemption(s) {label}.")
+            if moved < len(ids):
+                messages.error(request, f"{len(ids) - moved} could not be {label} from their current status.")
+            return redirect(back)
+
         else:
             messages.error(request, "Unknown action.")
             return redirect(request.path)
@@ -200,28 +262,91 @@ def rewards_page(request, role: str):
     earned_ids = set(
         UserBadge.objects.filter(user=user).values_list("badge_id", flat=True)
     )
-    all_badges = Badge.objects.all().order_by("points_bonus", "name")
-
-    top_users = (
-        User.objects.filter(points__gt=0)
-        .only("id", "name", "email", "role", "points")
-        .order_by("-points")[:100]
-    )
-
-    items = RewardItem.objects.filter(is_active=True).order_by("cost_points")
+    all_badges = catalog.badges()
+    progress = {p.badge.pk: p for p in _badge_progress(user)}
+    badge_cards = [(b, progress.get(b.pk)) for b in all_badges]
+
+    board = request.GET.get("board") or LeaderboardEntry.Period.ALL
+    if board not in LeaderboardEntry.Period.values:
+        board = LeaderboardEntry.Period.ALL
+    board_role = (role or "").lower()
+    if board_role not in _BOARD_ROLES:
+        board_role = None
+    top_users = leaderboard.top(board, board_role)
+    my_rank = leaderboard.rank_of(user, board) if board_role == user.role else None
+
+    is_admin = _is_admin(user)
+    items = catalog.rewards()
 
     context = {
         "overview": overview,
         "all_badges": all_badges,
+        "badge_cards": badge_cards,
         "earned_ids": earned_ids,
         "top_users": top_users,
+        "board": board,
+        "board_choices": LeaderboardEntry.Period.choices,
+        "my_rank": my_rank,
+        "area_board": areas.standings()[:5],
         "items": items,
-        "is_admin": _is_admin(user),
-        "admin_badges": all_badges if _is_admin(user) else [],
-        "admin_rewards": (
-            RewardItem.objects.all().order_by("-is_active", "cost_points")
-            if _is_admin(user) else []
-        ),
+        "is_admin": is_admin,
+        "admin_badges": all_badges if is_admin else [],
+        "admin_rewards": catalog.rewards(active_only=False) if is_admin else [],
         "rarity_choices": Badge.Rarity.choices,
     }
+    if is_admin and board_role is None:
+        context.update(_fulfilment_queue(request))
     return render(request, template, context)
+
+
+@login_required
+@require_GET
+def badge_progress(request):
+    """JSON progress toward every threshold badge, plus the next one per counter."""
+    user = request.user
+    earned = set(UserBadge.objects.filter(user=user).values_list("badge_id", flat=True))
+    rows, upcoming = [], {}
+    for p in _badge_progress(user):
+        row = {
+            "badge_id": p.badge.pk,
+            "code": p.badge.code,
+            "name": p.badge.name,
+            "counter": p.counter,
+            "current": str(p.current),
+            "threshold": str(p.threshold),
+            "percent": p.percent,
+            "earned": p.badge.pk in earned,
+        }
+        rows.append(row)
+        if not p.reached:
+            upcoming.setdefault(p.counter, row)
+    return JsonResponse({
+        "total_pickups": user.total_pickups,
+        "total_co2_saved_kg": str(user.total_co2_saved_kg),
+        "badges": rows,
+        "next": upcoming,
+    })
+
+
+@login_required
+@require_GET
+def area_challenge(request):
+    """
+    JSON totals per area for one month (`?month=YYYY-MM`, default this
+    month), most CO2 saved first; repeat `?area=` to compare chosen areas.
+    """
+    month = None
+    raw = (request.GET.get("month") or "").strip()
+    if raw:
+        try:
+            month = datetime.strptime(raw, "%Y-%m").date()
+        except ValueError:
+            return JsonResponse({"error": "month must be YYYY-MM"}, status=400)
+    wanted = {a.strip().lower() for a in request.GET.getlist("area") if a.strip()}
+
+    rows = [
+        {"area": s.area, "weight_kg": str(s.weight_kg), "co2_kg": str(s.co2_kg), "activities": s.activities}
+        for s in areas.standings(month)
+        if not wanted or s.area.lower() in wanted
+    ]
+    return JsonResponse({"month": f"{areas.month_of(month):%Y-%m}", "areas": rows})
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:28
+
+from django.db import migrations, models
+
+
+def backfill_coordinates(apps, schema_editor):
+    from User.models import coordinates_from_map_url
+
+    User = apps.get_model("User", "User")
+    for pk, url in User.objects.exclude(map_url="").values_list("pk", "map_url"):
+        coords = coordinates_from_map_url(url)
+        if coords:
+            User.objects.filter(pk=pk).update(latitude=coords[0], longitude=coords[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0009_user_points_user_total_co2_saved_kg_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Auto: parsed from map_url.', null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Auto: parsed from map_url.', null=True),
+        ),
+        migrations.RunPython(backfill_coordinates, migrations.RunPython.noop),
+    ]
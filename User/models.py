@@ -5,8 +5,34 @@ from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.auth.base_user import BaseUserManager
 from django.conf import settings
 from django.db.models import Avg, Count
-from urllib.parse import urlparse
+from urllib.parse import urlparse, unquote
 from decimal import Decimal, ROUND_HALF_UP
+import re
+
+_NUM = r"(-?\d{1,3}(?:\.\d+)?)"
+# Most specific first: a dropped pin (!3d/!4d), then query coordinates,
+# then the viewport centre after "@".
+_MAP_COORD_PATTERNS = (
+    re.compile(r"!3d" + _NUM + r"!4d" + _NUM),
+    re.compile(r"[?&](?:q|query|ll|center|destination|daddr)=(?:loc:)?" + _NUM + r",\s*" + _NUM, re.I),
+    re.compile(r"@" + _NUM + r"," + _NUM),
+)
+
+
+def coordinates_from_map_url(url: str):
+    """(lat, lng) embedded in a Google Maps link, or None (e.g. short links)."""
+    if not url:
+        return None
+    text = unquote(url)
+    for pattern in _MAP_COORD_PATTERNS:
+        m = pattern.search(text)
+        if not m:
+            continue
+        lat, lng = float(m.group(1)), float(m.group(2))
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            return lat, lng
+    return None
+
 
 # Manager 
 class UserManager(BaseUserManager):
@@ -86,6 +112,14 @@ class User(AbstractBaseUser):
         blank=True,
         help_text="Google Maps link to your address.",
     )
+    latitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text="Auto: parsed from map_url.",
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text="Auto: parsed from map_url.",
+    )
 
     # socials
     facebook = models.URLField(blank=True)
@@ -132,6 +166,21 @@ class User(AbstractBaseUser):
     def __str__(self):
         return f"{self.email} ({self.role})"
 
+    def save(self, *args, **kwargs):
+        if "map_url" not in self.get_deferred_fields():
+            coords = coordinates_from_map_url(self.map_url)
+            self.latitude, self.longitude = coords or (None, None)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "map_url" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "latitude", "longitude"}
+        super().save(*args, **kwargs)
+
+    @property
+    def coordinates(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
     def _is_valid_google_maps_url(self) -> bool:
         if not self.map_url:
             return False